@@ -0,0 +1,44 @@
+"""
+Measure the per-call overhead saved by the compiled combat rule tables.
+
+Compares single_combat, which looks its rules up in the tables, against resolving the
+same combats with rules derived from the units' traits on every call, as
+single_combat used to.
+
+Run with ``python benchmarks/bench_combat_rules.py``.
+"""
+
+import timeit
+
+from polycalculator import unit
+from polycalculator.combat import _compile_rules, _resolve_combat, single_combat
+
+MATCHUPS = {
+    "wa vs wa": (unit.Warrior(), unit.Warrior()),
+    "ar vs de": (unit.Archer(), unit.Defender()),
+    "kn vs je": (unit.Knight(), unit.Jelly()),
+    "ph vs ki": (unit.Phychi(), unit.Kiton()),
+    "rm wa vs bo de": (unit.Rammer(unit.Warrior()), unit.Bomber(unit.Defender())),
+}
+
+
+def per_call(stmt, number: int = 20_000, repeat: int = 7) -> float:
+    """The fastest time per call, in nanoseconds."""
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e9
+
+
+def main() -> None:
+    print(f"{'matchup':<16}{'derived':>10}{'compiled':>10}{'saved':>8}")
+    for name, (attacker, defender) in MATCHUPS.items():
+        derived = per_call(
+            lambda a=attacker, d=defender: _resolve_combat(a, d, _compile_rules(a, d))
+        )
+        compiled = per_call(lambda a=attacker, d=defender: single_combat(a, d))
+        print(
+            f"{name:<16}{derived:>8.0f}ns{compiled:>8.0f}ns"
+            f"{1 - compiled / derived:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compare batch evaluation with and without scenario deduplication.
+
+Run with ``python benchmarks/bench_dedup.py``.
+"""
+
+import random
+import time
+
+from polycalculator import batch, fuzz
+
+SCENARIOS = 100_000
+
+
+def best(run) -> float:
+    """The fastest of five runs, in milliseconds."""
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def main() -> None:
+    rng = random.Random(0)
+    for distinct in (100, 1_000, 10_000, SCENARIOS):
+        pool = [
+            (fuzz.random_state(rng), fuzz.random_state(rng)) for _ in range(distinct)
+        ]
+        scenarios = [rng.choice(pool) for _ in range(SCENARIOS)]
+        attackers = batch.UnitArrays(a for a, _ in scenarios)
+        defenders = batch.UnitArrays(d for _, d in scenarios)
+
+        _, stats = batch.single_combat_arrays_dedup(attackers, defenders)
+        plain = best(lambda a=attackers, d=defenders: batch.single_combat_arrays(a, d))
+        dedup = best(
+            lambda a=attackers, d=defenders: batch.single_combat_arrays_dedup(a, d)
+        )
+        print(
+            f"{stats.unique:>7} unique ({stats.ratio:>6.1f}x)"
+            f"{plain:>10.1f}ms plain{dedup:>10.1f}ms dedup"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure the throughput of a bulk job, and how much of it a resumed job skips.
+
+Run with ``python benchmarks/bench_jobs.py``. Writes a record file of random
+battles, runs :func:`polycalculator.jobs.run_job` on it, printing the throughput
+and ETA after each chunk, and stops the job halfway. The job is then resumed and
+finishes without redoing the chunks done before it was stopped.
+"""
+
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from polycalculator import encoding, jobs, records
+
+
+class Stop(Exception):
+    pass
+
+
+def write_battles(path: Path, count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    types = range(len(encoding.UNIT_TYPES))
+    with records.RecordWriter(path, records.RecordKind.BATTLE) as writer:
+        for _ in range(count):
+            writer.write_state(
+                encoding.UnitState(rng.choice(types), rng.randint(1, 40) * 5, 0, 0),
+                encoding.UnitState(rng.choice(types), rng.randint(1, 40) * 5, 0, 0),
+            )
+
+
+def show(progress: jobs.JobProgress) -> None:
+    eta = "-" if progress.eta is None else f"{progress.eta:.1f}s"
+    print(
+        f"{progress.chunks_done:>4}/{progress.chunks} chunks"
+        f"{progress.records_done:>10}/{progress.records} records"
+        f"{progress.rate:>12.0f}/s  ETA {eta}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=1 << 16)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / "battles"
+        output = Path(directory) / "results"
+        write_battles(source, args.records, args.seed)
+
+        def stop_halfway(progress: jobs.JobProgress) -> None:
+            show(progress)
+            if progress.chunks_done * 2 >= progress.chunks:
+                raise Stop
+
+        print("First run, stopped halfway:")
+        try:
+            jobs.run_job(source, output, args.chunk_size, args.workers, stop_halfway)
+        except Stop:
+            pass
+        print("Resumed run:")
+        jobs.run_job(source, output, args.chunk_size, args.workers, show)
+        print(f"{len(jobs.load_results(output).to_attacker)} results")
+
+
+if __name__ == "__main__":
+    main()
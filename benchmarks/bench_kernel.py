@@ -0,0 +1,63 @@
+"""
+Compare the kernel backends with the reference multi_combat.
+
+Run with ``python benchmarks/bench_kernel.py``. Install the ``numba`` extra to include
+the ``numba`` backend.
+"""
+
+import copy
+import random
+import time
+from collections.abc import Callable
+
+from polycalculator import batch, combat, fuzz, kernel
+
+SCENARIOS = 2_000
+
+
+def per_scenario(prepare: Callable[[], Callable[[], object]]) -> float:
+    """
+    The fastest time per scenario, in microseconds.
+
+    ``prepare`` creates fresh defenders, since multi-combats modify them, and returns
+    the function to time.
+    """
+    times = []
+    for _ in range(5):
+        run = prepare()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times) / SCENARIOS * 1e6
+
+
+def main() -> None:
+    rng = random.Random(0)
+    scenarios = [fuzz.random_case(rng, 8, 4) for _ in range(SCENARIOS)]
+    units = [
+        (batch.UnitArrays(a).units(), batch.UnitArrays(d).units()) for a, d in scenarios
+    ]
+    arrays = [(batch.UnitArrays(a), batch.UnitArrays(d)) for a, d in scenarios]
+
+    def reference():
+        fresh = copy.deepcopy(units)
+        return lambda: [combat.multi_combat(a, d) for a, d in fresh]
+
+    def kernel_units():
+        fresh = copy.deepcopy(units)
+        return lambda: [kernel.multi_combat(a, d) for a, d in fresh]
+
+    def kernel_arrays():
+        fresh = [(a, d.copy()) for a, d in arrays]
+        return lambda: [kernel.multi_combat_arrays(a, d) for a, d in fresh]
+
+    print(f"{'reference':<24}{per_scenario(reference):>8.1f}us")
+    for backend in kernel.available_backends():
+        kernel.set_backend(backend)
+        kernel.multi_combat_arrays(*arrays[0])  # Compile before timing.
+        print(f"{backend + ' units':<24}{per_scenario(kernel_units):>8.1f}us")
+        print(f"{backend + ' arrays':<24}{per_scenario(kernel_arrays):>8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measure how the memory budget of a cache trades against its hit rate.
+
+Run with ``python benchmarks/bench_memory_cache.py``. Searches for the cheapest
+composition against the same defenders with the cache of
+:func:`polycalculator.composition.cheapest_composition` given budgets from a tenth
+to the whole of what the search would use unbounded, and reports the time, the
+memory used, the hit rate, the evictions and the entries TinyLFU didn't admit, for
+each eviction policy.
+"""
+
+import argparse
+import time
+
+from polycalculator import cache, composition, unit
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--defenders", type=int, default=4)
+    args = parser.parse_args()
+
+    defenders = [unit.Giant() for _ in range(args.defenders)]
+    budget = 15 * args.defenders
+    attack = composition._attack
+    attack.cache.clear()
+    composition.cheapest_composition(defenders, budget)
+    full = attack.cache.size
+
+    print(
+        f"{'policy':<10}{'budget':>10}{'time':>12}{'size':>12}{'hits':>9}"
+        f"{'evictions':>11}{'rejections':>12}"
+    )
+    try:
+        for fraction in (0.1, 0.25, 0.5, 1.0):
+            for policy in cache.EvictionPolicy:
+                c = cache.MemoryCache(
+                    policy.value,
+                    int(full * fraction),
+                    cache.MemoryBudget(),
+                    uniform=True,
+                    policy=policy,
+                )
+                composition._attack = cache.memoize(c)(attack.__wrapped__)
+                start = time.perf_counter()
+                composition.cheapest_composition(defenders, budget)
+                seconds = time.perf_counter() - start
+
+                stats = c.stats()
+                print(
+                    f"{policy.value:<10}{c.max_bytes / 1024:>8.0f}KiB"
+                    f"{seconds * 1e3:>10.1f}ms{stats.size / 1024:>9.0f}KiB"
+                    f"{stats.hit_rate:>9.1%}{stats.evictions:>11}"
+                    f"{stats.rejections:>12}"
+                )
+    finally:
+        composition._attack = attack
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare the compact pickling of units and results with pickling their attributes.
+
+Run with ``python benchmarks/bench_pickle.py``. The attribute format is how units and
+results were pickled before: the class, then the attribute dictionary or the fields
+of the named tuple.
+"""
+
+import copyreg
+import io
+import pickle
+import random
+import time
+
+from polycalculator import batch, combat, fuzz, unit
+from polycalculator.unit import NavalUnit, Unit, _new_naval_unit
+
+ITEMS = 2_000
+
+
+class AttributePickler(pickle.Pickler):
+    def reducer_override(self, obj):
+        if isinstance(obj, NavalUnit):
+            types = (obj._naval_type, obj._land_type)
+            return _new_naval_unit, types, obj.__dict__
+        if isinstance(obj, Unit):
+            return copyreg.__newobj__, (type(obj),), obj.__dict__
+        if isinstance(obj, combat.CombatResult | combat.MultiCombatResult):
+            return type(obj), tuple(obj)
+        return NotImplemented
+
+
+def attribute_dumps(obj: object) -> bytes:
+    f = io.BytesIO()
+    AttributePickler(f, pickle.HIGHEST_PROTOCOL).dump(obj)
+    return f.getvalue()
+
+
+class CompactPickler(pickle.Pickler):
+    # The same hook as AttributePickler, so both pay for calling it.
+    def reducer_override(self, obj):
+        return NotImplemented
+
+
+def compact_dumps(obj: object) -> bytes:
+    f = io.BytesIO()
+    CompactPickler(f, pickle.HIGHEST_PROTOCOL).dump(obj)
+    return f.getvalue()
+
+
+def best(run) -> float:
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    rng = random.Random(0)
+    cases = [fuzz.random_case(rng, 4, 3) for _ in range(ITEMS)]
+    # Classes that aren't attributes of polycalculator.unit, like Raychi, can't be
+    # pickled by their attributes at all, so they are left out.
+    units = [batch.UnitArrays(a).units()[0] for a, _ in cases]
+    units = [
+        u
+        for u in units
+        if hasattr(unit, type(u.unit if isinstance(u, NavalUnit) else u).__name__)
+    ]
+    results = [
+        combat.single_combat(*batch.UnitArrays([a[0], d[0]]).units()) for a, d in cases
+    ]
+    multi_results = [
+        combat.multi_combat(batch.UnitArrays(a).units(), batch.UnitArrays(d).units())
+        for a, d in cases
+    ]
+
+    print(f"{'':<20}{'format':<11}{'bytes':>8}{'dumps':>10}{'loads':>10}")
+    for name, items in (
+        ("units", units),
+        ("combat results", results),
+        ("multi results", multi_results),
+    ):
+        for format, dumps in (
+            ("attributes", attribute_dumps),
+            ("compact", compact_dumps),
+        ):
+            # One item at a time, like the arguments and results of a process pool.
+            data = [dumps(item) for item in items]
+            size = sum(map(len, data)) / len(items)
+            dump = best(lambda items=items, dumps=dumps: [dumps(i) for i in items])
+            load = best(lambda data=data: [pickle.loads(d) for d in data])
+            print(
+                f"{name:<20}{format:<11}{size:>8.0f}"
+                f"{dump / len(items) * 1e6:>8.2f}us{load / len(items) * 1e6:>8.2f}us"
+            )
+
+
+if __name__ == "__main__":
+    main()
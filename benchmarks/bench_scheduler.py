@@ -0,0 +1,55 @@
+"""
+Measure the latency of calculations while searches keep the scheduler busy.
+
+Run with ``python benchmarks/bench_scheduler.py``. Searches run in their own worker
+processes, so on a machine with spare cores the calculation latency under load
+should match the idle latency.
+"""
+
+import random
+import time
+
+from polycalculator import assignment, fuzz, scheduler
+from polycalculator.command import Command
+
+CALCULATIONS = 500
+
+
+def latencies(s: scheduler.Scheduler, command: Command) -> tuple[float, float]:
+    """The median and 99th percentile latency of calculations, in milliseconds."""
+    times = []
+    for _ in range(CALCULATIONS):
+        start = time.perf_counter()
+        s.calculate(command).result()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2] * 1e3, times[len(times) * 99 // 100] * 1e3
+
+
+def main() -> None:
+    rng = random.Random(0)
+    calculation = Command(*fuzz.random_case(rng, 3, 2))
+    search = Command(
+        [fuzz.random_state(rng) for _ in range(assignment.MAX_ATTACKERS)],
+        [fuzz.random_state(rng) for _ in range(4)],
+    )
+
+    with scheduler.Scheduler() as s:
+        p50, p99 = latencies(s, calculation)
+        print(f"{'idle':<8}{p50:>8.2f}ms p50{p99:>8.2f}ms p99")
+
+        searches = []
+        while True:
+            try:
+                searches.append(s.optimize(search, timeout=60))
+            except scheduler.Overloaded:
+                break
+        p50, p99 = latencies(s, calculation)
+        print(f"{'loaded':<8}{p50:>8.2f}ms p50{p99:>8.2f}ms p99")
+        print(f"{len(searches)} searches accepted before backpressure")
+        for future in searches:
+            future.cancel()
+
+
+if __name__ == "__main__":
+    main()
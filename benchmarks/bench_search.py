@@ -0,0 +1,220 @@
+"""
+Measure how the search algorithms scale with the size of the armies.
+
+Run with ``python benchmarks/bench_search.py``. Each algorithm is run on seeded
+random armies of 2 to 30 units drawn from every unit type, until one run takes
+longer than ``--limit`` seconds, which is where the algorithm stops being practical.
+
+For every algorithm and army size the report has
+
+- the wall time of the fastest of ``--repeat`` runs,
+- the number of combats the algorithm looked up,
+- the share of those that were answered from the algorithm's cache, and
+- the peak memory allocated during a run, measured in a separate run since
+  :mod:`tracemalloc` slows everything down.
+
+Save a report with ``--json report.json`` and compare a later run against it with
+``--compare report.json``.
+"""
+
+import argparse
+import contextlib
+import copy
+import json
+import platform
+import random
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from importlib import metadata
+from types import ModuleType
+from typing import NamedTuple
+
+from polycalculator import assignment, combat, composition, lookahead, unit
+
+SIZES = (2, 3, 4, 6, 8, 10, 12, 15, 20, 25, 30)
+
+
+class Counts(NamedTuple):
+    lookups: int
+    hits: int | None
+
+
+class Row(NamedTuple):
+    algorithm: str
+    size: int
+    seconds: float
+    lookups: int
+    hit_rate: float | None
+    peak_kib: float
+
+
+def army(seed: int, size: int) -> list[unit.Unit]:
+    """A random army of fresh units, the same for every run with the same seed."""
+    rng = random.Random(f"{seed}:{size}")
+    types = list(unit._UnitRegistry.values())
+    return [rng.choice(types)() for _ in range(size)]
+
+
+@contextlib.contextmanager
+def recording(module: ModuleType, name: str) -> Iterator[list]:
+    """Collect every instance of a search class a module creates, while in use."""
+    instances: list = []
+    original = getattr(module, name)
+
+    class Recording(original):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            instances.append(self)
+
+    setattr(module, name, Recording)
+    try:
+        yield instances
+    finally:
+        setattr(module, name, original)
+
+
+def run_multi_combat(size: int, seed: int) -> Callable[[], Counts]:
+    """Both sides have ``size`` units."""
+    attackers = army(seed, size)
+    defenders = army(seed + 1, size)
+    # The attackers left once every defender is dead don't fight, so the combats
+    # are counted once, outside of the timed runs.
+    combats = sum(1 for _ in combat._attacks(attackers, copy.deepcopy(defenders)))
+
+    def run() -> Counts:
+        combat.multi_combat(attackers, copy.deepcopy(defenders))
+        return Counts(combats, None)
+
+    return run
+
+
+def run_assignment(size: int, seed: int) -> Callable[[], Counts]:
+    """``size`` attackers against up to four defenders."""
+    attackers = army(seed, size)
+    defenders = army(seed + 1, min(size, 4))
+
+    def run() -> Counts:
+        with recording(assignment, "_Defender") as searches:
+            assignment.assign_attacks(attackers, defenders)
+        lookups = sum(search.lookups for search in searches)
+        misses = sum(len(search._combats) for search in searches)
+        return Counts(lookups, lookups - misses)
+
+    return run
+
+
+def run_composition(size: int, seed: int) -> Callable[[], Counts]:
+    """A stack of ``size`` defenders, with 15 stars to spend on each."""
+    defenders = army(seed + 1, size)
+
+    def run() -> Counts:
+        composition._attack.cache.clear()
+        before = composition._attack.cache.stats()
+        composition.cheapest_composition(defenders, 15 * size)
+        after = composition._attack.cache.stats()
+        hits = after.hits - before.hits
+        return Counts(hits + after.misses - before.misses, hits)
+
+    return run
+
+
+def run_lookahead(size: int, seed: int) -> Callable[[], Counts]:
+    """The best order of ``size`` attackers against up to four defenders."""
+    attackers = army(seed, size)
+    defenders = army(seed + 1, min(size, 4))
+
+    def run() -> Counts:
+        with recording(lookahead, "_Search") as searches:
+            lookahead.rank_orders(attackers, defenders, limit=1)
+        return Counts(len(searches[0].plies), None)
+
+    return run
+
+
+ALGORITHMS: dict[str, tuple[Callable[[int, int], Callable[[], Counts]], int]] = {
+    "multi_combat": (run_multi_combat, max(SIZES)),
+    "assign_attacks": (run_assignment, assignment.MAX_ATTACKERS),
+    "cheapest_composition": (run_composition, max(SIZES)),
+    "rank_orders": (run_lookahead, lookahead.MAX_ORDERS_ATTACKERS),
+}
+"""Each algorithm and the largest army size it accepts."""
+
+
+def measure(name: str, size: int, seed: int, repeat: int) -> Row:
+    prepare, _ = ALGORITHMS[name]
+    run = prepare(size, seed)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts = run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    hit_rate = None
+    if counts.hits is not None and counts.lookups:
+        hit_rate = counts.hits / counts.lookups
+    return Row(name, size, min(times), counts.lookups, hit_rate, peak / 1024)
+
+
+def format_row(row: Row, baseline: Row | None = None) -> str:
+    hit_rate = "-" if row.hit_rate is None else f"{row.hit_rate:.1%}"
+    line = (
+        f"{row.algorithm:<22}{row.size:>5}{row.seconds * 1e3:>12.2f}ms"
+        f"{row.lookups:>12}{hit_rate:>9}{row.peak_kib:>12.0f}KiB"
+    )
+    if baseline is not None:
+        line += f"{row.seconds / baseline.seconds:>9.2f}x"
+    return line
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--limit", type=float, default=2.0)
+    parser.add_argument("--algorithm", action="append", choices=list(ALGORITHMS))
+    parser.add_argument("--json", help="Save the report to this file.")
+    parser.add_argument("--compare", help="Compare the times with a saved report.")
+    args = parser.parse_args()
+
+    baselines = {}
+    if args.compare:
+        with open(args.compare) as f:
+            for row in json.load(f)["rows"]:
+                baselines[row["algorithm"], row["size"]] = Row(**row)
+
+    header = f"{'algorithm':<22}{'size':>5}{'time':>14}{'lookups':>12}{'hits':>9}"
+    header += f"{'peak':>15}" + (f"{'vs base':>9}" if baselines else "")
+    print(header)
+
+    rows = []
+    for name in args.algorithm or ALGORITHMS:
+        for size in SIZES:
+            if size > ALGORITHMS[name][1]:
+                break
+            row = measure(name, size, args.seed, args.repeat)
+            rows.append(row)
+            print(format_row(row, baselines.get((name, size))))
+            if row.seconds > args.limit:
+                print(f"{name}: stopping at {size} units, over {args.limit}s")
+                break
+
+    if args.json:
+        report = {
+            "version": metadata.version("polycalculator"),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "rows": [row._asdict() for row in rows],
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Generate load against a ShardedCalculator with different numbers of workers.
+
+Run with ``python benchmarks/bench_sharding.py``. Queries are drawn from a fixed
+pool with a skewed distribution, so a few scenarios repeat often, like the queries a
+bot gets.
+"""
+
+import random
+import time
+
+from polycalculator import fuzz
+from polycalculator.command import Command
+from polycalculator.sharding import ShardedCalculator
+
+QUERIES = 20_000
+POOL = 5_000
+CACHE_BYTES = 4 << 20
+
+
+def queries(rng: random.Random) -> list[Command]:
+    pool = [Command(*fuzz.random_case(rng, 8, 4)) for _ in range(POOL)]
+    weights = [1 / (rank + 1) for rank in range(POOL)]
+    return rng.choices(pool, weights, k=QUERIES)
+
+
+def run(commands: list[Command], workers: int, affinity: bool) -> None:
+    with ShardedCalculator(workers, CACHE_BYTES, affinity) as calculator:
+        calculator.stats()  # Wait for every worker to start.
+        start = time.perf_counter()
+        futures = [calculator.submit(command) for command in commands]
+        for future in futures:
+            future.result()
+        seconds = time.perf_counter() - start
+        stats = calculator.stats()
+
+    hits = sum(s.hits for s in stats) / sum(s.queries for s in stats)
+    routing = "affinity" if affinity else "round-robin"
+    print(
+        f"{workers:>3} workers {routing:<12}{len(commands) / seconds:>10.0f} queries/s"
+        f"{hits:>8.1%} hits"
+    )
+
+
+def main() -> None:
+    commands = queries(random.Random(0))
+    for workers in (1, 2, 4, 8):
+        for affinity in (True, False):
+            run(commands, workers, affinity)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Measure how long a new worker process takes to answer its first query.
+
+Run with ``python benchmarks/bench_startup.py``. Compares spawning, forking and
+forking from the warm fork server of :func:`polycalculator.pool.warm_context`. The
+first warm worker also pays for starting the fork server.
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+
+from polycalculator import combat, pool
+from polycalculator.command import parse_command
+
+WORKERS = 5
+
+
+def first_query() -> int:
+    attackers, defenders = parse_command("wa 8, rm kn v / de d, gi").units()
+    return combat.multi_combat(attackers, defenders).attackers[0].damage
+
+
+def first_query_ms(context: BaseContext) -> float:
+    start = time.perf_counter()
+    with ProcessPoolExecutor(1, mp_context=context) as executor:
+        executor.submit(first_query).result()
+    return (time.perf_counter() - start) * 1e3
+
+
+def main() -> None:
+    contexts = {
+        "spawn": multiprocessing.get_context("spawn"),
+        "fork": multiprocessing.get_context("fork"),
+        "warm fork server": pool.warm_context(),
+    }
+    for name, context in contexts.items():
+        times = [first_query_ms(context) for _ in range(WORKERS)]
+        print(
+            f"{name:<18}{times[0]:>9.1f}ms first worker"
+            f"{min(times[1:]):>9.1f}ms later workers"
+        )
+
+
+if __name__ == "__main__":
+    main()
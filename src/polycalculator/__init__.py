@@ -2,10 +2,48 @@ from polycalculator import unit
 from polycalculator import combat
 from polycalculator import status_effect
 from polycalculator import trait
+from polycalculator import threshold
+from polycalculator import encoding
+from polycalculator import cache
+from polycalculator import records
+from polycalculator import frozen
+from polycalculator import batch
+from polycalculator import simulate
+from polycalculator import fuzz
+from polycalculator import command
+from polycalculator import executor
+from polycalculator import kernel
+from polycalculator import assignment
+from polycalculator import events
+from polycalculator import composition
+from polycalculator import sharding
+from polycalculator import scheduler
+from polycalculator import pool
+from polycalculator import lookahead
+from polycalculator import jobs
 
 __all__ = [
+    "assignment",
+    "batch",
+    "cache",
     "combat",
+    "command",
+    "composition",
+    "encoding",
+    "events",
+    "executor",
+    "frozen",
+    "fuzz",
+    "jobs",
+    "kernel",
+    "lookahead",
+    "pool",
+    "records",
+    "scheduler",
+    "sharding",
+    "simulate",
     "status_effect",
+    "threshold",
     "trait",
     "unit",
 ]
@@ -0,0 +1,5 @@
+"""Warm up the process that imports this module, for use as a fork server preload."""
+
+from polycalculator.pool import warm_up
+
+warm_up()
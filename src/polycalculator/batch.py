@@ -0,0 +1,403 @@
+from array import array
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from polycalculator.encoding import (
+    NAVAL_TYPES,
+    UNIT_TYPES,
+    UnitState,
+    decode_unit,
+    effect_bit,
+    encode_unit,
+    trait_bit,
+    traits_to_mask,
+)
+from polycalculator.records import UNIT_FIELDS, Records
+from polycalculator.status_effect import StatusEffect
+from polycalculator.trait import Trait
+from polycalculator.unit import Unit
+
+
+class _TypeStats(NamedTuple):
+    max_hp: int
+    attack: int
+    defense: int
+    range: int
+    traits: int
+
+
+def _type_stats(unit: Unit) -> _TypeStats:
+    return _TypeStats(
+        unit.max_hp, unit.attack, unit.defense, unit.range, traits_to_mask(unit.traits)
+    )
+
+
+_UNIT_STATS = tuple(_type_stats(cls()) for cls in UNIT_TYPES)
+_NAVAL_STATS = tuple(None if cls is None else _type_stats(cls()) for cls in NAVAL_TYPES)
+
+_BOOSTED = effect_bit(StatusEffect.BOOSTED)
+_CONVERTED = effect_bit(StatusEffect.CONVERTED)
+_EXPLODING = effect_bit(StatusEffect.EXPLODING)
+_FORTIFIED = effect_bit(StatusEffect.FORTIFIED)
+_FROZEN = effect_bit(StatusEffect.FROZEN)
+_POISONED = effect_bit(StatusEffect.POISONED)
+_SPLASHING = effect_bit(StatusEffect.SPLASHING)
+_TAKES_RETALIATION = effect_bit(StatusEffect.TAKES_RETALIATION)
+_VETERAN = effect_bit(StatusEffect.VETERAN)
+_WALLED = effect_bit(StatusEffect.WALLED)
+
+_CONVERT = trait_bit(Trait.CONVERT)
+_EXPLODE = trait_bit(Trait.EXPLODE)
+_FREEZE = trait_bit(Trait.FREEZE)
+_HEAL = trait_bit(Trait.HEAL)
+_POISON = trait_bit(Trait.POISON)
+_SPLASH = trait_bit(Trait.SPLASH)
+_STATIC = trait_bit(Trait.STATIC)
+_STIFF = trait_bit(Trait.STIFF)
+_SURPRISE = trait_bit(Trait.SURPRISE)
+_TENTACLES = trait_bit(Trait.TENTACLES)
+_NO_RETALIATION = _SURPRISE | _CONVERT | _FREEZE | _TENTACLES
+
+
+class UnitArrays:
+    """
+    The states of many units, stored as parallel arrays.
+
+    Index ``i`` of each array holds the corresponding field of the ``i``-th unit's
+    :class:`~polycalculator.encoding.UnitState`.
+
+    Parameters
+    ----------
+    states : Iterable[UnitState]
+        The encoded states of the units.
+    """
+
+    type_id: array
+    """The units' type ids."""
+    hp: array
+    """The units' current HP."""
+    effects: array
+    """The units' status effects, as bitmasks."""
+    naval_id: array
+    """The units' naval ids."""
+
+    def __init__(self, states: Iterable[UnitState] = ()):
+        self.type_id = array("H")
+        self.hp = array("H")
+        self.effects = array("H")
+        self.naval_id = array("H")
+        for type_id, hp, effects, naval_id in states:
+            self.type_id.append(type_id)
+            self.hp.append(hp)
+            self.effects.append(effects)
+            self.naval_id.append(naval_id)
+
+    @classmethod
+    def from_units(cls, units: Iterable[Unit]) -> "UnitArrays":
+        """Create arrays from the states of units."""
+        return cls(encode_unit(unit) for unit in units)
+
+    @classmethod
+    def from_records(
+        cls, records: Records, unit: int = 0, start: int = 0, stop: int | None = None
+    ) -> "UnitArrays":
+        """
+        Create arrays from one unit of each record in a record file.
+
+        The columns are copied out of the file with strided slices, so no objects are
+        created per record.
+
+        Parameters
+        ----------
+        records : Records
+            The records.
+        unit : int
+            The index of the unit in each record. For battle records, 0 is the
+            attacker and 1 is the defender.
+        start : int
+            The index of the first record.
+        stop : int | None
+            The index after the last record, or None for the end of the file.
+        """
+        arrays = cls()
+        start, stop, _ = slice(start, stop).indices(len(records))
+        if start >= stop:
+            return arrays
+        fields = records.kind.fields
+        flat = array("H")
+        flat.frombytes(records.view.cast("B")[start * fields * 2 : stop * fields * 2])
+        first = unit * UNIT_FIELDS
+        arrays.type_id = flat[first::fields]
+        arrays.hp = flat[first + 1 :: fields]
+        arrays.effects = flat[first + 2 :: fields]
+        arrays.naval_id = flat[first + 3 :: fields]
+        return arrays
+
+    def __len__(self) -> int:
+        return len(self.type_id)
+
+    def state(self, index: int) -> UnitState:
+        """Get the encoded state of a unit."""
+        return UnitState(
+            self.type_id[index],
+            self.hp[index],
+            self.effects[index],
+            self.naval_id[index],
+        )
+
+    def units(self) -> list[Unit]:
+        """Create units from the states."""
+        return [decode_unit(self.state(i)) for i in range(len(self))]
+
+    def slice(self, start: int, stop: int) -> "UnitArrays":
+        """Copy the states of the units from ``start`` up to ``stop``."""
+        arrays = UnitArrays()
+        arrays.type_id = self.type_id[start:stop]
+        arrays.hp = self.hp[start:stop]
+        arrays.effects = self.effects[start:stop]
+        arrays.naval_id = self.naval_id[start:stop]
+        return arrays
+
+    def take(self, indices: Iterable[int]) -> "UnitArrays":
+        """Copy the states of the units at the given indices, in order."""
+        indices = list(indices)
+        arrays = UnitArrays()
+        arrays.type_id = array("H", [self.type_id[i] for i in indices])
+        arrays.hp = array("H", [self.hp[i] for i in indices])
+        arrays.effects = array("H", [self.effects[i] for i in indices])
+        arrays.naval_id = array("H", [self.naval_id[i] for i in indices])
+        return arrays
+
+    def copy(self) -> "UnitArrays":
+        """Copy the arrays."""
+        arrays = UnitArrays()
+        arrays.type_id = array("H", self.type_id)
+        arrays.hp = array("H", self.hp)
+        arrays.effects = array("H", self.effects)
+        arrays.naval_id = array("H", self.naval_id)
+        return arrays
+
+
+class CombatArrays(NamedTuple):
+    """The results of many single combats, stored as parallel arrays."""
+
+    to_attacker: array
+    """The damage each attacker will take."""
+    to_defender: array
+    """The damage each defender will take."""
+    attacker_effects: array
+    """The status effects each attacker will receive, as bitmasks."""
+    defender_effects: array
+    """The status effects each defender will receive, as bitmasks."""
+
+
+def _max_hp(type_id: int, effects: int) -> int:
+    stats = _UNIT_STATS[type_id]
+    if effects & _VETERAN and not stats.traits & _STATIC:
+        return stats.max_hp + 50
+    return stats.max_hp
+
+
+def _combat_stats(type_id: int, naval_id: int) -> _TypeStats:
+    return _UNIT_STATS[type_id] if not naval_id else _NAVAL_STATS[naval_id]  # type: ignore[return-value]
+
+
+def single_combat_arrays(attackers: UnitArrays, defenders: UnitArrays) -> CombatArrays:
+    """
+    Simulate single combats between many pairs of units.
+
+    The ``i``-th attacker attacks the ``i``-th defender. Neither is modified. The
+    combats are simulated by :func:`polycalculator.kernel.single_combat_arrays`, with
+    the kernel backend in use.
+
+    Parameters
+    ----------
+    attackers : UnitArrays
+        The attacking units.
+    defenders : UnitArrays
+        The defending units.
+
+    Returns
+    -------
+    CombatArrays
+        The damage done and status effects applied to each attacker and defender.
+    """
+    # The kernel is built on the arrays of this module, so it can't be imported
+    # before now.
+    from polycalculator import kernel
+
+    return kernel.single_combat_arrays(attackers, defenders)
+
+
+def _scenario_key(
+    a_type: int,
+    a_hp: int,
+    a_effects: int,
+    a_naval: int,
+    d_type: int,
+    d_hp: int,
+    d_effects: int,
+    d_naval: int,
+) -> int:
+    return (
+        a_type
+        | a_hp << 16
+        | a_effects << 32
+        | a_naval << 48
+        | d_type << 64
+        | d_hp << 80
+        | d_effects << 96
+        | d_naval << 112
+    )
+
+
+def scenario_key(attacker: UnitState, defender: UnitState) -> int:
+    """
+    Get the key of a single combat scenario.
+
+    The key packs the fields of both encoded states into one integer, so equal
+    scenarios have equal keys and different scenarios have different keys. Unlike
+    the hash of a unit, it is the same in every process.
+
+    Parameters
+    ----------
+    attacker : UnitState
+        The encoded state of the attacking unit.
+    defender : UnitState
+        The encoded state of the defending unit.
+
+    Returns
+    -------
+    int
+        The key.
+    """
+    return _scenario_key(*attacker, *defender)
+
+
+class DedupStats(NamedTuple):
+    """How many of a batch of scenarios are duplicates."""
+
+    scenarios: int
+    """The number of scenarios."""
+    unique: int
+    """The number of different scenarios."""
+
+    @property
+    def duplicates(self) -> int:
+        """The number of scenarios that repeat an earlier one."""
+        return self.scenarios - self.unique
+
+    @property
+    def ratio(self) -> float:
+        """The number of scenarios per different scenario."""
+        return self.scenarios / self.unique if self.unique else 1.0
+
+
+class UniqueScenarios(NamedTuple):
+    """The different scenarios of a batch, and where each scenario came from."""
+
+    attackers: UnitArrays
+    """The attacking units of the different scenarios."""
+    defenders: UnitArrays
+    """The defending units of the different scenarios."""
+    index: array
+    """The index of each scenario of the batch in the different scenarios."""
+
+    @property
+    def stats(self) -> DedupStats:
+        """The duplication statistics of the batch."""
+        return DedupStats(len(self.index), len(self.attackers))
+
+    def scatter(self, results: CombatArrays) -> CombatArrays:
+        """
+        Copy the results of the different scenarios to every scenario of the batch.
+
+        Parameters
+        ----------
+        results : CombatArrays
+            The results of the different scenarios, in order.
+
+        Returns
+        -------
+        CombatArrays
+            The results of the scenarios of the batch, in order.
+        """
+        index = self.index
+        return CombatArrays(
+            array("i", [results.to_attacker[i] for i in index]),
+            array("i", [results.to_defender[i] for i in index]),
+            array("H", [results.attacker_effects[i] for i in index]),
+            array("H", [results.defender_effects[i] for i in index]),
+        )
+
+
+def dedup_scenarios(attackers: UnitArrays, defenders: UnitArrays) -> UniqueScenarios:
+    """
+    Find the different scenarios in a batch of single combats.
+
+    Scenarios are compared by :func:`scenario_key`, and the first occurrence of each
+    one is kept.
+
+    Parameters
+    ----------
+    attackers : UnitArrays
+        The attacking units.
+    defenders : UnitArrays
+        The defending units.
+
+    Returns
+    -------
+    UniqueScenarios
+        The different scenarios.
+    """
+    if len(attackers) != len(defenders):
+        raise ValueError("There must be as many attackers as defenders")
+
+    seen: dict[int, int] = {}
+    first = []
+    index = array("I")
+    for i, key in enumerate(
+        map(
+            _scenario_key,
+            attackers.type_id,
+            attackers.hp,
+            attackers.effects,
+            attackers.naval_id,
+            defenders.type_id,
+            defenders.hp,
+            defenders.effects,
+            defenders.naval_id,
+        )
+    ):
+        j = seen.setdefault(key, len(first))
+        if j == len(first):
+            first.append(i)
+        index.append(j)
+    return UniqueScenarios(attackers.take(first), defenders.take(first), index)
+
+
+def single_combat_arrays_dedup(
+    attackers: UnitArrays, defenders: UnitArrays
+) -> tuple[CombatArrays, DedupStats]:
+    """
+    Simulate single combats between many pairs of units, once per different scenario.
+
+    This gives the same results as :func:`single_combat_arrays`, and is faster when
+    many scenarios repeat, such as in battles taken from replays.
+
+    Parameters
+    ----------
+    attackers : UnitArrays
+        The attacking units.
+    defenders : UnitArrays
+        The defending units.
+
+    Returns
+    -------
+    tuple[CombatArrays, DedupStats]
+        The damage done and status effects applied to each attacker and defender, and
+        how many scenarios were duplicates.
+    """
+    unique = dedup_scenarios(attackers, defenders)
+    results = single_combat_arrays(unique.attackers, unique.defenders)
+    return unique.scatter(results), unique.stats
@@ -0,0 +1,668 @@
+import functools
+import itertools
+import sqlite3
+import sys
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Sequence
+from enum import Enum
+from os import PathLike
+from typing import Any, NamedTuple, ParamSpec, Protocol, Self, TypeVar
+
+from polycalculator.combat import (
+    CombatResult,
+    MultiCombatResult,
+    multi_combat,
+    single_combat,
+)
+from polycalculator.encoding import (
+    FINGERPRINT,
+    decode_combat_result,
+    decode_multi_combat_result,
+    encode_combat_result,
+    encode_multi_combat_result,
+    scenario_key,
+)
+from polycalculator.unit import Unit
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+_R_co = TypeVar("_R_co", covariant=True)
+
+_SINGLE = b"s"
+_MULTI = b"m"
+_TOUCH_INTERVAL = 60.0
+"""How many seconds an entry's last use time can be out of date by."""
+
+
+class _CombatCache(ABC):
+    """Combat simulations cached in a store of encoded results."""
+
+    @abstractmethod
+    def get(self, key: bytes) -> bytes | None:
+        """Get the value stored for a key, or None if there is none."""
+
+    @abstractmethod
+    def set(self, key: bytes, value: bytes) -> None:
+        """Store a value for a key."""
+
+    def single_combat(self, attacker: Unit, defender: Unit) -> CombatResult:
+        """
+        Simulate a single combat between two units, using the cache.
+
+        Parameters
+        ----------
+        attacker : Unit
+            The attacking unit.
+        defender : Unit
+            The defending unit.
+
+        Returns
+        -------
+        CombatResult
+            The damage done and status effects applied to the attacker and defender.
+        """
+        key = _SINGLE + scenario_key((attacker,), (defender,))
+        value = self.get(key)
+        if value is not None:
+            return decode_combat_result(value)
+
+        result = single_combat(attacker, defender)
+        self.set(key, encode_combat_result(result))
+        return result
+
+    def multi_combat(
+        self, attackers: Sequence[Unit], defenders: Sequence[Unit]
+    ) -> MultiCombatResult:
+        """
+        Simulate a multi-combat, using the cache.
+
+        Like :func:`polycalculator.combat.multi_combat`, the damage and status effects
+        are applied to the defenders.
+
+        Parameters
+        ----------
+        attackers : Sequence[Unit]
+            The attacking units.
+        defenders : Sequence[Unit]
+            The defending units.
+
+        Returns
+        -------
+        MultiCombatResult
+            The damage done and status effects applied to the attackers and defenders.
+        """
+        key = _MULTI + scenario_key(attackers, defenders)
+        value = self.get(key)
+        if value is None:
+            result = multi_combat(attackers, defenders)
+            self.set(key, encode_multi_combat_result(result))
+            return result
+
+        result = decode_multi_combat_result(value)
+        for defender, defender_result in zip(defenders, result.defenders):
+            defender.current_hp -= defender_result.damage
+            defender.add_status_effects(defender_result.status_effects)
+        return result
+
+
+class PersistentCache(_CombatCache):
+    """
+    A combat result cache stored in an SQLite database.
+
+    The database can be shared by any number of processes on the same host, and
+    outlives them, so a restarted process starts with every result cached before. A
+    cache can also be used from several threads at once. Entries are keyed by the
+    canonical encoding of the scenario, and the least recently used entries are
+    evicted once the cache grows past ``max_entries``.
+
+    Parameters
+    ----------
+    path : str | PathLike[str]
+        The path of the database file. It is created if it does not exist.
+    max_entries : int
+        The maximum number of results to keep.
+    timeout : float
+        How many seconds to wait for another process to release the database.
+    """
+
+    def __init__(
+        self,
+        path: str | PathLike[str],
+        max_entries: int = 1_000_000,
+        timeout: float = 30.0,
+    ):
+        if max_entries <= 0:
+            raise ValueError("Max entries must be greater than 0")
+        self.max_entries = max_entries
+        # The connection is shared by every thread, so calls on it are serialized.
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key BLOB PRIMARY KEY, value BLOB NOT NULL, used REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_used ON results (used)"
+            )
+            # Keep a running count, since counting the rows scans the whole table.
+            self._connection.execute("INSERT OR IGNORE INTO meta VALUES ('count', 0)")
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS results_insert AFTER INSERT ON results "
+                "BEGIN UPDATE meta SET value = value + 1 WHERE key = 'count'; END"
+            )
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS results_delete AFTER DELETE ON results "
+                "BEGIN UPDATE meta SET value = value - 1 WHERE key = 'count'; END"
+            )
+            row = self._connection.execute(
+                "SELECT value FROM meta WHERE key = 'fingerprint'"
+            ).fetchone()
+            if row is None or row[0] != FINGERPRINT:
+                # Results encoded for different unit data are meaningless.
+                self._connection.execute("DELETE FROM results")
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)",
+                    (FINGERPRINT,),
+                )
+
+    def get(self, key: bytes) -> bytes | None:
+        """Get the value stored for a key, or None if there is none."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, used FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, used = row
+            now = time.time()
+            if now - used > _TOUCH_INTERVAL:
+                # Only write when the use time is stale so that hits on popular keys
+                # don't contend for the write lock.
+                self._connection.execute(
+                    "UPDATE results SET used = ? WHERE key = ?", (now, key)
+                )
+        return value
+
+    def set(self, key: bytes, value: bytes) -> None:
+        """Store a value for a key, evicting old entries if the cache is full."""
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._connection.execute(
+                "INSERT INTO results VALUES (?, ?, ?) ON CONFLICT (key) "
+                "DO UPDATE SET value = excluded.value, used = excluded.used",
+                (key, value, time.time()),
+            )
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                # Evict a tenth of the cache at once so eviction is rare.
+                self._connection.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY used LIMIT ?)",
+                    (excess + self.max_entries // 10,),
+                )
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._connection.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT value FROM meta WHERE key = 'count'"
+            ).fetchone()[0]
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+_ENTRY_OVERHEAD = 112
+"""The approximate number of bytes an entry of a :class:`MemoryCache` takes itself."""
+_TICKS = itertools.count(1)
+"""The clock that orders the uses of the entries of every :class:`MemoryCache`."""
+_CONTAINERS = (tuple, list, set, frozenset)
+_MISSING = object()
+
+
+def sizeof(value: object) -> int:
+    """
+    Estimate the number of bytes a cached value takes.
+
+    Numbers, strings, bytes and the containers holding them are counted in full.
+    Other objects, such as unit classes, are shared with the rest of the program
+    rather than owned by the cache, so only the reference to them is counted.
+
+    Parameters
+    ----------
+    value : object
+        The value.
+
+    Returns
+    -------
+    int
+        The estimated size, in bytes.
+    """
+    if isinstance(value, (int, float, str, bytes)) or value is None:
+        return sys.getsizeof(value)
+    if isinstance(value, _CONTAINERS):
+        return sys.getsizeof(value) + sum(map(sizeof, value))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sizeof(k) + sizeof(v) for k, v in value.items()
+        )
+    return 8
+
+
+class CacheStats(NamedTuple):
+    """The statistics of a :class:`MemoryCache`."""
+
+    name: str
+    """The name of the cache."""
+    entries: int
+    """The number of entries in the cache."""
+    size: int
+    """The estimated number of bytes the entries take."""
+    max_bytes: int | None
+    """The budget of the cache in bytes, or None for no budget of its own."""
+    hits: int
+    """The number of lookups answered from the cache."""
+    misses: int
+    """The number of lookups that weren't."""
+    evictions: int
+    """The number of entries evicted to stay within a budget."""
+    rejections: int
+    """The number of new entries :attr:`EvictionPolicy.TINY_LFU` didn't admit."""
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class MemoryBudget:
+    """
+    A memory budget shared by several :class:`MemoryCache` instances.
+
+    When the caches together take more than the budget, the least recently used
+    entries of all of them are evicted first, whichever cache holds them, so the
+    memory goes to the entries that are used the most. The budget only holds weak
+    references to its caches, so a cache that is no longer used is dropped from it
+    along with its entries.
+
+    Parameters
+    ----------
+    max_bytes : int | None
+        The budget in bytes, or None for no budget.
+    """
+
+    def __init__(self, max_bytes: int | None = None):
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("Max bytes must be greater than 0")
+        self._max_bytes = max_bytes
+        self.size = 0
+        """The estimated number of bytes the entries of the caches take."""
+        # Keyed by id so that the caches stay in the order they were created.
+        self._caches: weakref.WeakValueDictionary[int, MemoryCache] = (
+            weakref.WeakValueDictionary()
+        )
+        # One lock for every cache of the budget, since eviction crosses caches.
+        self._lock = threading.RLock()
+
+    @property
+    def max_bytes(self) -> int | None:
+        """The budget in bytes. Lowering it evicts entries right away."""
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int | None) -> None:
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("Max bytes must be greater than 0")
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def stats(self) -> list[CacheStats]:
+        """Get the statistics of each cache using the budget."""
+        with self._lock:
+            return [cache.stats() for cache in self._caches.values()]
+
+    def _evict(self) -> None:
+        if self._max_bytes is None or self.size <= self._max_bytes:
+            return
+        caches = list(self._caches.values())
+        while self.size > self._max_bytes:
+            oldest = min(
+                (cache for cache in caches if cache._settle()),
+                key=lambda cache: next(iter(cache._entries.values()))[2],
+            )
+            oldest._pop()
+
+    def _release(self, entries: OrderedDict[Hashable, list]) -> None:
+        """Drop the entries of a cache that is no longer used from the budget."""
+        with self._lock:
+            self.size -= sum(entry[1] for entry in entries.values())
+            entries.clear()
+
+
+GLOBAL_BUDGET = MemoryBudget(64 << 20)
+"""The budget every :class:`MemoryCache` shares unless it is given another."""
+
+
+class EvictionPolicy(Enum):
+    """How a :class:`MemoryCache` chooses the entries to keep."""
+
+    LRU = "lru"
+    """Evict the least recently used entries."""
+    TINY_LFU = "tinylfu"
+    """
+    Evict the least recently used entries, but only let a new entry into a full cache
+    if its key was looked up more often recently than the key of the entry it would
+    evict. Entries that are used often then survive searches that look up many keys
+    only once.
+    """
+
+
+_HALVE = bytes(i >> 1 for i in range(256))
+_SKETCH_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F)
+_MASK_64 = (1 << 64) - 1
+
+
+class _FrequencySketch:
+    """
+    The approximate number of recent lookups of each key, in a count-min sketch.
+
+    Each key has a counter in each of four rows, and its frequency is the lowest of
+    them. The counters stop at 15 and are all halved after every ``10 * width``
+    lookups, so old lookups count less and less.
+    """
+
+    def __init__(self, width: int):
+        self.width = 1 << max(width - 1, 63).bit_length()
+        self.counters = bytearray(4 * self.width)
+        self.lookups = 0
+
+    def _indices(self, key: Hashable) -> list[int]:
+        h = hash(key)
+        return [
+            row * self.width + ((h * seed & _MASK_64) >> 32) % self.width
+            for row, seed in enumerate(_SKETCH_SEEDS)
+        ]
+
+    def add(self, key: Hashable) -> None:
+        counters = self.counters
+        for i in self._indices(key):
+            if counters[i] < 15:
+                counters[i] += 1
+        self.lookups += 1
+        if self.lookups >= 10 * self.width:
+            self.counters = counters.translate(_HALVE)
+            self.lookups //= 2
+
+    def frequency(self, key: Hashable) -> int:
+        return min(self.counters[i] for i in self._indices(key))
+
+
+class MemoryCache(_CombatCache):
+    """
+    An in-memory cache bounded by bytes rather than entries.
+
+    The size of each entry is estimated with :func:`sizeof`. The least recently used
+    entries are evicted once the cache takes more than ``max_bytes``, or once the
+    caches sharing its :class:`MemoryBudget` together take more than the budget. A
+    cache can be used from several threads at once.
+
+    Recency is tracked like the CLOCK algorithm rather than exactly: a hit only marks
+    its entry as used, and an entry that reaches the front of the eviction order is
+    given a second chance at the back if it was used since it got there. Hits then
+    don't reorder the cache or take its lock, which keeps :func:`memoize` cheap
+    enough for hot paths.
+
+    Like :class:`PersistentCache`, it can cache combat results, and any function can
+    be cached with :func:`memoize`.
+
+    Parameters
+    ----------
+    name : str
+        The name of the cache in its statistics.
+    max_bytes : int | None
+        The budget of the cache in bytes, or None to be bounded by the shared budget
+        only.
+    budget : MemoryBudget
+        The budget shared with other caches.
+    uniform : bool
+        Whether every entry takes the same number of bytes, like entries of tuples of
+        small integers, so that only the first entry needs to be measured.
+    policy : EvictionPolicy
+        How to choose the entries to keep within ``max_bytes``, which
+        :attr:`EvictionPolicy.TINY_LFU` needs. The shared budget always evicts the
+        least recently used entries.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int | None = None,
+        budget: MemoryBudget = GLOBAL_BUDGET,
+        uniform: bool = False,
+        policy: EvictionPolicy = EvictionPolicy.LRU,
+    ):
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("Max bytes must be greater than 0")
+        self._sketch = None
+        if policy is EvictionPolicy.TINY_LFU:
+            if max_bytes is None:
+                raise ValueError("TinyLFU needs a budget of its own")
+            # Assume entries of a few hundred bytes.
+            self._sketch = _FrequencySketch(max_bytes // 256)
+        self.policy = policy
+        self.name = name
+        self.max_bytes = max_bytes
+        self.budget = budget
+        self.uniform = uniform
+        self.size = 0
+        """The estimated number of bytes the entries take."""
+        self._entry_size: int | None = None
+        # Each entry is its value, its size, the tick of its last use and the tick
+        # it was queued at, in the order they were queued.
+        self._entries: OrderedDict[Hashable, list] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._rejections = 0
+        with budget._lock:
+            budget._caches[id(self)] = self
+        weakref.finalize(self, budget._release, self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get the value stored for a key, or ``default`` if there is none."""
+        with self.budget._lock:
+            if self._sketch is not None:
+                self._sketch.add(key)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            self._hits += 1
+            entry[2] = next(_TICKS)
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value for a key, evicting old entries if a budget is exceeded.
+
+        A value larger than a budget on its own isn't stored.
+        """
+        size = self._entry_size
+        if size is None:
+            size = sizeof(key) + sizeof(value) + _ENTRY_OVERHEAD
+            if self.uniform:
+                self._entry_size = size
+        budget = self.budget
+        max_bytes = self.max_bytes
+        with budget._lock:
+            if key in self._entries:
+                self._remove(key)
+            if (max_bytes is not None and size > max_bytes) or (
+                budget._max_bytes is not None and size > budget._max_bytes
+            ):
+                return
+            if (
+                self._sketch is not None
+                and self.size + size > self.max_bytes  # type: ignore[operator]
+                and self._settle()
+                and self._sketch.frequency(key)
+                <= self._sketch.frequency(next(iter(self._entries)))
+            ):
+                self._rejections += 1
+                return
+            tick = next(_TICKS)
+            self._entries[key] = [value, size, tick, tick]
+            self.size += size
+            budget.size += size
+            if max_bytes is not None:
+                while self.size > max_bytes:
+                    self._pop()
+            budget._evict()
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+            self.budget.size -= entry[1]
+
+    def _settle(self) -> bool:
+        """
+        Give the entries at the front of the eviction order that were used since they
+        were queued a second chance, so that the first entry is the next to evict.
+
+        Returns whether the cache has any entries.
+        """
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if entry[2] <= entry[3]:
+                return True
+            entries.move_to_end(key)
+            entry[3] = next(_TICKS)
+        return False
+
+    def _pop(self) -> None:
+        """Evict the least recently used entry."""
+        self._settle()
+        _, (_, size, _, _) = self._entries.popitem(last=False)
+        self.size -= size
+        self.budget.size -= size
+        self._evictions += 1
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self.budget._lock:
+            self.budget.size -= self.size
+            self.size = 0
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """Get the statistics of the cache."""
+        with self.budget._lock:
+            return CacheStats(
+                self.name,
+                len(self._entries),
+                self.size,
+                self.max_bytes,
+                self._hits,
+                self._misses,
+                self._evictions,
+                self._rejections,
+            )
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _Memoized(Protocol[_P, _R_co]):
+    cache: MemoryCache
+
+    def __call__(self, *args: _P.args, **kwargs: _P.kwargs) -> _R_co: ...
+
+
+def memoize(cache: MemoryCache) -> Callable[[Callable[_P, _R]], _Memoized[_P, _R]]:
+    """
+    Cache the results of a function in a :class:`MemoryCache`.
+
+    The function's arguments are the key, so they must be hashable. The decorated
+    function only takes positional arguments, and raises :class:`TypeError` if it is
+    given keyword arguments, which wouldn't be part of the key. The cache is the
+    ``cache`` attribute of the decorated function.
+
+    Lookups that hit only mark their entry as used, without taking the cache's lock,
+    so a memoized function is cheap enough for hot paths.
+
+    Parameters
+    ----------
+    cache : MemoryCache
+        The cache.
+
+    Returns
+    -------
+    Callable
+        The decorator.
+    """
+
+    def decorator(fn: Callable[_P, _R]) -> _Memoized[_P, _R]:
+        entries = cache._entries
+
+        @functools.wraps(fn)
+        def wrapper(*args: Hashable) -> _R:
+            if cache._sketch is None:
+                # Lookups don't take the lock, since looking up an entry and marking
+                # it as used are each atomic. Concurrent lookups can lose counts,
+                # though.
+                entry = entries.get(args)
+                if entry is not None:
+                    entry[2] = next(_TICKS)
+                    cache._hits += 1
+                    return entry[0]
+                cache._misses += 1
+            else:
+                value = cache.get(args, _MISSING)
+                if value is not _MISSING:
+                    return value
+            value = fn(*args)
+            cache.set(args, value)
+            return value
+
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def cache_stats() -> list[CacheStats]:
+    """Get the statistics of every cache sharing :data:`GLOBAL_BUDGET`."""
+    return GLOBAL_BUDGET.stats()
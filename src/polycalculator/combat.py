@@ -1,9 +1,10 @@
-from collections.abc import Collection, Container
+from collections.abc import Collection, Container, Iterator
+from enum import IntEnum
 from typing import NamedTuple
 
 from polycalculator.status_effect import StatusEffect
 from polycalculator.trait import Trait
-from polycalculator.unit import Unit
+from polycalculator.unit import Unit, _NavalUnitRegistry, _UnitRegistry
 
 
 def _round_away_from_zero(x: float) -> int:
@@ -36,6 +37,12 @@ class CombatResult(NamedTuple):
     status_effects: StatusEffectResult
     """The status effects the attacker and defender will receive."""
 
+    def __reduce__(self) -> tuple[object, ...]:
+        # The encoding is built on this module, so it can't be imported before now.
+        from polycalculator.encoding import _reduce_combat_result
+
+        return _reduce_combat_result(self) or (CombatResult, tuple(self))
+
 
 class UnitResult(NamedTuple):
     """The result of a combat for a single unit."""
@@ -54,6 +61,11 @@ class MultiCombatResult(NamedTuple):
     defenders: list[UnitResult]
     """The results of the combat for the defending units."""
 
+    def __reduce__(self) -> tuple[object, ...]:
+        from polycalculator.encoding import _reduce_multi_combat_result
+
+        return _reduce_multi_combat_result(self) or (MultiCombatResult, tuple(self))
+
 
 def _calculate_attacker_damage(
     attack: int,
@@ -62,12 +74,11 @@ def _calculate_attacker_damage(
     defender_health_ratio: float,
     defense_bonus: float,
 ) -> int:
-    return _round_away_from_zero(
-        4.5
-        * attack
-        * (effective_attack := attack * attacker_health_ratio)
-        / (effective_attack + defense * defender_health_ratio * defense_bonus)
-    )
+    effective_attack = attack * attacker_health_ratio
+    total_force = effective_attack + defense * defender_health_ratio * defense_bonus
+    if total_force == 0:
+        return 0
+    return _round_away_from_zero(4.5 * attack * effective_attack / total_force)
 
 
 def _calculate_damage(
@@ -81,6 +92,9 @@ def _calculate_damage(
     attack_force = attack * attacker_health_ratio
     defense_force = defense * defender_health_ratio * defense_bonus
     total_damage = attack_force + defense_force
+    if total_damage == 0:
+        # Neither unit has any force, e.g. a mind bender converting a catapult.
+        return DamageResult(0, 0)
     attack_result = _round_away_from_zero(attack_force / total_damage * attack * 4.5)
     defense_result = _round_away_from_zero(defense_force / total_damage * defense * 4.5)
 
@@ -130,82 +144,255 @@ def _calculate_status_effects(
     return StatusEffectResult(to_attacker, to_defender)
 
 
-def single_combat(attacker: Unit, defender: Unit) -> CombatResult:
+class _Tentacles(IntEnum):
+    """How the defender's tentacles affect a combat."""
+
+    NONE = 0
+    """The defender has no tentacles, or the attacker outranges them."""
+    BOTH = 1
+    """Both units have tentacles, so the attacker always takes retaliation."""
+    DAMAGE = 2
+    """The attacker takes tentacle damage before attacking."""
+
+
+class _CombatRules(NamedTuple):
+    """The parts of a combat that only depend on the types of the two units."""
+
+    tentacles: _Tentacles
+    """How the defender's tentacles affect the combat."""
+    retaliates: bool
+    """Whether the defender retaliates, provided it survives and is not frozen."""
+    to_attacker: frozenset[StatusEffect]
+    """The status effects the attacker receives if it takes retaliation."""
+    to_defender: frozenset[StatusEffect]
+    """The status effects the defender receives."""
+
+
+def _compile_rules(attacker: Unit, defender: Unit) -> _CombatRules:
     """
-    Simulate a single combat between two units.
+    Derive the rules of a combat from the traits and ranges of the two units.
 
     Parameters
     ----------
     attacker : Unit
-        The attacking unit.
+        The attacking unit, or any unit of the same type.
     defender : Unit
-        The defending unit.
+        The defending unit, or any unit of the same type.
 
     Returns
     -------
-    CombatResult
-        The damage done and status effects applied to the attacker and defender.
+    _CombatRules
+        The rules of the combat.
     """
-    tentacle_damage = 0
-
+    tentacles = _Tentacles.NONE
     if Trait.TENTACLES in defender.traits:
         if Trait.TENTACLES in attacker.traits:
             # Special case: Jelly vs Jelly
-            attacker.add_status_effect(StatusEffect.TAKES_RETALIATION)
-        elif attacker.range > defender.range:
-            pass
-        else:
-            tentacle_damage = _calculate_attacker_damage(
-                attacker.attack,
-                attacker.health_ratio,
-                defender.defense,
-                defender.health_ratio,
-                defender.defense_bonus,
-            )
-
-    damage = _calculate_damage(
-        attacker.attack,
-        (attacker.current_hp - tentacle_damage) / attacker.max_hp,
-        defender.defense,
-        defender.health_ratio,
-        defender.defense_bonus,
-        StatusEffect.SPLASHING in attacker.status_effects
-        or StatusEffect.EXPLODING in attacker.status_effects,
-    )
+            tentacles = _Tentacles.BOTH
+        elif attacker.range <= defender.range:
+            tentacles = _Tentacles.DAMAGE
 
-    takes_retaliation = StatusEffect.TAKES_RETALIATION in attacker.status_effects or (
+    retaliates = (
         attacker.range <= defender.range
-        and (defender.current_hp - damage.to_defender) > 0
         and Trait.STIFF not in defender.traits
         and Trait.SURPRISE not in attacker.traits
         and Trait.CONVERT not in attacker.traits
         and Trait.FREEZE not in attacker.traits
         and Trait.TENTACLES not in attacker.traits
-        and StatusEffect.FROZEN not in defender.status_effects
     )
 
-    effects = _calculate_status_effects(
-        attacker.traits, defender.traits, takes_retaliation
+    effects = _calculate_status_effects(attacker.traits, defender.traits, True)
+    return _CombatRules(
+        tentacles,
+        retaliates,
+        frozenset(effects.to_attacker),
+        frozenset(effects.to_defender),
+    )
+
+
+def _build_rule_table() -> tuple[dict[type[Unit], int], list[list[_CombatRules]]]:
+    """
+    Compile the rules of every combat between the registered unit types.
+
+    Types with the same traits and range share a profile, and the rules are compiled
+    once for each pair of profiles.
+
+    Returns
+    -------
+    tuple[dict[type[Unit], int], list[list[_CombatRules]]]
+        The profile of each type, and the rules indexed by the attacker's profile and
+        then the defender's.
+    """
+    types: list[type[Unit]] = [
+        *_UnitRegistry.values(),
+        *_NavalUnitRegistry.values(),
+    ]
+
+    profile_ids: dict[tuple[int, frozenset[Trait]], int] = {}
+    representatives: list[Unit] = []
+    profiles: dict[type[Unit], int] = {}
+    for unit_type in types:
+        unit = unit_type()
+        key = (unit.range, unit.traits)
+        if key not in profile_ids:
+            profile_ids[key] = len(representatives)
+            representatives.append(unit)
+        profiles[unit_type] = profile_ids[key]
+
+    table = [
+        [_compile_rules(attacker, defender) for defender in representatives]
+        for attacker in representatives
+    ]
+    return profiles, table
+
+
+_PROFILES, _RULE_TABLE = _build_rule_table()
+
+
+def _profile(unit_type: type[Unit]) -> int | None:
+    """
+    Find the profile of a type that isn't in the rule table yet.
+
+    The class of a naval unit carrying a land unit is only created when it is first
+    used, but it fights with the traits and range of its naval class, so it shares
+    that class's profile from then on.
+    """
+    profile = _PROFILES.get(getattr(unit_type, "_naval_type", None))  # type: ignore[arg-type]
+    if profile is not None:
+        _PROFILES[unit_type] = profile
+    return profile
+
+
+def _combat_rules(attacker: Unit, defender: Unit) -> _CombatRules:
+    """Look up the compiled rules of a combat, compiling them for unknown types."""
+    attacker_profile = _PROFILES.get(type(attacker))
+    if attacker_profile is None:
+        attacker_profile = _profile(type(attacker))
+    defender_profile = _PROFILES.get(type(defender))
+    if defender_profile is None:
+        defender_profile = _profile(type(defender))
+    if attacker_profile is None or defender_profile is None:
+        return _compile_rules(attacker, defender)
+    return _RULE_TABLE[attacker_profile][defender_profile]
+
+
+def _resolve_combat(
+    attacker: Unit, defender: Unit, rules: _CombatRules
+) -> CombatResult:
+    """Simulate a single combat between two units, following precompiled rules."""
+    tentacle_damage = 0
+
+    if rules.tentacles == _Tentacles.DAMAGE:
+        tentacle_damage = _calculate_attacker_damage(
+            attacker.attack,
+            attacker.health_ratio,
+            defender.defense,
+            defender.health_ratio,
+            defender.defense_bonus,
+        )
+
+    attacker_effects = attacker.status_effects
+    # An attacker killed by tentacles can't do negative damage to the defender.
+    damage = _calculate_damage(
+        attacker.attack,
+        max(attacker.current_hp - tentacle_damage, 0) / attacker.max_hp,
+        defender.defense,
+        defender.health_ratio,
+        defender.defense_bonus,
+        StatusEffect.SPLASHING in attacker_effects
+        or StatusEffect.EXPLODING in attacker_effects,
+    )
+
+    takes_retaliation = (
+        rules.tentacles == _Tentacles.BOTH
+        or StatusEffect.TAKES_RETALIATION in attacker_effects
+        or (
+            rules.retaliates
+            and (defender.current_hp - damage.to_defender) > 0
+            and StatusEffect.FROZEN not in defender.status_effects
+        )
     )
 
     damage_to_attacker = (
         tentacle_damage + (damage.to_attacker if takes_retaliation else 0)
-        if StatusEffect.EXPLODING not in attacker.status_effects
+        if StatusEffect.EXPLODING not in attacker_effects
         else attacker.current_hp
     )
 
     return CombatResult(
         damage=DamageResult(damage_to_attacker, damage.to_defender),
-        status_effects=effects,
+        status_effects=StatusEffectResult(
+            set(rules.to_attacker) if takes_retaliation else set(),
+            set(rules.to_defender),
+        ),
     )
 
 
+def single_combat(attacker: Unit, defender: Unit) -> CombatResult:
+    """
+    Simulate a single combat between two units.
+
+    The parts of the combat that only depend on the types of the two units, such as
+    whether the defender can retaliate, are looked up in tables compiled when the
+    module is imported.
+
+    Neither unit is modified, so combats can be simulated concurrently from several
+    threads, even with the same units.
+
+    Parameters
+    ----------
+    attacker : Unit
+        The attacking unit.
+    defender : Unit
+        The defending unit.
+
+    Returns
+    -------
+    CombatResult
+        The damage done and status effects applied to the attacker and defender.
+    """
+    return _resolve_combat(attacker, defender, _combat_rules(attacker, defender))
+
+
+def _attacks(
+    attackers: Collection[Unit], defenders: Collection[Unit]
+) -> Iterator[tuple[int, int, CombatResult]]:
+    """
+    Simulate the attacks of a multi-combat one at a time.
+
+    Each attacker attacks the current defender, moving on to the next defender first
+    if the current one is dead. The result of each attack is applied to the defender
+    and yielded with the indices of the attacker and defender. The attacks stop once
+    every defender is dead, so a caller can also stop at any attack.
+    """
+    defenders_i = iter(enumerate(defenders))
+    defender_e = next(defenders_i, None)
+    if defender_e is None:
+        return
+    i_d, defender = defender_e
+
+    for i_a, attacker in enumerate(attackers):
+        if defender.current_hp <= 0:
+            defender_e = next(defenders_i, None)
+            if defender_e is None:
+                return
+            i_d, defender = defender_e
+
+        result = single_combat(attacker, defender)
+        defender.current_hp -= result.damage.to_defender
+        defender.add_status_effects(result.status_effects.to_defender)
+        yield i_a, i_d, result
+
+
 def multi_combat(
     attackers: Collection[Unit], defenders: Collection[Unit]
 ) -> MultiCombatResult:
     """
     Simulate a multi-combat between two units.
 
+    The damage and status effects are applied to the defenders, so a thread must not
+    simulate a multi-combat with defenders that another thread is using.
+
     Parameters
     ----------
     attackers : Collection[Unit]
@@ -220,32 +407,15 @@ def multi_combat(
     """
     attacker_results: list[UnitResult] = []
     defender_results: list[UnitResult] = []
-    defenders_i = iter(enumerate(defenders))
+    if defenders:
+        defender_results.append(UnitResult(0, set()))
 
-    defender_e = next(defenders_i, None)
-    if defender_e is None:
-        for attacker in attackers:
-            attacker_results.append(UnitResult(0, set()))
-        return MultiCombatResult(attackers=attacker_results, defenders=defender_results)
-
-    defender_results.append(UnitResult(0, set()))
-    i_d, defender = defender_e
-
-    for i_a, attacker in enumerate(attackers):
-        if defender.current_hp <= 0:
-            defender_e = next(defenders_i, None)
-            if defender_e is None:
-                for _ in range(i_a, len(attackers)):
-                    attacker_results.append(UnitResult(0, set()))
-                break
-            defender_results.append(UnitResult(0, set()))
-            i_d, defender = defender_e
-
-        result = single_combat(attacker, defender)
+    for _, i_d, result in _attacks(attackers, defenders):
         attacker_results.append(
             UnitResult(result.damage.to_attacker, result.status_effects.to_attacker)
         )
-
+        if i_d == len(defender_results):
+            defender_results.append(UnitResult(0, set()))
         defender_results[i_d] = UnitResult(
             defender_results[i_d].damage + result.damage.to_defender,
             defender_results[i_d].status_effects.union(
@@ -253,7 +423,7 @@ def multi_combat(
             ),
         )
 
-        defender.current_hp -= result.damage.to_defender
-        defender.add_status_effects(result.status_effects.to_defender)
-
+    # The attackers left once every defender is dead don't attack.
+    for _ in range(len(attacker_results), len(attackers)):
+        attacker_results.append(UnitResult(0, set()))
     return MultiCombatResult(attackers=attacker_results, defenders=defender_results)
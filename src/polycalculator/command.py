@@ -0,0 +1,247 @@
+import re
+from collections.abc import Iterator
+from enum import IntEnum
+from typing import NamedTuple
+
+from polycalculator.cache import MemoryCache, memoize
+from polycalculator.encoding import UnitState, decode_unit, encode_unit
+from polycalculator.status_effect import StatusEffect
+from polycalculator.unit import (
+    _ABBR_MAP,
+    _EFFECT_ABBR_MAP,
+    _NAVAL_ABBR_MAP,
+    DefaultWarrior,
+    NavalUnit,
+    Unit,
+)
+
+
+class TokenKind(IntEnum):
+    """The kind of a token in a command."""
+
+    NUMBER = 1
+    """A number, the HP of a unit."""
+    WORD = 2
+    """A unit, naval unit or status effect abbreviation."""
+    COMMA = 3
+    """The separator between units."""
+    SLASH = 4
+    """The separator between the attackers and the defenders."""
+
+
+class Token(NamedTuple):
+    """A token in a command."""
+
+    kind: TokenKind
+    """The kind of the token."""
+    text: str
+    """The text of the token, in lower case."""
+    position: int
+    """The index of the token's first character in the command."""
+
+
+class CommandError(ValueError):
+    """
+    An error in a command.
+
+    Parameters
+    ----------
+    message : str
+        What is wrong.
+    position : int
+        The index of the character in the command where the error is.
+    """
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} at position {position}")
+        self.message = message
+        self.position = position
+
+    def __reduce__(self) -> tuple[object, ...]:
+        return type(self), (self.message, self.position)
+
+
+class Command(NamedTuple):
+    """A parsed command."""
+
+    attackers: list[UnitState]
+    """The encoded states of the attacking units, in order."""
+    defenders: list[UnitState]
+    """The encoded states of the defending units, in order."""
+
+    def units(self) -> tuple[list[Unit], list[Unit]]:
+        """Create the attacking and defending units."""
+        return (
+            [decode_unit(state) for state in self.attackers],
+            [decode_unit(state) for state in self.defenders],
+        )
+
+
+_TOKEN = re.compile(r"\d+(?:\.\d*)?|\.\d+|[a-z]+|\S", re.ASCII | re.IGNORECASE)
+_NUMBER = re.compile(r"\d+(?:\.\d*)?|\.\d+", re.ASCII)
+
+
+def _kind(text: str) -> TokenKind | None:
+    """Get the kind of a lower case token, or None if it isn't one."""
+    if text == ",":
+        return TokenKind.COMMA
+    if text == "/":
+        return TokenKind.SLASH
+    if text.isalpha():
+        return TokenKind.WORD
+    if _NUMBER.fullmatch(text):
+        return TokenKind.NUMBER
+    return None
+
+
+def tokenize(command: str) -> Iterator[Token]:
+    """
+    Split a command into tokens.
+
+    Tokens may be separated by whitespace, but don't need to be, so ``"wa8"`` is a
+    word followed by a number.
+
+    Parameters
+    ----------
+    command : str
+        The command.
+
+    Yields
+    ------
+    Token
+        The tokens, in order.
+
+    Raises
+    ------
+    CommandError
+        If the command contains a character that can't start a token.
+    """
+    for match in _TOKEN.finditer(command):
+        text = match.group().lower()
+        kind = _kind(text)
+        if kind is None:
+            raise CommandError(f"Unexpected character {text!r}", match.start())
+        yield Token(kind, text, match.start())
+
+
+@memoize(MemoryCache("parse_unit", 2 << 20))
+def _unit_state(
+    unit_type: type[Unit] | None,
+    naval_type: type[NavalUnit] | None,
+    hp: int | None,
+    status_effects: tuple[StatusEffect, ...],
+) -> UnitState:
+    """Encode a unit the way :func:`polycalculator.unit.parse_unit` creates it."""
+    unit = (unit_type or DefaultWarrior)(hp)
+    unit.add_status_effects(status_effects)
+    if naval_type is not None:
+        unit = naval_type(unit)
+    return encode_unit(unit)
+
+
+class _TokenError(Exception):
+    """An error at the token with the given index."""
+
+    def __init__(self, message: str, index: int):
+        self.message = message
+        self.index = index
+
+
+def _parse(tokens: list[str]) -> Command:
+    """Parse a command from its lower case tokens."""
+    attackers: list[UnitState] = []
+    defenders: list[UnitState] | None = None
+    units = attackers
+
+    unit_type: type[Unit] | None = None
+    naval_type: type[NavalUnit] | None = None
+    hp: int | None = None
+    effects: list[StatusEffect] = []
+    start: int | None = None
+
+    for i, text in enumerate(tokens):
+        if text == "," or text == "/":
+            if unit_type is None and naval_type is None:
+                raise _TokenError("Expected a unit", i if start is None else start)
+            units.append(_unit_state(unit_type, naval_type, hp, tuple(effects)))
+            unit_type = naval_type = hp = start = None
+            effects.clear()
+            if text == "/":
+                if defenders is not None:
+                    raise _TokenError("Unexpected second '/'", i)
+                defenders = units = []
+            continue
+
+        if text in _ABBR_MAP:
+            unit_type = _ABBR_MAP[text]
+        elif text in _NAVAL_ABBR_MAP:
+            naval_type = _NAVAL_ABBR_MAP[text]
+        elif text in _EFFECT_ABBR_MAP:
+            effects.append(_EFFECT_ABBR_MAP[text])
+        elif _NUMBER.fullmatch(text):
+            hp = int(float(text) * 10)
+            if hp <= 0:
+                raise _TokenError("HP must be greater than 0", i)
+        else:
+            raise _TokenError(f"Unknown part {text!r}", i)
+        if start is None:
+            start = i
+
+    end = len(tokens)
+    if unit_type is None and naval_type is None:
+        raise _TokenError("Expected a unit", end if start is None else start)
+    units.append(_unit_state(unit_type, naval_type, hp, tuple(effects)))
+    if defenders is None:
+        raise _TokenError("Expected '/' between the attackers and the defenders", end)
+    return Command(attackers, defenders)
+
+
+def parse_command(command: str) -> Command:
+    """
+    Parse a combat command, such as ``"wa 8 d, ar v, kn / de w, gi 30"``.
+
+    The attacking units come before the slash and the defending units after it,
+    separated by commas. Each unit is described like in
+    :func:`polycalculator.unit.parse_unit`: a unit abbreviation, a naval unit
+    abbreviation, or both, optionally with the unit's HP and status effect
+    abbreviations, in any order. Status effects are applied in the order they are
+    written.
+
+    The command is parsed in a single pass over its tokens, straight into encoded
+    unit states, and states are shared between equal units. Tokens are found by
+    splitting on whitespace, and only if that fails is the command tokenized again
+    with :func:`tokenize`, to handle tokens that aren't separated and to find the
+    position of the error.
+
+    Parameters
+    ----------
+    command : str
+        The command.
+
+    Returns
+    -------
+    Command
+        The attacking and defending units.
+
+    Raises
+    ------
+    CommandError
+        If the command is invalid. The error holds the position of the problem.
+    """
+    if command.isascii():
+        tokens = command.lower().replace(",", " , ").replace("/", " / ").split()
+        try:
+            return _parse(tokens)
+        except _TokenError:
+            pass
+
+    tokens = []
+    positions = []
+    for token in tokenize(command):
+        tokens.append(token.text)
+        positions.append(token.position)
+    positions.append(len(command))
+    try:
+        return _parse(tokens)
+    except _TokenError as e:
+        raise CommandError(e.message, positions[e.index]) from None
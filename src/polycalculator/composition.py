@@ -0,0 +1,176 @@
+import heapq
+from collections.abc import Iterable, Sequence
+from typing import NamedTuple
+
+from polycalculator.batch import _combat_stats, _max_hp
+from polycalculator.cache import MemoryCache, memoize
+from polycalculator.encoding import UnitState, decode_unit, encode_unit
+from polycalculator.kernel import _NAVAL, _STATS, _add_effects, _combat
+from polycalculator.threshold import _kills_all
+from polycalculator.unit import (
+    BabyDragon,
+    Dagger,
+    DefaultWarrior,
+    FireDragon,
+    NavalUnit,
+    Pirate,
+    Segment,
+    Unit,
+    _NavalUnitRegistry,
+    _UnitRegistry,
+)
+
+UNTRAINABLE: frozenset[type[Unit]] = frozenset(
+    {DefaultWarrior, Dagger, Pirate, Segment, BabyDragon, FireDragon}
+)
+"""The units that can't be trained, but only appear from cities or other units."""
+
+
+class Composition(NamedTuple):
+    """An army that kills a stack of defenders."""
+
+    attackers: list[Unit]
+    """The attacking units, in the order they attack."""
+    cost: int
+    """The total cost of the attackers, in stars."""
+
+
+_Path = tuple[int, "_Path"] | None
+"""A sequence of attackers, as a linked list of (candidate index, previous path)."""
+
+
+class _Candidate(NamedTuple):
+    cost: int
+    state: UnitState
+
+
+def _candidates(
+    unit_types: Iterable[type[Unit]], naval_types: Iterable[type[NavalUnit]]
+) -> list[_Candidate]:
+    """
+    Get the attackers to choose from, sorted by cost.
+
+    Attackers that fight the same way, such as every land unit carried by a raft,
+    are reduced to the cheapest of them.
+    """
+    unit_types = list(unit_types)
+    units: list[Unit] = [cls() for cls in unit_types]
+    units += [naval(cls()) for naval in naval_types for cls in unit_types]
+
+    cheapest: dict[object, _Candidate] = {}
+    for unit in units:
+        state = encode_unit(unit)
+        key = (
+            _combat_stats(state.type_id, state.naval_id),
+            _max_hp(state.type_id, state.effects),
+            state.hp,
+            state.effects,
+        )
+        if key not in cheapest or unit.cost < cheapest[key].cost:
+            cheapest[key] = _Candidate(unit.cost, state)
+    return sorted(cheapest.values())
+
+
+@memoize(MemoryCache("composition", 16 << 20, uniform=True))
+def _attack(attacker: UnitState, defender: UnitState) -> tuple[int, int]:
+    """Get the HP and status effects of a defender after it is attacked."""
+    _, to_defender, _, effects = _combat(*attacker, *defender, _STATS, _NAVAL)
+    return (
+        max(defender.hp - to_defender, 0),
+        _add_effects(defender.type_id, defender.effects, effects, _STATS),
+    )
+
+
+def cheapest_composition(
+    defenders: Sequence[Unit],
+    budget: int,
+    unit_types: Iterable[type[Unit]] | None = None,
+    naval_types: Iterable[type[NavalUnit]] | None = None,
+) -> Composition | None:
+    """
+    Find the cheapest army of fresh units that kills every defender.
+
+    The attackers attack the defenders in order, like in
+    :func:`polycalculator.combat.multi_combat`, and each defender must be brought to
+    0 HP, so converting a defender doesn't count. Ties in cost are broken by the
+    number of attackers.
+
+    The search is exact. It explores the states the defender stack can be left in
+    from the cheapest upwards, so its cost depends on the number of different
+    states, not on the number of possible armies, and every combat between an
+    attacker and a defender state is simulated once. The army found is checked with
+    :func:`polycalculator.combat.multi_combat`.
+
+    Parameters
+    ----------
+    defenders : Sequence[Unit]
+        The defending units. They are not modified.
+    budget : int
+        The most the army may cost, in stars.
+    unit_types : Iterable[type[Unit]] | None
+        The land units to choose from. Defaults to every unit that can be trained.
+    naval_types : Iterable[type[NavalUnit]] | None
+        The naval units that can carry the land units. Defaults to every naval unit.
+        Pass an empty list to use land units only.
+
+    Returns
+    -------
+    Composition | None
+        The cheapest army, or None if no army within the budget kills every defender.
+    """
+    if unit_types is None:
+        unit_types = [cls for cls in _UnitRegistry.values() if cls not in UNTRAINABLE]
+    if naval_types is None:
+        naval_types = _NavalUnitRegistry.values()
+    candidates = _candidates(unit_types, naval_types)
+    states = [encode_unit(defender) for defender in defenders]
+    if not states:
+        return Composition([], 0)
+
+    # A state is the index of the defender being attacked and its HP and status
+    # effects, and the defenders after it are untouched.
+    start = (0, states[0].hp, states[0].effects)
+    best = {start: (0, 0)}
+    queue: list[tuple[int, int, int, tuple[int, int, int], _Path]] = [
+        (0, 0, 0, start, None)
+    ]
+    pushed = 1
+    while queue:
+        cost, count, _, state, path = heapq.heappop(queue)
+        d, hp, effects = state
+        if d == len(states):
+            attackers = []
+            while path is not None:
+                i, path = path
+                attackers.append(decode_unit(candidates[i].state))
+            attackers.reverse()
+            if _kills_all(attackers, list(defenders)):
+                return Composition(attackers, cost)
+            continue
+        if best[state] < (cost, count):
+            continue
+
+        defender = states[d]._replace(hp=hp, effects=effects)
+        for i, candidate in enumerate(candidates):
+            new_cost = cost + candidate.cost
+            if new_cost > budget:
+                break
+            new_hp, new_effects = _attack(candidate.state, defender)
+            if new_hp > 0:
+                new_state = (d, new_hp, new_effects)
+                if new_state == state:
+                    continue
+            elif d + 1 < len(states):
+                new_state = (d + 1, states[d + 1].hp, states[d + 1].effects)
+            else:
+                new_state = (d + 1, 0, 0)
+
+            # Every way of finishing the stack is kept, in case one fails the check.
+            if new_state[0] < len(states):
+                previous = best.get(new_state)
+                if previous is not None and previous <= (new_cost, count + 1):
+                    continue
+                best[new_state] = (new_cost, count + 1)
+            heapq.heappush(queue, (new_cost, count + 1, pushed, new_state, (i, path)))
+            pushed += 1
+    return None
@@ -0,0 +1,308 @@
+import hashlib
+import struct
+from collections.abc import Callable, Iterable, Sequence
+from typing import NamedTuple
+
+from polycalculator.combat import (
+    CombatResult,
+    DamageResult,
+    MultiCombatResult,
+    StatusEffectResult,
+    UnitResult,
+)
+from polycalculator.status_effect import StatusEffect
+from polycalculator.trait import Trait
+from polycalculator.unit import (
+    NAVAL_UNIT_DATA,
+    UNIT_DATA,
+    NavalUnit,
+    Unit,
+    _composite,
+    _NavalUnitRegistry,
+    _UnitRegistry,
+)
+
+FORMAT_VERSION = 1
+"""The version of the encoding, bumped whenever encoded data changes meaning."""
+
+UNIT_TYPES: tuple[type[Unit], ...] = tuple(_UnitRegistry.values())
+"""The unit classes, indexed by type id."""
+NAVAL_TYPES: tuple[type[NavalUnit] | None, ...] = (None, *_NavalUnitRegistry.values())
+"""The naval unit classes, indexed by naval id. Id 0 means the unit is on land."""
+EFFECTS: tuple[StatusEffect, ...] = tuple(StatusEffect)
+"""The status effects, indexed by their bit in an effect mask."""
+TRAITS: tuple[Trait, ...] = tuple(Trait)
+"""The traits, indexed by their bit in a trait mask."""
+
+_UNIT_TYPE_IDS = {cls: i for i, cls in enumerate(UNIT_TYPES)}
+_NAVAL_TYPE_IDS = {cls: i for i, cls in enumerate(NAVAL_TYPES)}
+_EFFECT_BITS = {effect: 1 << i for i, effect in enumerate(EFFECTS)}
+_TRAIT_BITS = {trait: 1 << i for i, trait in enumerate(TRAITS)}
+_EFFECT_SETS = tuple(
+    frozenset(effect for effect, bit in _EFFECT_BITS.items() if mask & bit)
+    for mask in range(1 << len(EFFECTS))
+)
+"""The status effects of every effect mask, indexed by the mask."""
+
+FINGERPRINT: bytes = hashlib.sha256(
+    repr((FORMAT_VERSION, UNIT_DATA, NAVAL_UNIT_DATA, EFFECTS)).encode()
+).digest()
+"""
+A hash of the encoding and unit data.
+
+Encoded data is only meaningful to a process with the same fingerprint, so anything
+that persists it should discard it when the fingerprint changes.
+"""
+
+_UNIT_STATE = struct.Struct("<4H")
+_COUNTS = struct.Struct("<2H")
+_COMBAT_RESULT = struct.Struct("<2i2H")
+_UNIT_RESULT = struct.Struct("<iH")
+
+
+class UnitState(NamedTuple):
+    """The state of a unit, encoded as integers."""
+
+    type_id: int
+    """The index of the unit's class in :data:`UNIT_TYPES`."""
+    hp: int
+    """The unit's current HP."""
+    effects: int
+    """The unit's status effects as a bitmask over :data:`EFFECTS`."""
+    naval_id: int
+    """The index of the unit's naval class in :data:`NAVAL_TYPES`."""
+
+
+def effects_to_mask(effects: Iterable[StatusEffect]) -> int:
+    """Encode status effects as a bitmask."""
+    mask = 0
+    for effect in effects:
+        mask |= _EFFECT_BITS[effect]
+    return mask
+
+
+def mask_to_effects(mask: int) -> set[StatusEffect]:
+    """Decode a bitmask of status effects."""
+    return set(_EFFECT_SETS[mask])
+
+
+def effect_bit(effect: StatusEffect) -> int:
+    """Get the bit of a status effect in an effect mask."""
+    return _EFFECT_BITS[effect]
+
+
+def traits_to_mask(traits: Iterable[Trait]) -> int:
+    """Encode traits as a bitmask."""
+    mask = 0
+    for trait in traits:
+        mask |= _TRAIT_BITS[trait]
+    return mask
+
+
+def trait_bit(trait: Trait) -> int:
+    """Get the bit of a trait in a trait mask."""
+    return _TRAIT_BITS[trait]
+
+
+def encode_unit(unit: Unit) -> UnitState:
+    """
+    Encode a unit's state as integers.
+
+    Parameters
+    ----------
+    unit : Unit
+        The unit to encode.
+
+    Returns
+    -------
+    UnitState
+        The encoded state.
+    """
+    if isinstance(unit, NavalUnit):
+        type_id = _UNIT_TYPE_IDS[unit._land_type]
+        naval_id = _NAVAL_TYPE_IDS[unit._naval_type]
+    else:
+        type_id = _UNIT_TYPE_IDS[type(unit)]
+        naval_id = 0
+    return UnitState(
+        type_id,
+        unit.current_hp,
+        effects_to_mask(unit.status_effects),
+        naval_id,
+    )
+
+
+def decode_unit(state: UnitState) -> Unit:
+    """
+    Create a unit from its encoded state.
+
+    Parameters
+    ----------
+    state : UnitState
+        The encoded state.
+
+    Returns
+    -------
+    Unit
+        A new unit with the encoded state.
+    """
+    type_id, hp, effects, naval_id = state
+    unit_cls = UNIT_TYPES[type_id]
+    unit = unit_cls()
+    # Restore the effects exactly. Adding them one by one could drop some, depending
+    # on the order they are added in.
+    unit._status_effects = mask_to_effects(effects)
+    if hp != unit.max_hp:
+        unit.current_hp = hp
+    naval_cls = NAVAL_TYPES[naval_id]
+    if naval_cls is not None:
+        return naval_cls(unit)
+    return unit
+
+
+def scenario_key(attackers: Sequence[Unit], defenders: Sequence[Unit]) -> bytes:
+    """
+    Encode a combat scenario as bytes.
+
+    Two scenarios have the same key exactly when their units have the same states in
+    the same order.
+
+    Parameters
+    ----------
+    attackers : Sequence[Unit]
+        The attacking units.
+    defenders : Sequence[Unit]
+        The defending units.
+
+    Returns
+    -------
+    bytes
+        The encoded scenario.
+    """
+    return _COUNTS.pack(len(attackers), len(defenders)) + b"".join(
+        _UNIT_STATE.pack(*encode_unit(unit)) for unit in (*attackers, *defenders)
+    )
+
+
+def encode_combat_result(result: CombatResult) -> bytes:
+    """Encode the result of a single combat as bytes."""
+    return _COMBAT_RESULT.pack(
+        result.damage.to_attacker,
+        result.damage.to_defender,
+        effects_to_mask(result.status_effects.to_attacker),
+        effects_to_mask(result.status_effects.to_defender),
+    )
+
+
+def decode_combat_result(data: bytes) -> CombatResult:
+    """Decode the result of a single combat from bytes."""
+    to_attacker, to_defender, attacker_effects, defender_effects = (
+        _COMBAT_RESULT.unpack(data)
+    )
+    return CombatResult(
+        DamageResult(to_attacker, to_defender),
+        StatusEffectResult(
+            mask_to_effects(attacker_effects), mask_to_effects(defender_effects)
+        ),
+    )
+
+
+def encode_multi_combat_result(result: MultiCombatResult) -> bytes:
+    """Encode the result of a multi-combat as bytes."""
+    return _COUNTS.pack(len(result.attackers), len(result.defenders)) + b"".join(
+        _UNIT_RESULT.pack(
+            unit_result.damage, effects_to_mask(unit_result.status_effects)
+        )
+        for unit_result in (*result.attackers, *result.defenders)
+    )
+
+
+def decode_multi_combat_result(data: bytes) -> MultiCombatResult:
+    """Decode the result of a multi-combat from bytes."""
+    n_attackers, _ = _COUNTS.unpack_from(data)
+    results = [
+        UnitResult(damage, mask_to_effects(effects))
+        for damage, effects in _UNIT_RESULT.iter_unpack(data[_COUNTS.size :])
+    ]
+    return MultiCombatResult(results[:n_attackers], results[n_attackers:])
+
+
+# Pickling. Units and results pickle as a call to one of the functions below with a
+# few packed integers, rather than as their classes and attribute dictionaries. The
+# unpickling functions set the attributes directly, so the copies are exact.
+
+_Reduced = tuple[Callable[..., object], tuple[int, ...]]
+_DAMAGE_MASK = (1 << 32) - 1
+
+
+def _reduce_unit(unit: Unit) -> _Reduced | None:
+    """Reduce a unit to a packed integer, or None if its class has no id."""
+    if isinstance(unit, NavalUnit):
+        type_id = _UNIT_TYPE_IDS.get(unit._land_type)
+        naval_id = _NAVAL_TYPE_IDS.get(unit._naval_type)
+    else:
+        type_id = _UNIT_TYPE_IDS.get(type(unit))
+        naval_id = 0
+    if type_id is None or naval_id is None:
+        return None
+    # HP is stored plus one, so that 0 means the unit is at its maximum HP.
+    hp = unit._current_hp
+    return _unpickle_unit, (
+        type_id
+        | naval_id << 8
+        | effects_to_mask(unit._status_effects) << 16
+        | (0 if hp is None else hp + 1) << 32,
+    )
+
+
+def _unpickle_unit(packed: int) -> Unit:
+    unit_cls: type[Unit] = UNIT_TYPES[packed & 0xFF]
+    naval_cls = NAVAL_TYPES[packed >> 8 & 0xFF]
+    if naval_cls is not None:
+        unit_cls = _composite(naval_cls._naval_type, unit_cls)
+    unit = object.__new__(unit_cls)
+    unit._status_effects = mask_to_effects(packed >> 16 & 0xFFFF)
+    hp = packed >> 32
+    unit._current_hp = hp - 1 if hp else None
+    return unit
+
+
+def _reduce_combat_result(result: CombatResult) -> _Reduced | None:
+    """Reduce the result of a single combat to a packed integer."""
+    to_attacker, to_defender = result.damage
+    if not (0 <= to_attacker <= _DAMAGE_MASK and 0 <= to_defender <= _DAMAGE_MASK):
+        return None
+    return _unpickle_combat_result, (
+        to_attacker
+        | to_defender << 32
+        | effects_to_mask(result.status_effects.to_attacker) << 64
+        | effects_to_mask(result.status_effects.to_defender) << 80,
+    )
+
+
+def _unpickle_combat_result(packed: int) -> CombatResult:
+    return CombatResult(
+        DamageResult(packed & _DAMAGE_MASK, packed >> 32 & _DAMAGE_MASK),
+        StatusEffectResult(
+            mask_to_effects(packed >> 64 & 0xFFFF), mask_to_effects(packed >> 80)
+        ),
+    )
+
+
+def _reduce_multi_combat_result(result: MultiCombatResult) -> _Reduced | None:
+    """Reduce the result of a multi-combat to a packed integer per unit."""
+    units = (*result.attackers, *result.defenders)
+    if not all(0 <= unit.damage <= _DAMAGE_MASK for unit in units):
+        return None
+    return _unpickle_multi_combat_result, (
+        len(result.attackers),
+        *[unit.damage | effects_to_mask(unit.status_effects) << 32 for unit in units],
+    )
+
+
+def _unpickle_multi_combat_result(attackers: int, *packed: int) -> MultiCombatResult:
+    results = [
+        UnitResult(unit & _DAMAGE_MASK, set(_EFFECT_SETS[unit >> 32]))
+        for unit in packed
+    ]
+    return MultiCombatResult(results[:attackers], results[attackers:])
@@ -0,0 +1,157 @@
+from collections.abc import Iterable, Iterator, Sequence
+from enum import Enum
+from typing import NamedTuple
+
+from polycalculator.combat import MultiCombatResult, UnitResult, _attacks
+from polycalculator.status_effect import StatusEffect
+from polycalculator.unit import Unit
+
+
+class Side(Enum):
+    """The side a unit fights on."""
+
+    ATTACKER = "attacker"
+    DEFENDER = "defender"
+
+
+class Hit(NamedTuple):
+    """An attacker attacks a defender."""
+
+    attacker: int
+    """The index of the attacker."""
+    defender: int
+    """The index of the defender."""
+    damage: int
+    """The damage the defender takes."""
+
+
+class Retaliation(NamedTuple):
+    """
+    An attacker takes damage from the defender it attacked.
+
+    The damage includes tentacle damage, and an exploding attacker takes all of its
+    HP as damage.
+    """
+
+    attacker: int
+    """The index of the attacker."""
+    defender: int
+    """The index of the defender."""
+    damage: int
+    """The damage the attacker takes."""
+
+
+class Effects(NamedTuple):
+    """A unit receives status effects."""
+
+    side: Side
+    """The side of the unit."""
+    index: int
+    """The index of the unit on its side."""
+    status_effects: frozenset[StatusEffect]
+    """The status effects."""
+
+
+class Kill(NamedTuple):
+    """A unit is killed."""
+
+    side: Side
+    """The side of the unit."""
+    index: int
+    """The index of the unit on its side."""
+
+
+Event = Hit | Retaliation | Effects | Kill
+"""An event in a battle."""
+
+
+def battle_events(
+    attackers: Sequence[Unit], defenders: Sequence[Unit]
+) -> Iterator[Event]:
+    """
+    Simulate a multi-combat, yielding events as they happen.
+
+    The battle is simulated by the same loop as
+    :func:`polycalculator.combat.multi_combat`.
+    Each attack yields a :class:`Hit`, then :class:`Effects` and a :class:`Kill` for
+    the defender if it receives effects or is killed, then a :class:`Retaliation`,
+    :class:`Effects` and :class:`Kill` for the attacker in the same way. The damage
+    and status effects are applied to each defender as soon as it is attacked, so a
+    caller that stops early sees the defenders as they were at that point. The
+    battle ends once every defender is dead, without visiting the attackers that are
+    left.
+
+    Parameters
+    ----------
+    attackers : Sequence[Unit]
+        The attacking units.
+    defenders : Sequence[Unit]
+        The defending units.
+
+    Yields
+    ------
+    Event
+        The events of the battle, in order.
+    """
+    for a, d, result in _attacks(attackers, defenders):
+        attacker, defender = attackers[a], defenders[d]
+        to_attacker, to_defender = result.damage
+        attacker_effects, defender_effects = result.status_effects
+
+        yield Hit(a, d, to_defender)
+        if defender_effects:
+            yield Effects(Side.DEFENDER, d, frozenset(defender_effects))
+        if defender.current_hp <= 0:
+            yield Kill(Side.DEFENDER, d)
+        if to_attacker:
+            yield Retaliation(a, d, to_attacker)
+        if attacker_effects:
+            yield Effects(Side.ATTACKER, a, frozenset(attacker_effects))
+        if to_attacker >= attacker.current_hp:
+            yield Kill(Side.ATTACKER, a)
+
+
+def collect_events(
+    events: Iterable[Event], attackers: int, defenders: int
+) -> MultiCombatResult:
+    """
+    Collect the events of a battle into the result of a multi-combat.
+
+    Collecting every event of :func:`battle_events` gives the same result as
+    :func:`polycalculator.combat.multi_combat`.
+
+    Parameters
+    ----------
+    events : Iterable[Event]
+        The events.
+    attackers : int
+        The number of attackers.
+    defenders : int
+        The number of defenders.
+
+    Returns
+    -------
+    MultiCombatResult
+        The damage done and status effects applied to the attackers and to the
+        defenders that were attacked.
+    """
+    attacker_results = [UnitResult(0, set()) for _ in range(attackers)]
+    defender_results = [UnitResult(0, set()) for _ in range(min(defenders, 1))]
+    for event in events:
+        if isinstance(event, Hit):
+            if event.defender == len(defender_results):
+                defender_results.append(UnitResult(0, set()))
+            result = defender_results[event.defender]
+            defender_results[event.defender] = UnitResult(
+                result.damage + event.damage, result.status_effects
+            )
+        elif isinstance(event, Retaliation):
+            attacker_results[event.attacker] = UnitResult(
+                event.damage, attacker_results[event.attacker].status_effects
+            )
+        elif isinstance(event, Effects):
+            results = (
+                attacker_results if event.side is Side.ATTACKER else defender_results
+            )
+            results[event.index].status_effects.update(event.status_effects)
+    return MultiCombatResult(attacker_results, defender_results)
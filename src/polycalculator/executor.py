@@ -0,0 +1,133 @@
+import sys
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Self, TypeVar
+
+from polycalculator.batch import CombatArrays, UnitArrays, single_combat_arrays
+from polycalculator.combat import MultiCombatResult, multi_combat
+from polycalculator.encoding import UnitState, decode_unit
+
+FREE_THREADED: bool = not getattr(sys, "_is_gil_enabled", lambda: True)()
+"""Whether the interpreter runs without the GIL, so threads run in parallel."""
+
+Scenario = tuple[Sequence[UnitState], Sequence[UnitState]]
+"""The states of the attackers and of the defenders in a multi-combat."""
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+def _multi_combats(scenarios: Sequence[Scenario]) -> list[MultiCombatResult]:
+    results = []
+    for attackers, defenders in scenarios:
+        # The units are created by the thread that simulates them, so no thread
+        # ever sees another thread's units.
+        results.append(
+            multi_combat(
+                [decode_unit(state) for state in attackers],
+                [decode_unit(state) for state in defenders],
+            )
+        )
+    return results
+
+
+class CombatExecutor:
+    """
+    Simulate batches of combats on a pool of threads.
+
+    Work is passed to the threads as encoded unit states, which are immutable, and
+    each thread creates its own units from them. Nothing is pickled, unlike with a
+    process pool. On a free-threaded build of Python (see :data:`FREE_THREADED`) the
+    threads run on separate cores; otherwise they take turns holding the GIL.
+
+    Parameters
+    ----------
+    max_workers : int | None
+        The number of threads, or None to use the default of
+        :class:`concurrent.futures.ThreadPoolExecutor`.
+    chunk_size : int
+        The number of combats each thread simulates at once.
+    """
+
+    def __init__(self, max_workers: int | None = None, chunk_size: int = 1024):
+        if chunk_size <= 0:
+            raise ValueError("Chunk size must be greater than 0")
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers)
+
+    def map(
+        self, fn: Callable[[Sequence[_T]], Iterable[_R]], items: Sequence[_T]
+    ) -> Iterator[_R]:
+        """
+        Apply a function to chunks of items in parallel.
+
+        Parameters
+        ----------
+        fn : Callable[[Sequence[_T]], Iterable[_R]]
+            The function, which gets a chunk of items and returns a result for each.
+            It must not modify anything shared with other threads.
+        items : Sequence[_T]
+            The items.
+
+        Yields
+        ------
+        _R
+            The results, in the order of the items.
+        """
+        chunks = (
+            items[start : start + self.chunk_size]
+            for start in range(0, len(items), self.chunk_size)
+        )
+        for results in self._executor.map(fn, chunks):
+            yield from results
+
+    def single_combat_arrays(
+        self, attackers: UnitArrays, defenders: UnitArrays
+    ) -> CombatArrays:
+        """
+        Simulate single combats between many pairs of units in parallel.
+
+        See :func:`polycalculator.batch.single_combat_arrays`.
+        """
+        if len(attackers) != len(defenders):
+            raise ValueError("There must be as many attackers as defenders")
+
+        results = CombatArrays(array("i"), array("i"), array("H"), array("H"))
+        chunks = self._executor.map(
+            lambda start: single_combat_arrays(
+                attackers.slice(start, start + self.chunk_size),
+                defenders.slice(start, start + self.chunk_size),
+            ),
+            range(0, len(attackers), self.chunk_size),
+        )
+        for chunk in chunks:
+            for result, chunk_result in zip(results, chunk):
+                result.extend(chunk_result)
+        return results
+
+    def multi_combat(self, scenarios: Sequence[Scenario]) -> list[MultiCombatResult]:
+        """
+        Simulate many multi-combats in parallel.
+
+        Parameters
+        ----------
+        scenarios : Sequence[Scenario]
+            The states of the attackers and defenders in each multi-combat.
+
+        Returns
+        -------
+        list[MultiCombatResult]
+            The result of each multi-combat.
+        """
+        return list(self.map(_multi_combats, scenarios))
+
+    def shutdown(self) -> None:
+        """Wait for the threads to finish and stop them."""
+        self._executor.shutdown()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.shutdown()
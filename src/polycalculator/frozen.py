@@ -0,0 +1,147 @@
+import threading
+import weakref
+
+from polycalculator.encoding import (
+    NAVAL_TYPES,
+    UNIT_TYPES,
+    UnitState,
+    decode_unit,
+    encode_unit,
+)
+from polycalculator.status_effect import StatusEffect
+from polycalculator.trait import Trait
+from polycalculator.unit import NavalUnit, Unit
+
+_interned: weakref.WeakValueDictionary[UnitState, "FrozenUnit"] = (
+    weakref.WeakValueDictionary()
+)
+_intern_lock = threading.Lock()
+
+
+class FrozenUnit:
+    """
+    An immutable unit state, shared by every unit in that state.
+
+    Frozen units are created with :func:`freeze` or :func:`intern_state`, which return
+    the same object for the same class, HP, status effects and naval class. They can
+    therefore be compared with ``is`` and are hashed by identity, both in constant
+    time. Their stats are resolved once, when the state is first interned.
+
+    Since they can't change, frozen units can be shared freely between threads.
+    """
+
+    __slots__ = (
+        "__weakref__",
+        "attack",
+        "cost",
+        "current_hp",
+        "defense",
+        "defense_bonus",
+        "max_hp",
+        "naval_type",
+        "range",
+        "state",
+        "status_effects",
+        "traits",
+        "unit_type",
+    )
+
+    state: UnitState
+    """The encoded state."""
+    unit_type: type[Unit]
+    """The unit's class, or the class of the unit inside its naval unit."""
+    naval_type: type[NavalUnit] | None
+    """The unit's naval class, or None if it is on land."""
+    cost: int
+    max_hp: int
+    current_hp: int
+    attack: int
+    defense: int
+    range: int
+    traits: frozenset[Trait]
+    status_effects: frozenset[StatusEffect]
+    defense_bonus: float
+
+    def __init__(self, state: UnitState):
+        unit = decode_unit(state)
+        for name, value in (
+            ("state", state),
+            ("unit_type", UNIT_TYPES[state.type_id]),
+            ("naval_type", NAVAL_TYPES[state.naval_id]),
+            ("cost", unit.cost),
+            ("max_hp", unit.max_hp),
+            ("current_hp", unit.current_hp),
+            ("attack", unit.attack),
+            ("defense", unit.defense),
+            ("range", unit.range),
+            ("traits", unit.traits),
+            ("status_effects", frozenset(unit.status_effects)),
+            ("defense_bonus", unit.defense_bonus),
+        ):
+            object.__setattr__(self, name, value)
+
+    @property
+    def health_ratio(self) -> float:
+        return self.current_hp / self.max_hp
+
+    def thaw(self) -> Unit:
+        """Create a new, mutable unit in this state."""
+        return decode_unit(self.state)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __reduce__(self) -> tuple[object, tuple[UnitState]]:
+        return intern_state, (self.state,)
+
+    def __repr__(self) -> str:
+        name = self.unit_type.__name__
+        if self.naval_type is not None:
+            name = f"{self.naval_type.__name__}({name})"
+        return f"{self.__class__.__name__}({name}, current_hp={self.current_hp}, status_effects={set(self.status_effects)})"
+
+
+def intern_state(state: UnitState) -> FrozenUnit:
+    """
+    Get the frozen unit for an encoded state.
+
+    Parameters
+    ----------
+    state : UnitState
+        The encoded state.
+
+    Returns
+    -------
+    FrozenUnit
+        The frozen unit shared by every unit in the state.
+    """
+    state = UnitState(*state)
+    frozen = _interned.get(state)
+    if frozen is None:
+        # WeakValueDictionary.setdefault isn't atomic, and two frozen units for the
+        # same state would break comparisons with ``is``.
+        with _intern_lock:
+            frozen = _interned.get(state)
+            if frozen is None:
+                frozen = _interned[state] = FrozenUnit(state)
+    return frozen
+
+
+def freeze(unit: Unit) -> FrozenUnit:
+    """
+    Get the frozen unit for a unit's current state.
+
+    Parameters
+    ----------
+    unit : Unit
+        The unit to freeze. Later changes to it do not affect the frozen unit.
+
+    Returns
+    -------
+    FrozenUnit
+        The frozen unit shared by every unit in the same state.
+    """
+    return intern_state(encode_unit(unit))
@@ -0,0 +1,542 @@
+import random
+import time
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from typing import NamedTuple
+
+from polycalculator import events, kernel
+from polycalculator.batch import UnitArrays, single_combat_arrays_dedup
+from polycalculator.cache import PersistentCache
+from polycalculator.combat import (
+    _compile_rules,
+    _resolve_combat,
+    multi_combat,
+    single_combat,
+)
+from polycalculator.encoding import (
+    EFFECTS,
+    NAVAL_TYPES,
+    UNIT_TYPES,
+    UnitState,
+    decode_unit,
+    effect_bit,
+    effects_to_mask,
+    encode_unit,
+)
+
+Case = tuple[tuple[UnitState, ...], tuple[UnitState, ...]]
+"""A combat scenario: the states of the attackers and of the defenders."""
+Result = tuple[int, ...]
+"""
+The outcome of a combat: the damage taken and effects received by each attacker,
+then by each defender, followed by the defenders' states after a multi-combat.
+"""
+
+
+class Engine(NamedTuple):
+    """An implementation of combat to check against the reference implementation."""
+
+    run: Callable[[Sequence[Case]], list[Result]]
+    """Simulate many cases at once."""
+    multi: bool
+    """
+    Whether the engine simulates multi-combats. Otherwise, every case has one
+    attacker and one defender.
+    """
+
+
+class Mismatch(NamedTuple):
+    """A case where an engine disagrees with the reference implementation."""
+
+    engine: str
+    """The name of the engine."""
+    case: Case
+    """The case."""
+    expected: Result | str
+    """The reference result, or the exception it raised."""
+    actual: Result | str
+    """The engine's result, or the exception it raised."""
+
+    def __str__(self) -> str:
+        attackers = ", ".join(repr(decode_unit(state)) for state in self.case[0])
+        defenders = ", ".join(repr(decode_unit(state)) for state in self.case[1])
+        return (
+            f"{self.engine} disagrees on {self.case!r}\n"
+            f"  attackers: {attackers}\n"
+            f"  defenders: {defenders}\n"
+            f"  expected: {self.expected}\n"
+            f"  actual: {self.actual}\n"
+            f"Reproduce with: fuzz.check_case({self.engine!r}, {self.case!r})"
+        )
+
+
+class FuzzReport(NamedTuple):
+    """The results of a fuzzing run."""
+
+    cases: int
+    """The number of cases checked against every engine."""
+    seconds: float
+    """How long the run took."""
+    mismatches: list[Mismatch]
+    """The minimized mismatches, without duplicates."""
+
+    @property
+    def cases_per_minute(self) -> float:
+        return self.cases / self.seconds * 60 if self.seconds else 0.0
+
+
+@cache
+def _normalize(type_id: int, effects: int, naval_id: int) -> tuple[int, int]:
+    """Get the effects a unit really ends up with, and its max HP."""
+    unit = UNIT_TYPES[type_id](
+        status_effects=[effect for effect in EFFECTS if effects & effect_bit(effect)]
+    )
+    naval_type = NAVAL_TYPES[naval_id]
+    if naval_type is not None:
+        unit = naval_type(unit)
+    return effects_to_mask(unit.status_effects), unit.max_hp
+
+
+def random_state(rng: random.Random, naval_chance: float = 0.2) -> UnitState:
+    """
+    Generate a random, valid unit state.
+
+    Parameters
+    ----------
+    rng : random.Random
+        The random number generator.
+    naval_chance : float
+        The probability of the unit being in a naval unit.
+
+    Returns
+    -------
+    UnitState
+        The encoded state.
+    """
+    # random() is several times faster than randrange(), and the bias is negligible.
+    r = rng.random
+    type_id = int(r() * len(UNIT_TYPES))
+    effects = 0
+    for _ in range(int(r() * 4)):
+        effects |= 1 << int(r() * len(EFFECTS))
+    naval_id = 1 + int(r() * (len(NAVAL_TYPES) - 1)) if r() < naval_chance else 0
+    effects, max_hp = _normalize(type_id, effects, naval_id)
+    return UnitState(type_id, 1 + int(r() * max_hp), effects, naval_id)
+
+
+def random_case(
+    rng: random.Random, max_attackers: int = 1, max_defenders: int = 1
+) -> Case:
+    """
+    Generate a random combat scenario.
+
+    Parameters
+    ----------
+    rng : random.Random
+        The random number generator.
+    max_attackers : int
+        The maximum number of attackers. There is always at least one.
+    max_defenders : int
+        The maximum number of defenders. There is always at least one.
+
+    Returns
+    -------
+    Case
+        The scenario.
+    """
+    return (
+        tuple(random_state(rng) for _ in range(rng.randint(1, max_attackers))),
+        tuple(random_state(rng) for _ in range(rng.randint(1, max_defenders))),
+    )
+
+
+def _single_result(result) -> Result:
+    return (
+        result.damage.to_attacker,
+        effects_to_mask(result.status_effects.to_attacker),
+        result.damage.to_defender,
+        effects_to_mask(result.status_effects.to_defender),
+    )
+
+
+def _multi_result(result, defenders: Iterable) -> Result:
+    flat: list[int] = []
+    for unit_result in (*result.attackers, *result.defenders):
+        flat += unit_result.damage, effects_to_mask(unit_result.status_effects)
+    for defender in defenders:
+        flat += encode_unit(defender)
+    return tuple(flat)
+
+
+def _reference(case: Case, multi: bool) -> Result:
+    """Simulate a case with the reference implementation."""
+    attackers = [decode_unit(state) for state in case[0]]
+    defenders = [decode_unit(state) for state in case[1]]
+    if not multi:
+        return _single_result(single_combat(attackers[0], defenders[0]))
+    return _multi_result(multi_combat(attackers, defenders), defenders)
+
+
+def _run_batch(cases: Sequence[Case]) -> list[Result]:
+    # The kernel engine already checks the combats themselves, so this one checks
+    # deduplication. Every case is given twice, and the result of the second copy is
+    # the one of the first, copied back.
+    attackers = [case[0][0] for case in cases]
+    defenders = [case[1][0] for case in cases]
+    results, _ = single_combat_arrays_dedup(
+        UnitArrays(attackers * 2), UnitArrays(defenders * 2)
+    )
+    n = len(cases)
+    return list(
+        zip(
+            results.to_attacker[n:],
+            results.attacker_effects[n:],
+            results.to_defender[n:],
+            results.defender_effects[n:],
+        )
+    )
+
+
+def _run_rules(cases: Sequence[Case]) -> list[Result]:
+    results = []
+    for case in cases:
+        attacker = decode_unit(case[0][0])
+        defender = decode_unit(case[1][0])
+        rules = _compile_rules(attacker, defender)
+        results.append(_single_result(_resolve_combat(attacker, defender, rules)))
+    return results
+
+
+@cache
+def _memory_cache() -> PersistentCache:
+    return PersistentCache(":memory:")
+
+
+def _run_cache(cases: Sequence[Case]) -> list[Result]:
+    results = []
+    for case in cases:
+        for _ in range(2):
+            # The first simulation fills the cache and the second is a hit.
+            attackers = [decode_unit(state) for state in case[0]]
+            defenders = [decode_unit(state) for state in case[1]]
+            result = _memory_cache().multi_combat(attackers, defenders)
+        results.append(_multi_result(result, defenders))
+    return results
+
+
+def _run_kernel(cases: Sequence[Case]) -> list[Result]:
+    results = kernel.single_combat_arrays(
+        UnitArrays(case[0][0] for case in cases),
+        UnitArrays(case[1][0] for case in cases),
+    )
+    return list(
+        zip(
+            results.to_attacker,
+            results.attacker_effects,
+            results.to_defender,
+            results.defender_effects,
+        )
+    )
+
+
+def _run_kernel_multi(cases: Sequence[Case]) -> list[Result]:
+    results = []
+    for attackers, defenders in cases:
+        arrays = UnitArrays(defenders)
+        result = kernel.multi_combat_arrays(UnitArrays(attackers), arrays)
+        flat: list[int] = []
+        for damage, effects in zip(result.attacker_damage, result.attacker_effects):
+            flat += damage, effects
+        for j in range(result.engaged):
+            flat += result.defender_damage[j], result.defender_effects[j]
+        for j in range(len(arrays)):
+            flat += arrays.state(j)
+        results.append(tuple(flat))
+    return results
+
+
+def _run_events(cases: Sequence[Case]) -> list[Result]:
+    results = []
+    for case in cases:
+        attackers = [decode_unit(state) for state in case[0]]
+        defenders = [decode_unit(state) for state in case[1]]
+        result = events.collect_events(
+            events.battle_events(attackers, defenders), len(attackers), len(defenders)
+        )
+        results.append(_multi_result(result, defenders))
+    return results
+
+
+ENGINES: dict[str, Engine] = {
+    "batch": Engine(_run_batch, multi=False),
+    "rules": Engine(_run_rules, multi=False),
+    "cache": Engine(_run_cache, multi=True),
+    "kernel": Engine(_run_kernel, multi=False),
+    "kernel-multi": Engine(_run_kernel_multi, multi=True),
+    "events": Engine(_run_events, multi=True),
+}
+"""The engines checked by the fuzzer, by name."""
+
+
+def _outcome(run: Callable[[Case], Result], case: Case) -> Result | str:
+    try:
+        return run(case)
+    # Any error an engine raises is a bug the fuzzer reports, so none are let through.
+    except Exception as e:  # noqa: BLE001
+        return f"{e.__class__.__name__}: {e}"
+
+
+def _engine_outcomes(engine: Engine, cases: Sequence[Case]) -> list[Result | str]:
+    try:
+        return list(engine.run(cases))
+    except Exception:  # noqa: BLE001
+        # Find out which cases raised.
+        return [_outcome(lambda case: engine.run([case])[0], case) for case in cases]
+
+
+def check_case(engine: str, case: Case) -> Mismatch | None:
+    """
+    Check one case against an engine.
+
+    Parameters
+    ----------
+    engine : str
+        The name of the engine.
+    case : Case
+        The case.
+
+    Returns
+    -------
+    Mismatch | None
+        The mismatch, or None if the engine agrees with the reference.
+    """
+    case = (
+        tuple(UnitState(*state) for state in case[0]),
+        tuple(UnitState(*state) for state in case[1]),
+    )
+    multi = ENGINES[engine].multi
+    expected = _outcome(lambda case: _reference(case, multi), case)
+    actual = _engine_outcomes(ENGINES[engine], [case])[0]
+    if expected == actual:
+        return None
+    return Mismatch(engine, case, expected, actual)
+
+
+def _simpler_states(state: UnitState) -> Iterable[UnitState]:
+    """Generate states that are simpler than a state."""
+    type_id, hp, effects, naval_id = state
+    candidates = []
+    if naval_id:
+        candidates.append((type_id, hp, effects, 0))
+    for i in range(len(EFFECTS)):
+        if effects & 1 << i:
+            candidates.append((type_id, hp, effects & ~(1 << i), naval_id))
+    if type_id:
+        candidates += [(0, hp, effects, naval_id), (type_id - 1, hp, effects, naval_id)]
+    max_hp = _normalize(type_id, effects, naval_id)[1]
+    if hp != max_hp:
+        candidates.append((type_id, max_hp, effects, naval_id))
+        if hp % 10 and hp > 10:
+            candidates.append((type_id, hp - hp % 10, effects, naval_id))
+
+    for type_id, hp, effects, naval_id in candidates:
+        effects, max_hp = _normalize(type_id, effects, naval_id)
+        yield UnitState(type_id, min(hp, max_hp), effects, naval_id)
+
+
+def _simpler_cases(case: Case) -> Iterable[Case]:
+    """Generate cases that are simpler than a case."""
+    for side in (0, 1):
+        units = case[side]
+        if len(units) > 1:
+            for i in range(len(units)):
+                yield _replace_side(case, side, units[:i] + units[i + 1 :])
+    for side in (0, 1):
+        units = case[side]
+        for i, state in enumerate(units):
+            for simpler in _simpler_states(state):
+                if simpler != state:
+                    yield _replace_side(
+                        case, side, units[:i] + (simpler,) + units[i + 1 :]
+                    )
+
+
+def _replace_side(case: Case, side: int, units: tuple[UnitState, ...]) -> Case:
+    return (units, case[1]) if side == 0 else (case[0], units)
+
+
+def minimize(mismatch: Mismatch) -> Mismatch:
+    """
+    Shrink a mismatch into the simplest case that still mismatches.
+
+    Units are removed, and the remaining units are moved onto land, stripped of
+    status effects, healed and replaced by earlier unit types, for as long as the
+    engine keeps disagreeing with the reference.
+
+    Parameters
+    ----------
+    mismatch : Mismatch
+        The mismatch to shrink.
+
+    Returns
+    -------
+    Mismatch
+        A mismatch on the simplest case found.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for case in _simpler_cases(mismatch.case):
+            simpler = check_case(mismatch.engine, case)
+            if simpler is not None:
+                mismatch = simpler
+                changed = True
+                break
+    return mismatch
+
+
+def _check_chunk(
+    seed: int | str,
+    chunk: int,
+    size: int,
+    engines: Sequence[str],
+    max_attackers: int,
+    max_defenders: int,
+    max_mismatches: int,
+) -> list[Mismatch]:
+    """Generate a chunk of cases and check them against the engines."""
+    rng = random.Random(f"{seed}:{chunk}")
+    if not any(ENGINES[name].multi for name in engines):
+        max_attackers = max_defenders = 1
+    multi_cases = [random_case(rng, max_attackers, max_defenders) for _ in range(size)]
+    single_cases = [
+        ((attackers[0],), (defenders[0],)) for attackers, defenders in multi_cases
+    ]
+    expected: dict[bool, list[Result | str]] = {}
+    mismatches: list[Mismatch] = []
+    for name in engines:
+        engine = ENGINES[name]
+        cases = multi_cases if engine.multi else single_cases
+        if engine.multi not in expected:
+            expected[engine.multi] = [
+                _outcome(lambda case, multi=engine.multi: _reference(case, multi), case)
+                for case in cases
+            ]
+        found = 0
+        for case, reference, actual in zip(
+            cases, expected[engine.multi], _engine_outcomes(engine, cases)
+        ):
+            if reference != actual:
+                mismatches.append(minimize(Mismatch(name, case, reference, actual)))
+                found += 1
+                if found == max_mismatches:
+                    break
+    return mismatches
+
+
+def fuzz(
+    cases: int,
+    seed: int | str = 0,
+    engines: Sequence[str] | None = None,
+    max_attackers: int = 3,
+    max_defenders: int = 3,
+    processes: int | None = None,
+    chunk_size: int = 10_000,
+    max_mismatches: int = 10,
+) -> FuzzReport:
+    """
+    Check random cases against every engine, in parallel.
+
+    Each chunk of cases is generated from the seed and the index of the chunk, so a
+    run can be repeated exactly. Single-combat engines are checked on the first
+    attacker and defender of each case.
+
+    Parameters
+    ----------
+    cases : int
+        The number of cases.
+    seed : int | str
+        The seed of the random cases.
+    engines : Sequence[str] | None
+        The names of the engines to check, or None to check every engine.
+    max_attackers : int
+        The maximum number of attackers in a multi-combat.
+    max_defenders : int
+        The maximum number of defenders in a multi-combat.
+    processes : int | None
+        The number of worker processes, or None to use one per CPU. If it is 1, the
+        cases are checked in this process.
+    chunk_size : int
+        The number of cases each worker checks at once.
+    max_mismatches : int
+        The maximum number of mismatches to minimize per engine and chunk.
+
+    Returns
+    -------
+    FuzzReport
+        The number of cases checked and the minimized mismatches.
+    """
+    engines = list(ENGINES if engines is None else engines)
+    for name in engines:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown engine {name!r}")
+
+    sizes = [chunk_size] * (cases // chunk_size)
+    if cases % chunk_size:
+        sizes.append(cases % chunk_size)
+    arguments = [
+        (seed, chunk, size, engines, max_attackers, max_defenders, max_mismatches)
+        for chunk, size in enumerate(sizes)
+    ]
+
+    start = time.perf_counter()
+    if processes == 1:
+        chunks = [_check_chunk(*args) for args in arguments]
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            chunks = list(executor.map(_check_chunk, *zip(*arguments)))
+
+    mismatches: dict[tuple[str, Case], Mismatch] = {}
+    for chunk_mismatches in chunks:
+        for mismatch in chunk_mismatches:
+            mismatches.setdefault((mismatch.engine, mismatch.case), mismatch)
+    return FuzzReport(cases, time.perf_counter() - start, list(mismatches.values()))
+
+
+def main() -> None:  # pragma: no cover
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Check fast combat engines against the reference implementation."
+    )
+    parser.add_argument("cases", type=int, help="the number of cases")
+    parser.add_argument("--seed", default="0", help="the seed of the random cases")
+    parser.add_argument(
+        "--engine", action="append", choices=ENGINES, help="an engine to check"
+    )
+    parser.add_argument("--processes", type=int, help="the number of processes")
+    parser.add_argument(
+        "--chunk-size", type=int, default=10_000, help="cases per chunk"
+    )
+    args = parser.parse_args()
+
+    report = fuzz(
+        args.cases,
+        seed=args.seed,
+        engines=args.engine,
+        processes=args.processes,
+        chunk_size=args.chunk_size,
+    )
+    for mismatch in report.mismatches:
+        print(mismatch, end="\n\n")
+    print(
+        f"{report.cases} cases in {report.seconds:.1f}s "
+        f"({report.cases_per_minute:,.0f} per minute), "
+        f"{len(report.mismatches)} mismatches"
+    )
+    raise SystemExit(1 if report.mismatches else 0)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,292 @@
+import itertools
+import json
+import os
+import time
+from array import array
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from os import PathLike
+from pathlib import Path
+from typing import NamedTuple
+
+from polycalculator import kernel
+from polycalculator.batch import CombatArrays, UnitArrays
+from polycalculator.encoding import FINGERPRINT
+from polycalculator.pool import warm_pool
+from polycalculator.records import RecordKind, Records
+
+MANIFEST = "job.json"
+"""The name of the checkpoint file in a job's output directory."""
+
+_TYPECODES = ("i", "i", "H", "H")
+"""The type codes of the columns of :class:`~polycalculator.batch.CombatArrays`."""
+
+
+class JobProgress(NamedTuple):
+    """The progress of a job run by :func:`run_job`."""
+
+    chunks_done: int
+    """The number of chunks done, including the ones done by earlier runs."""
+    chunks: int
+    """The number of chunks."""
+    records_done: int
+    """The number of records done, including the ones done by earlier runs."""
+    records: int
+    """The number of records."""
+    elapsed: float
+    """The number of seconds since this run started."""
+    rate: float
+    """The number of records this run has done per second."""
+
+    @property
+    def eta(self) -> float | None:
+        """
+        The estimated number of seconds until the job is done, or None before
+        anything is done.
+        """
+        if self.records_done == self.records:
+            return 0.0
+        if not self.rate:
+            return None
+        return (self.records - self.records_done) / self.rate
+
+
+def _chunk_path(output: Path, index: int) -> Path:
+    return output / f"{index:08d}.chunk"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """
+    Write a file so that it either has all of the data or keeps its old contents.
+
+    The data is written to a temporary file, flushed to disk, and renamed over the
+    file, which replaces it in one step even if the process dies.
+    """
+    temporary = path.with_name(path.name + ".tmp")
+    with open(temporary, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def _run_chunk(source: Path, output: Path, index: int, start: int, stop: int) -> int:
+    """Simulate the combats of one chunk and write their results."""
+    with Records(source) as records:
+        attackers = UnitArrays.from_records(records, 0, start, stop)
+        defenders = UnitArrays.from_records(records, 1, start, stop)
+    results = kernel.single_combat_arrays(attackers, defenders)
+    _write_atomic(
+        _chunk_path(output, index), b"".join(column.tobytes() for column in results)
+    )
+    return stop - start
+
+
+def _source_version(source: Path) -> list[int]:
+    """Get the size and modification time of a record file, which change with it."""
+    stat = source.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _manifest(
+    source: list[int], records: int, chunk_size: int, done: set[int]
+) -> dict[str, object]:
+    return {
+        "fingerprint": FINGERPRINT.hex(),
+        "source": source,
+        "records": records,
+        "chunk_size": chunk_size,
+        "done": sorted(done),
+    }
+
+
+def _load_manifest(
+    output: Path,
+    source: list[int] | None = None,
+    records: int | None = None,
+    chunk_size: int | None = None,
+) -> dict:
+    """Read a job's checkpoint, checking that it belongs to the same job."""
+    with open(output / MANIFEST) as file:
+        manifest = json.load(file)
+    if manifest["fingerprint"] != FINGERPRINT.hex():
+        raise ValueError("Job was run with different unit data")
+    if records is not None and (manifest["records"], manifest["chunk_size"]) != (
+        records,
+        chunk_size,
+    ):
+        raise ValueError("Output directory belongs to a different job")
+    if source is not None and manifest.get("source") != source:
+        raise ValueError("Record file changed since the job was started")
+    return manifest
+
+
+def run_job(
+    source: str | PathLike[str],
+    output: str | PathLike[str],
+    chunk_size: int = 1 << 16,
+    max_workers: int | None = None,
+    progress: Callable[[JobProgress], object] | None = None,
+) -> JobProgress:
+    """
+    Simulate the single combats of every battle in a record file, resumably.
+
+    The records are split into chunks of ``chunk_size`` records, which worker
+    processes from :func:`polycalculator.pool.warm_pool` simulate in parallel with
+    :func:`polycalculator.kernel.single_combat_arrays`. The workers read their chunks
+    straight from the record file, so no records are sent to them.
+
+    The results of each chunk are written to their own file in the output directory,
+    and the chunks that are done are recorded in a checkpoint, :data:`MANIFEST`,
+    after each chunk. Both are written atomically, so a crash leaves every file
+    either complete or as it was. Only one chunk per worker is submitted at a time,
+    so a crash loses at most the chunks that were running. Running the same job
+    again with the same output directory skips the chunks the checkpoint lists and
+    only simulates the rest. The checkpoint also records the size and modification
+    time of the record file, so a job isn't resumed on a record file that was
+    written again since.
+    Read the results with :func:`load_results`.
+
+    Parameters
+    ----------
+    source : str | PathLike[str]
+        The path of a record file of battle records.
+    output : str | PathLike[str]
+        The path of the output directory. It is created if it doesn't exist.
+    chunk_size : int
+        The number of records in a chunk. It must be the same when a job is resumed.
+    max_workers : int | None
+        The number of worker processes, or None for the number of CPUs.
+    progress : Callable[[JobProgress], object] | None
+        A function called with the progress of the job when it starts and after
+        each chunk, for example to report the throughput and the ETA.
+
+    Returns
+    -------
+    JobProgress
+        The progress of the job, which is done.
+
+    Raises
+    ------
+    ValueError
+        If the record file doesn't hold battle records, if the chunk size isn't
+        greater than 0, if the output directory holds another job, or if the record
+        file changed since the job was started.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be greater than 0")
+    source = Path(source).resolve()
+    output = Path(output)
+    with Records(source) as records:
+        if records.kind != RecordKind.BATTLE:
+            raise ValueError("A job needs battle records")
+        total = len(records)
+    version = _source_version(source)
+
+    output.mkdir(parents=True, exist_ok=True)
+    done: set[int] = set()
+    if (output / MANIFEST).exists():
+        manifest = _load_manifest(output, version, total, chunk_size)
+        done = {i for i in manifest["done"] if _chunk_path(output, i).exists()}
+    chunks = -(-total // chunk_size)
+
+    def size(index: int) -> int:
+        return min(chunk_size, total - index * chunk_size)
+
+    start = time.monotonic()
+    records_done = sum(map(size, done))
+    records_run = 0
+
+    def report() -> JobProgress:
+        elapsed = time.monotonic() - start
+        current = JobProgress(
+            len(done),
+            chunks,
+            records_done + records_run,
+            total,
+            elapsed,
+            records_run / elapsed if elapsed else 0.0,
+        )
+        if progress is not None:
+            progress(current)
+        return current
+
+    def checkpoint() -> None:
+        _write_atomic(
+            output / MANIFEST,
+            json.dumps(_manifest(version, total, chunk_size, done)).encode(),
+        )
+
+    checkpoint()
+    current = report()
+    todo = [i for i in range(chunks) if i not in done]
+    if not todo:
+        return current
+
+    workers = max_workers or os.process_cpu_count() or 1
+    pool = warm_pool(max_workers)
+    try:
+        queue = iter(todo)
+        pending: dict[Future[int], int] = {}
+
+        def submit() -> None:
+            for i in itertools.islice(queue, workers - len(pending)):
+                future = pool.submit(
+                    _run_chunk,
+                    source,
+                    output,
+                    i,
+                    i * chunk_size,
+                    i * chunk_size + size(i),
+                )
+                pending[future] = i
+
+        submit()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                records_run += future.result()
+                done.add(pending.pop(future))
+            submit()
+            checkpoint()
+            current = report()
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return current
+
+
+def load_results(output: str | PathLike[str]) -> CombatArrays:
+    """
+    Read the results of a job run by :func:`run_job`.
+
+    Parameters
+    ----------
+    output : str | PathLike[str]
+        The output directory of the job.
+
+    Returns
+    -------
+    CombatArrays
+        The results of the combats, in the order of the records.
+
+    Raises
+    ------
+    ValueError
+        If the job isn't done.
+    """
+    output = Path(output)
+    manifest = _load_manifest(output)
+    records, chunk_size = manifest["records"], manifest["chunk_size"]
+    chunks = -(-records // chunk_size)
+    if len(manifest["done"]) != chunks:
+        raise ValueError("Job isn't done")
+
+    results = CombatArrays(*(array(typecode) for typecode in _TYPECODES))
+    for index in range(chunks):
+        data = _chunk_path(output, index).read_bytes()
+        n = min(chunk_size, records - index * chunk_size)
+        offset = 0
+        for column in results:
+            column.frombytes(data[offset : offset + n * column.itemsize])
+            offset += n * column.itemsize
+    return results
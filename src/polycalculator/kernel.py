@@ -0,0 +1,425 @@
+from array import array
+from collections.abc import Callable, Sequence
+from typing import Any, NamedTuple
+
+from polycalculator.batch import (
+    _CONVERT,
+    _CONVERTED,
+    _EXPLODE,
+    _EXPLODING,
+    _FORTIFIED,
+    _FREEZE,
+    _FROZEN,
+    _NAVAL_STATS,
+    _NO_RETALIATION,
+    _POISON,
+    _POISONED,
+    _SPLASH,
+    _SPLASHING,
+    _STATIC,
+    _STIFF,
+    _TAKES_RETALIATION,
+    _TENTACLES,
+    _UNIT_STATS,
+    _VETERAN,
+    _WALLED,
+    CombatArrays,
+    UnitArrays,
+)
+from polycalculator.combat import MultiCombatResult, UnitResult
+from polycalculator.encoding import mask_to_effects
+from polycalculator.unit import Unit
+
+try:
+    import numba
+except ImportError:  # pragma: no cover
+    numba = None
+
+BACKENDS = ("python", "numba")
+"""The names of the kernel backends."""
+
+_FIELDS = 5
+"""The number of stats of each type in a stats table."""
+_STATS = array("i", [value for stats in _UNIT_STATS for value in stats])
+_NAVAL = array(
+    "i",
+    [0] * _FIELDS
+    + [value for stats in _NAVAL_STATS if stats is not None for value in stats],
+)
+
+# The effects a unit loses when it is poisoned, and the damage halving effects.
+_DEFENSES = _FORTIFIED | _WALLED
+_HALVING = _SPLASHING | _EXPLODING
+
+
+class MultiCombatArrays(NamedTuple):
+    """The results of a multi-combat between units stored as arrays."""
+
+    attacker_damage: array
+    """The damage each attacker takes."""
+    attacker_effects: array
+    """The status effects each attacker receives, as bitmasks."""
+    defender_damage: array
+    """The damage each defender takes."""
+    defender_effects: array
+    """The status effects each defender receives, as bitmasks."""
+    engaged: int
+    """The number of defenders that were attacked."""
+
+
+def _add_effects(type_id: int, effects: int, new: int, stats: Any) -> int:
+    """Add status effects to a mask the way :meth:`Unit.add_status_effect` does."""
+    traits = stats[type_id * _FIELDS + 4]
+    if new & _VETERAN and traits & _STATIC:
+        new &= ~_VETERAN
+    if new & _POISONED:
+        effects &= ~_DEFENSES
+    if effects & _POISONED or new & _POISONED:
+        new &= ~_DEFENSES
+    if new & _WALLED:
+        effects &= ~_FORTIFIED
+    if new & _SPLASHING and not traits & _SPLASH:
+        new &= ~_SPLASHING
+    if new & _EXPLODING and not traits & _EXPLODE:
+        new &= ~_EXPLODING
+    return effects | new
+
+
+def _combat(
+    a_type: int,
+    a_hp: int,
+    a_effects: int,
+    a_naval: int,
+    d_type: int,
+    d_hp: int,
+    d_effects: int,
+    d_naval: int,
+    stats: Any,
+    naval: Any,
+) -> tuple[int, int, int, int]:
+    """
+    Simulate a single combat between two encoded units.
+
+    This follows :func:`polycalculator.combat.single_combat` step for step, with the
+    stats read from flat tables and every helper inlined, so that it only uses
+    integers and floats. The floating point operations are done in the same order, so
+    the results are identical. It is also called directly, without a backend, by the
+    code that simulates one encoded combat at a time.
+    """
+    if a_naval:
+        a_row, a_table = a_naval * _FIELDS, naval
+    else:
+        a_row, a_table = a_type * _FIELDS, stats
+    if d_naval:
+        d_row, d_table = d_naval * _FIELDS, naval
+    else:
+        d_row, d_table = d_type * _FIELDS, stats
+    attack = a_table[a_row + 1]
+    a_range = a_table[a_row + 3]
+    a_traits = a_table[a_row + 4]
+    defense = d_table[d_row + 2]
+    d_range = d_table[d_row + 3]
+    d_traits = d_table[d_row + 4]
+
+    a_max = stats[a_type * _FIELDS]
+    if a_effects & _VETERAN and not stats[a_type * _FIELDS + 4] & _STATIC:
+        a_max += 50
+    d_max = stats[d_type * _FIELDS]
+    if d_effects & _VETERAN and not stats[d_type * _FIELDS + 4] & _STATIC:
+        d_max += 50
+    d_ratio = d_hp / d_max
+    if d_effects & _POISONED:
+        d_bonus = 0.7
+    elif d_effects & _WALLED:
+        d_bonus = 4.0
+    elif d_effects & _FORTIFIED:
+        d_bonus = 1.5
+    else:
+        d_bonus = 1.0
+    defense_force = defense * d_ratio * d_bonus
+
+    takes_retaliation = a_effects & _TAKES_RETALIATION != 0
+    tentacle_damage = 0
+    if d_traits & _TENTACLES:
+        if a_traits & _TENTACLES:
+            # Special case: Jelly vs Jelly
+            takes_retaliation = True
+        elif a_range <= d_range:
+            effective_attack = attack * (a_hp / a_max)
+            total_force = effective_attack + defense_force
+            if total_force != 0:
+                tentacle_damage = (
+                    int((4.5 * attack * effective_attack / total_force + 5) / 10) * 10
+                )
+
+    remaining = a_hp - tentacle_damage
+    attack_force = attack * ((max(0, remaining)) / a_max)
+    total_force = attack_force + defense_force
+    to_defender = 0
+    retaliation = 0
+    if total_force != 0:
+        to_defender = int((attack_force / total_force * attack * 4.5 + 5) / 10) * 10
+        retaliation = int((defense_force / total_force * defense * 4.5 + 5) / 10) * 10
+        if a_effects & _HALVING:
+            to_defender //= 2
+
+    if not takes_retaliation:
+        takes_retaliation = (
+            a_range <= d_range
+            and d_hp - to_defender > 0
+            and not d_traits & _STIFF
+            and not a_traits & _NO_RETALIATION
+            and not d_effects & _FROZEN
+        )
+
+    to_attacker_effects = 0
+    if takes_retaliation and d_traits & _POISON:
+        to_attacker_effects = _POISONED
+    to_defender_effects = 0
+    if a_traits & _POISON:
+        to_defender_effects |= _POISONED
+    if a_traits & _FREEZE:
+        to_defender_effects |= _FROZEN
+    if a_traits & _CONVERT:
+        to_defender_effects |= _CONVERTED
+
+    if a_effects & _EXPLODING:
+        to_attacker = a_hp
+    elif takes_retaliation:
+        to_attacker = tentacle_damage + retaliation
+    else:
+        to_attacker = tentacle_damage
+    return to_attacker, to_defender, to_attacker_effects, to_defender_effects
+
+
+def _build(jit: Callable[[Callable], Callable]) -> tuple[Callable, Callable]:
+    """Create the loops of a backend, with the kernels compiled by ``jit``."""
+    combat = jit(_combat)
+    add_effects = jit(_add_effects)
+
+    def single_loop(
+        a_type,
+        a_hp,
+        a_effects,
+        a_naval,
+        d_type,
+        d_hp,
+        d_effects,
+        d_naval,
+        stats,
+        naval,
+        to_attacker,
+        to_defender,
+        attacker_effects,
+        defender_effects,
+    ):
+        for i in range(len(a_type)):
+            result = combat(
+                a_type[i],
+                a_hp[i],
+                a_effects[i],
+                a_naval[i],
+                d_type[i],
+                d_hp[i],
+                d_effects[i],
+                d_naval[i],
+                stats,
+                naval,
+            )
+            to_attacker[i] = result[0]
+            to_defender[i] = result[1]
+            attacker_effects[i] = result[2]
+            defender_effects[i] = result[3]
+
+    def multi_loop(
+        a_type,
+        a_hp,
+        a_effects,
+        a_naval,
+        d_type,
+        d_hp,
+        d_effects,
+        d_naval,
+        stats,
+        naval,
+        attacker_damage,
+        attacker_effects,
+        defender_damage,
+        defender_effects,
+    ):
+        if len(d_type) == 0:
+            return 0
+        j = 0
+        for i in range(len(a_type)):
+            if d_hp[j] == 0:
+                if j + 1 == len(d_type):
+                    break
+                j += 1
+            result = combat(
+                a_type[i],
+                a_hp[i],
+                a_effects[i],
+                a_naval[i],
+                d_type[j],
+                d_hp[j],
+                d_effects[j],
+                d_naval[j],
+                stats,
+                naval,
+            )
+            attacker_damage[i] = result[0]
+            attacker_effects[i] = result[2]
+            defender_damage[j] += result[1]
+            defender_effects[j] |= result[3]
+            hp = d_hp[j] - result[1]
+            d_hp[j] = max(0, hp)
+            d_effects[j] = add_effects(d_type[j], d_effects[j], result[3], stats)
+        return j + 1
+
+    return jit(single_loop), jit(multi_loop)
+
+
+_loops: dict[str, tuple[Callable, Callable]] = {"python": _build(lambda fn: fn)}
+_backend = "python"
+
+
+def available_backends() -> list[str]:
+    """Get the names of the backends that can be used."""
+    return [name for name in BACKENDS if name == "python" or numba is not None]
+
+
+def get_backend() -> str:
+    """Get the name of the backend in use."""
+    return _backend
+
+
+def set_backend(name: str) -> None:
+    """
+    Choose the backend of the kernels.
+
+    ``"python"`` runs the kernels as plain Python, is always available and is used
+    by default. ``"numba"`` compiles them to machine code with Numba, if it is
+    installed with the ``numba`` extra. They are compiled the first time they are
+    called, which takes a few seconds.
+
+    Parameters
+    ----------
+    name : str
+        The name of the backend.
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r}")
+    if name not in available_backends():
+        raise ValueError(f"Backend {name!r} is not available")
+    if name not in _loops:  # pragma: no cover
+        _loops[name] = _build(numba.njit)
+    _backend = name
+
+
+def _columns(units: UnitArrays) -> tuple[array, array, array, array]:
+    return units.type_id, units.hp, units.effects, units.naval_id
+
+
+def single_combat_arrays(attackers: UnitArrays, defenders: UnitArrays) -> CombatArrays:
+    """
+    Simulate single combats between many pairs of units with the kernel backend.
+
+    See :func:`polycalculator.batch.single_combat_arrays`.
+    """
+    if len(attackers) != len(defenders):
+        raise ValueError("There must be as many attackers as defenders")
+
+    n = len(attackers)
+    results = CombatArrays(
+        array("i", bytes(4 * n)),
+        array("i", bytes(4 * n)),
+        array("H", bytes(2 * n)),
+        array("H", bytes(2 * n)),
+    )
+    _loops[_backend][0](
+        *_columns(attackers), *_columns(defenders), _STATS, _NAVAL, *results
+    )
+    return results
+
+
+def multi_combat_arrays(
+    attackers: UnitArrays, defenders: UnitArrays
+) -> MultiCombatArrays:
+    """
+    Simulate a multi-combat between units stored as arrays with the kernel backend.
+
+    Like :func:`polycalculator.combat.multi_combat`, the attackers attack in order,
+    each attacking the first defender that is still alive, and the damage and status
+    effects are applied to the defenders.
+
+    Parameters
+    ----------
+    attackers : UnitArrays
+        The attacking units.
+    defenders : UnitArrays
+        The defending units. They are modified.
+
+    Returns
+    -------
+    MultiCombatArrays
+        The damage done and status effects applied to the attackers and defenders.
+    """
+    n_attackers = len(attackers)
+    n_defenders = len(defenders)
+    attacker_damage = array("i", bytes(4 * n_attackers))
+    attacker_effects = array("H", bytes(2 * n_attackers))
+    defender_damage = array("i", bytes(4 * n_defenders))
+    defender_effects = array("H", bytes(2 * n_defenders))
+    engaged = _loops[_backend][1](
+        *_columns(attackers),
+        *_columns(defenders),
+        _STATS,
+        _NAVAL,
+        attacker_damage,
+        attacker_effects,
+        defender_damage,
+        defender_effects,
+    )
+    return MultiCombatArrays(
+        attacker_damage, attacker_effects, defender_damage, defender_effects, engaged
+    )
+
+
+def multi_combat(
+    attackers: Sequence[Unit], defenders: Sequence[Unit]
+) -> MultiCombatResult:
+    """
+    Simulate a multi-combat with the kernel backend.
+
+    This is a drop-in replacement for :func:`polycalculator.combat.multi_combat`,
+    including applying the damage and status effects to the defenders.
+
+    Parameters
+    ----------
+    attackers : Sequence[Unit]
+        The attacking units.
+    defenders : Sequence[Unit]
+        The defending units.
+
+    Returns
+    -------
+    MultiCombatResult
+        The damage done and status effects applied to the attackers and defenders.
+    """
+    result = multi_combat_arrays(
+        UnitArrays.from_units(attackers), UnitArrays.from_units(defenders)
+    )
+    defender_results = []
+    for j in range(result.engaged):
+        effects = mask_to_effects(result.defender_effects[j])
+        defenders[j].current_hp -= result.defender_damage[j]
+        defenders[j].add_status_effects(effects)
+        defender_results.append(UnitResult(result.defender_damage[j], effects))
+    return MultiCombatResult(
+        [
+            UnitResult(damage, mask_to_effects(effects))
+            for damage, effects in zip(result.attacker_damage, result.attacker_effects)
+        ],
+        defender_results,
+    )
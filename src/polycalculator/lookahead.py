@@ -0,0 +1,406 @@
+"""
+Rank attack orders by looking ahead to the opponent's reply.
+
+This is a two-ply search, but not a minimax one: the opponent replies with the
+attacks that kill the most of our units, not the ones that cost us the most stars,
+so the two sides don't optimize the same score and alpha-beta pruning doesn't apply.
+Orders are instead pruned with bounds on the score: an order is skipped once the
+most it could score, whatever the reply, can't beat the orders already found.
+"""
+
+import copy
+from collections.abc import Iterable, Sequence
+from typing import NamedTuple
+
+from polycalculator.assignment import MAX_ATTACKERS, Objective, _combine, _Defender
+from polycalculator.combat import multi_combat, single_combat
+from polycalculator.encoding import UnitState, encode_unit
+from polycalculator.status_effect import StatusEffect
+from polycalculator.unit import Unit
+
+MAX_ORDERS_ATTACKERS = 7
+"""The most attackers :func:`rank_orders` tries every order of."""
+
+
+class Outcome(NamedTuple):
+    """The outcome of an attack order and the opponent's reply to it."""
+
+    order: tuple[int, ...]
+    """
+    The indices of the attackers in the order they attack. Attackers left over once
+    every defender is dead are left out.
+    """
+    net: int
+    """
+    The cost of the defenders killed, by the attack or by retaliation during the
+    reply, minus the cost of the attackers lost over both turns, in stars.
+    """
+    kills: int
+    """The number of defenders killed or converted by the attack."""
+    losses: int
+    """The number of attackers killed or converted over both turns."""
+    counter_losses: int
+    """The number of the opponent's units killed by retaliation during its reply."""
+    reply: list[tuple[int, int]]
+    """
+    The opponent's reply, as pairs of the index of the defender that attacks and the
+    index of the attacker it attacks, in order.
+    """
+
+
+def _dead(unit: Unit) -> bool:
+    return unit.current_hp <= 0 or StatusEffect.CONVERTED in unit.status_effects
+
+
+def _newly_dead(before: Unit, after: Unit) -> int:
+    """Get the cost of a unit if it died, or 0."""
+    return after.cost if _dead(after) and not _dead(before) else 0
+
+
+class _Ply(NamedTuple):
+    """The units after some of the attackers have attacked."""
+
+    attackers: tuple[Unit, ...]
+    defenders: tuple[Unit, ...]
+    states: tuple[UnitState, ...]
+    """The encoded states of the attackers, then of the defenders."""
+    killed: int
+    """The cost of the defenders killed so far."""
+    lost: int
+    """The cost of the attackers killed so far."""
+
+    def fighting(self) -> list[int]:
+        """Get the defenders the next attackers fight, like a multi-combat does."""
+        return [
+            i for i, defender in enumerate(self.defenders) if defender.current_hp > 0
+        ]
+
+    def alive(self) -> list[int]:
+        """Get the defenders still on the opponent's side."""
+        return [i for i, defender in enumerate(self.defenders) if not _dead(defender)]
+
+
+class _Reply(NamedTuple):
+    lost: int
+    losses: int
+    counter_lost: int
+    """The cost of the opponent's units killed by retaliation."""
+    counter_losses: int
+    attacks: list[tuple[int, int]]
+    """The attacks, by the positions of the units among the living ones."""
+
+
+class _Search:
+    def __init__(self, attackers: Sequence[Unit], defenders: Sequence[Unit]):
+        states = tuple(map(encode_unit, (*attackers, *defenders)))
+        start = _Ply(tuple(attackers), tuple(defenders), states, 0, 0)
+        self.plies: dict[tuple[int, ...], _Ply] = {(): start}
+        self.dead = (sum(map(_dead, attackers)), sum(map(_dead, defenders)))
+        self.replies: dict[tuple[tuple[UnitState, ...], int], _Reply] = {}
+        self.counter_kills: dict[tuple[UnitState, UnitState], bool] = {}
+        self.defender_searches: dict[
+            tuple[tuple[UnitState, ...], UnitState], _Defender
+        ] = {}
+
+    def ply(self, order: tuple[int, ...]) -> _Ply:
+        """Get the units after the attackers in an order attack, sharing prefixes."""
+        ply = self.plies.get(order)
+        if ply is not None:
+            return ply
+        previous = self.ply(order[:-1])
+        fighting = previous.fighting()
+        if not fighting:
+            self.plies[order] = previous
+            return previous
+
+        i, d = order[-1], fighting[0]
+        attacker = copy.deepcopy(previous.attackers[i])
+        defender = copy.deepcopy(previous.defenders[d])
+        result = multi_combat([attacker], [defender])
+        attacker.current_hp -= result.attackers[0].damage
+        attacker.add_status_effects(result.attackers[0].status_effects)
+
+        attackers = list(previous.attackers)
+        defenders = list(previous.defenders)
+        states = list(previous.states)
+        attackers[i] = attacker
+        defenders[d] = defender
+        states[i] = encode_unit(attacker)
+        states[len(attackers) + d] = encode_unit(defender)
+        ply = self.plies[order] = _Ply(
+            tuple(attackers),
+            tuple(defenders),
+            tuple(states),
+            previous.killed + _newly_dead(previous.defenders[d], defender),
+            previous.lost + _newly_dead(previous.attackers[i], attacker),
+        )
+        return ply
+
+    def sides(self, ply: _Ply) -> tuple[list[Unit], list[Unit]]:
+        """Get the attackers and the defenders still alive."""
+        ours = [unit for unit in ply.attackers if not _dead(unit)]
+        theirs = [ply.defenders[d] for d in ply.alive()]
+        return ours, theirs
+
+    def searches(self, attackers: list[Unit], defenders: list[Unit]) -> list[_Defender]:
+        """Search the attacks on each defender, sharing searches between replies."""
+        if len(attackers) > MAX_ATTACKERS:
+            raise ValueError(f"There can be at most {MAX_ATTACKERS} attackers")
+        states = tuple(map(encode_unit, attackers))
+        searches = []
+        for defender in map(encode_unit, defenders):
+            search = self.defender_searches.get((states, defender))
+            if search is None:
+                search = _Defender(states, defender, Objective.KILLS)
+                self.defender_searches[states, defender] = search
+            searches.append(search)
+        return searches
+
+    def least_lost(self, ply: _Ply) -> int:
+        """
+        Get a lower bound of the cost of the attackers the reply kills, which is the
+        cost of the cheapest attacker the opponent can kill, if any.
+        """
+        ours, theirs = self.sides(ply)
+        if not ours or not theirs:
+            return 0
+        searches = self.searches(theirs, ours)
+        # A unit killed by some of the opponent's units can't be attacked by the
+        # rest, so every set of attackers has to be looked at, not just all of them.
+        return min(
+            (
+                unit.cost
+                for unit, search in zip(ours, searches, strict=True)
+                if any(value is not None and value[0].kills for value in search.values)
+            ),
+            default=0,
+        )
+
+    def counter_killable(self, ply: _Ply) -> list[bool]:
+        """
+        Find which of the opponent's living units our units could kill by retaliating
+        during the reply, if they were attacked as they are now. Our units only get
+        weaker during the reply, so the others can't be killed by retaliation, unless
+        our attackers hurt them first.
+        """
+        first = len(ply.attackers)
+        ours = [
+            (unit, state)
+            for unit, state in zip(ply.attackers, ply.states, strict=False)
+            if not _dead(unit)
+        ]
+        killable = []
+        for d in ply.alive():
+            enemy, state = ply.defenders[d], ply.states[first + d]
+            can_kill = False
+            for unit, unit_state in ours:
+                kills = self.counter_kills.get((state, unit_state))
+                if kills is None:
+                    damage = single_combat(enemy, unit).damage.to_attacker
+                    kills = self.counter_kills[state, unit_state] = (
+                        damage >= enemy.current_hp
+                    )
+                if kills:
+                    can_kill = True
+                    break
+            killable.append(can_kill)
+        return killable
+
+    def reply(self, ply: _Ply) -> _Reply:
+        """Find the opponent's best reply, memoized by the states of the units."""
+        ours, theirs = self.sides(ply)
+        key = (
+            tuple(
+                state
+                for state, unit in zip(
+                    ply.states, (*ply.attackers, *ply.defenders), strict=True
+                )
+                if not _dead(unit)
+            ),
+            len(ours),
+        )
+        reply = self.replies.get(key)
+        if reply is not None:
+            return reply
+
+        attacks = []
+        if ours and theirs:
+            searches = self.searches(theirs, ours)
+            attacks = _combine(searches, len(theirs), Objective.KILLS).attacks
+        ours = copy.deepcopy(ours)
+        lost = losses = counter_lost = counter_losses = 0
+        for enemy, target in attacks:
+            damage = multi_combat([theirs[enemy]], [ours[target]]).attackers[0].damage
+            if damage >= theirs[enemy].current_hp:
+                counter_lost += theirs[enemy].cost
+                counter_losses += 1
+        for unit in ours:
+            if _dead(unit):
+                lost += unit.cost
+                losses += 1
+        reply = self.replies[key] = _Reply(
+            lost, losses, counter_lost, counter_losses, attacks
+        )
+        return reply
+
+    def outcome(self, order: tuple[int, ...]) -> Outcome:
+        ply = self.ply(order)
+        reply = self.reply(ply)
+        ours = [i for i, unit in enumerate(ply.attackers) if not _dead(unit)]
+        return Outcome(
+            order,
+            ply.killed - ply.lost - reply.lost + reply.counter_lost,
+            sum(map(_dead, ply.defenders)) - self.dead[1],
+            sum(map(_dead, ply.attackers)) - self.dead[0] + reply.losses,
+            reply.counter_losses,
+            [(ply.alive()[enemy], ours[target]) for enemy, target in reply.attacks],
+        )
+
+
+def _key(outcome: Outcome) -> tuple[int, int, int]:
+    return outcome.net, outcome.counter_losses, -len(outcome.order)
+
+
+def rank_orders(
+    attackers: Sequence[Unit],
+    defenders: Sequence[Unit],
+    orders: Iterable[Sequence[int]] | None = None,
+    limit: int | None = None,
+) -> list[Outcome]:
+    """
+    Rank attack orders by what they gain once the opponent has replied.
+
+    Each order is simulated like :func:`polycalculator.combat.multi_combat`, then the
+    opponent's surviving defenders reply against the surviving attackers with the
+    attacks :func:`polycalculator.assignment.assign_attacks` finds, which kill the
+    most attackers while losing the fewest defenders. The reply is simulated with
+    :func:`polycalculator.combat.multi_combat` as well. Orders are ranked by the
+    stars gained over both turns, counting the defenders killed by retaliation
+    during the reply, then by the number of those defenders, then by the number of
+    attacks.
+
+    Orders share the simulation of their common prefixes, and replies are shared
+    between orders that leave the units in the same states. With a ``limit``, an
+    order is pruned without searching for the reply once the stars it gains by
+    attacking, less the cost of the cheapest attacker the opponent can kill, plus
+    the cost of the defenders our units could kill by retaliating, can't beat the
+    worst of the best orders found so far. When every order is tried, a whole prefix
+    is pruned once even killing a defender with every remaining attacker, and every
+    defender that can be hurt by attacking, couldn't beat them.
+
+    Parameters
+    ----------
+    attackers : Sequence[Unit]
+        Our units. They are not modified.
+    defenders : Sequence[Unit]
+        The opponent's units. They are not modified.
+    orders : Iterable[Sequence[int]] | None
+        The orders to rank, as indices into ``attackers``, or None to try every
+        order of every subset of the attackers. An order may leave attackers out,
+        which then don't attack.
+    limit : int | None
+        The number of best orders to return, or None to rank every order.
+
+    Returns
+    -------
+    list[Outcome]
+        The outcomes of the orders, best first. Orders that end the same way, such
+        as orders that differ only after every defender is dead, are listed once.
+
+    Raises
+    ------
+    ValueError
+        If every order is tried with more than :data:`MAX_ORDERS_ATTACKERS`
+        attackers, or if the opponent has more units left than
+        :func:`polycalculator.assignment.assign_attacks` accepts.
+    """
+    if limit is not None and limit <= 0:
+        raise ValueError("Limit must be greater than 0")
+    search = _Search(attackers, defenders)
+    best: list[Outcome] = []
+    seen: set[tuple[UnitState, ...]] = set()
+    visited: set[tuple[frozenset[int], tuple[UnitState, ...]]] = set()
+
+    def threshold() -> int | None:
+        if limit is None or len(best) < limit:
+            return None
+        return best[-1].net
+
+    def consider(order: tuple[int, ...]) -> None:
+        ply = search.ply(order)
+        # Attacks after every defender is dead change nothing.
+        while order and search.ply(order[:-1]) is ply:
+            order = order[:-1]
+        if ply.states in seen:
+            return
+        seen.add(ply.states)
+
+        bound = threshold()
+        if bound is not None:
+            value = ply.killed - ply.lost - search.least_lost(ply)
+            if value < bound:
+                _, theirs = search.sides(ply)
+                killable = search.counter_killable(ply)
+                value += sum(
+                    enemy.cost
+                    for enemy, counter in zip(theirs, killable, strict=True)
+                    if counter
+                )
+                if value < bound:
+                    return
+        best.append(search.outcome(order))
+        best.sort(key=_key, reverse=True)
+        if limit is not None:
+            del best[limit:]
+
+    if orders is not None:
+        for order in orders:
+            consider(tuple(order))
+        return best
+
+    if len(attackers) > MAX_ORDERS_ATTACKERS:
+        raise ValueError(
+            f"Every order can be tried with at most {MAX_ORDERS_ATTACKERS} attackers"
+        )
+
+    def visit(order: tuple[int, ...]) -> None:
+        ply = search.ply(order)
+        # Orders that reach the same states with the same attackers left continue
+        # the same way.
+        key = frozenset(order), ply.states
+        if key in visited:
+            return
+        visited.add(key)
+
+        unused = [i for i in range(len(attackers)) if i not in order]
+        if not ply.fighting() or not unused:
+            consider(order)
+            return
+        bound = threshold()
+        if bound is not None:
+            # Each attacker kills at most the defender it attacks, and the other
+            # defenders only die during the reply if they can be killed by
+            # retaliation already.
+            _, theirs = search.sides(ply)
+            killable = search.counter_killable(ply)
+            costs = sorted(
+                (
+                    enemy.cost
+                    for enemy, counter in zip(theirs, killable, strict=True)
+                    if not counter
+                ),
+                reverse=True,
+            )
+            gain = sum(
+                enemy.cost
+                for enemy, counter in zip(theirs, killable, strict=True)
+                if counter
+            )
+            if ply.killed + gain + sum(costs[: len(unused)]) - ply.lost < bound:
+                return
+        consider(order)
+        for i in unused:
+            visit((*order, i))
+
+    visit(())
+    return best
@@ -0,0 +1,127 @@
+import gc
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from typing import Any
+
+from polycalculator import kernel
+from polycalculator.batch import UnitArrays
+from polycalculator.command import _unit_state, parse_command
+from polycalculator.encoding import NAVAL_TYPES, UNIT_TYPES
+from polycalculator.unit import _composite
+
+_warm = False
+
+
+def warm_up() -> None:
+    """
+    Do the work every process pays for before its first query.
+
+    Importing :mod:`polycalculator` parses the unit data and creates the unit
+    classes. On top of that this creates the class of every naval unit carrying
+    every land unit, fills the parser's cache of unit states, and runs the kernels
+    once, which compiles them if the ``numba`` backend is used. Finally the
+    objects created so far are moved out of the garbage collector's reach with
+    :func:`gc.freeze`, so that processes forked from this one don't write to, and
+    therefore don't copy, the memory pages holding them.
+
+    Calling it again does nothing.
+    """
+    global _warm
+    if _warm:
+        return
+
+    for naval_type in NAVAL_TYPES[1:]:
+        for land_type in UNIT_TYPES:
+            _composite(naval_type, land_type)  # type: ignore[arg-type]
+            _unit_state(land_type, naval_type, None, ())
+    for land_type in UNIT_TYPES:
+        _unit_state(land_type, None, None, ())
+
+    command = parse_command("wa, ar, kn / de, gi")
+    arrays = UnitArrays(command.defenders)
+    kernel.single_combat_arrays(UnitArrays(command.attackers[:2]), arrays)
+    kernel.multi_combat_arrays(UnitArrays(command.attackers), arrays)
+
+    gc.collect()
+    gc.freeze()
+    _warm = True
+
+
+def warm_context() -> BaseContext:
+    """
+    Get a multiprocessing context whose processes start warmed up.
+
+    The context starts processes from a fork server, a template process that
+    imports :mod:`polycalculator` and runs :func:`warm_up` once. Each new process is
+    forked from the template, so it starts in milliseconds, already warm, sharing the
+    template's memory until it writes to it. The fork server is started the first
+    time a process is.
+
+    Python has one fork server per process, and this context is the shared
+    ``"forkserver"`` context, so this sets the modules that fork server preloads for
+    every user of it. The preload only takes effect if the fork server hasn't been
+    started yet.
+
+    On platforms without fork servers, such as Windows, processes are spawned
+    instead, and they start cold. :func:`warm_pool` warms its workers up when they
+    start in that case.
+
+    Returns
+    -------
+    multiprocessing.context.BaseContext
+        The context.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")  # pragma: no cover
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["polycalculator._warm"])
+    return context
+
+
+def _warm_initializer(
+    initializer: Callable[..., object] | None, initargs: tuple[Any, ...]
+) -> None:
+    """Warm up a spawned worker, then run the pool's own initializer."""
+    warm_up()
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def warm_pool(
+    max_workers: int | None = None,
+    initializer: Callable[..., object] | None = None,
+    initargs: tuple[Any, ...] = (),
+    max_tasks_per_child: int | None = None,
+) -> ProcessPoolExecutor:
+    """
+    Create a process pool whose workers start warmed up.
+
+    Parameters
+    ----------
+    max_workers : int | None
+        The number of worker processes, or None for the number of CPUs.
+    initializer : Callable[..., object] | None
+        A function each worker calls when it starts, after it is warmed up.
+    initargs : tuple[Any, ...]
+        The arguments of ``initializer``.
+    max_tasks_per_child : int | None
+        The number of tasks after which a worker is replaced, or None to keep
+        workers for the life of the pool.
+
+    Returns
+    -------
+    ProcessPoolExecutor
+        The pool, using :func:`warm_context`.
+    """
+    context = warm_context()
+    if context.get_start_method() != "forkserver":  # pragma: no cover
+        initializer, initargs = _warm_initializer, (initializer, initargs)
+    return ProcessPoolExecutor(
+        max_workers,
+        context,
+        initializer,
+        initargs,
+        max_tasks_per_child=max_tasks_per_child,
+    )
@@ -0,0 +1,198 @@
+import mmap
+import struct
+import sys
+from collections.abc import Iterable
+from contextlib import ExitStack
+from enum import IntEnum
+from os import PathLike
+from typing import BinaryIO, Self
+
+from polycalculator.encoding import FINGERPRINT, UnitState, encode_unit
+from polycalculator.unit import Unit
+
+MAGIC = b"PCSR"
+"""The bytes every record file starts with."""
+VERSION = 1
+"""The version of the record format."""
+UNIT_FIELDS = len(UnitState._fields)
+"""The number of integers in a unit record."""
+
+_HEADER = struct.Struct(f"<4sHH{len(FINGERPRINT)}s")
+_UNIT_RECORD = struct.Struct(f"<{UNIT_FIELDS}H")
+
+
+class RecordKind(IntEnum):
+    """The kind of records in a record file."""
+
+    UNIT = 1
+    """Each record is the state of a unit."""
+    BATTLE = 2
+    """Each record is the state of an attacker followed by the state of a defender."""
+
+    @property
+    def fields(self) -> int:
+        """The number of integers in a record."""
+        return UNIT_FIELDS * self.value
+
+
+class RecordWriter:
+    """
+    Write records to a record file.
+
+    Parameters
+    ----------
+    path : str | PathLike[str]
+        The path of the record file. It is overwritten if it exists.
+    kind : RecordKind
+        The kind of records to write.
+    """
+
+    def __init__(self, path: str | PathLike[str], kind: RecordKind):
+        self.kind = kind
+        with ExitStack() as stack:
+            self._file: BinaryIO = stack.enter_context(
+                open(path, "wb", buffering=1 << 20)
+            )
+            self._file.write(_HEADER.pack(MAGIC, VERSION, kind, FINGERPRINT))
+            # The file stays open until the writer is closed.
+            self._stack = stack.pop_all()
+
+    def write_state(self, *states: UnitState) -> None:
+        """Write a record from encoded unit states."""
+        if len(states) != self.kind.value:
+            raise ValueError(f"A {self.kind.name} record needs {self.kind.value} units")
+        for state in states:
+            self._file.write(_UNIT_RECORD.pack(*state))
+
+    def write(self, *units: Unit) -> None:
+        """Write a record from units."""
+        self.write_state(*(encode_unit(unit) for unit in units))
+
+    def write_many(self, records: Iterable[tuple[Unit, ...]]) -> None:
+        """Write a record for each tuple of units."""
+        for units in records:
+            self.write(*units)
+
+    def write_raw(self, data: bytes | memoryview) -> None:
+        """
+        Write records that are already encoded, such as records from another file.
+
+        Parameters
+        ----------
+        data : bytes | memoryview
+            Whole records, in the format of this writer's kind.
+        """
+        data = memoryview(data).cast("B")
+        if len(data) % (self.kind.fields * 2):
+            raise ValueError("Data must contain whole records")
+        self._file.write(data)
+
+    def close(self) -> None:
+        """Flush the records and close the file."""
+        self._stack.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class Records:
+    """
+    The records in a record file, memory-mapped.
+
+    A record file is a header followed by records of unsigned 16-bit little-endian
+    integers. A unit record holds the four fields of a
+    :class:`~polycalculator.encoding.UnitState`, and a battle record holds an
+    attacker's unit record followed by a defender's. Records are read through
+    :attr:`view` without creating any Python objects per record, and the view is only
+    valid until the records are closed.
+
+    Parameters
+    ----------
+    path : str | PathLike[str]
+        The path of the record file.
+    """
+
+    kind: RecordKind
+    """The kind of the records."""
+    view: memoryview
+    """
+    The records as a two-dimensional view of integers.
+
+    ``view[i, j]`` is the ``j``-th integer of the ``i``-th record. For battle records,
+    the attacker's fields come first.
+    """
+
+    def __init__(self, path: str | PathLike[str]):
+        if sys.byteorder != "little":  # pragma: no cover
+            raise OSError("Record files can only be read on little-endian machines")
+
+        with open(path, "rb") as file:
+            header = file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError("Not a record file")
+            magic, version, kind, fingerprint = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError("Not a record file")
+            if version != VERSION:
+                raise ValueError(f"Unsupported record file version {version}")
+            if fingerprint != FINGERPRINT:
+                raise ValueError("Records were written with different unit data")
+            self.kind = RecordKind(kind)
+
+            file.seek(0, 2)
+            if file.tell() == _HEADER.size:
+                self._mmap = None
+                self._data = memoryview(b"")
+            else:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._data = memoryview(self._mmap)[_HEADER.size :]
+
+        fields = self.kind.fields
+        if len(self._data) % (fields * 2):
+            self.close()
+            raise ValueError("Record file is truncated")
+        if self._mmap is None:
+            # Views can't have a dimension of length 0.
+            self.view = self._data.cast("H")
+        else:
+            self.view = self._data.cast("H", (len(self._data) // (fields * 2), fields))
+
+    def __len__(self) -> int:
+        return self.view.shape[0]  # type: ignore[index]
+
+    def state(self, index: int, unit: int = 0) -> UnitState:
+        """
+        Get an encoded unit state from a record.
+
+        Parameters
+        ----------
+        index : int
+            The index of the record.
+        unit : int
+            The index of the unit in the record. For battle records, 0 is the attacker
+            and 1 is the defender.
+
+        Returns
+        -------
+        UnitState
+            The encoded state.
+        """
+        start = unit * UNIT_FIELDS
+        return UnitState(*(self.view[index, start + i] for i in range(UNIT_FIELDS)))
+
+    def close(self) -> None:
+        """Release the view and unmap the file."""
+        if hasattr(self, "view"):
+            self.view.release()
+        self._data.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
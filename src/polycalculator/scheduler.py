@@ -0,0 +1,261 @@
+import threading
+import time
+from collections.abc import Callable, Mapping
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from enum import Enum
+from functools import partial
+from typing import NamedTuple, Self, TypeVar
+
+from polycalculator.assignment import Assignment, Objective, assign_attacks
+from polycalculator.combat import MultiCombatResult, multi_combat
+from polycalculator.command import Command, parse_command
+from polycalculator.pool import warm_pool
+
+_R = TypeVar("_R")
+
+
+class QueryClass(Enum):
+    """The kind of work a query asks for."""
+
+    CALCULATE = "c"
+    """A cheap calculation of a combat, like the ``/c`` command."""
+    OPTIMIZE = "o"
+    """An expensive search for the best attacks, like the ``/o`` command."""
+
+
+class ClassLimits(NamedTuple):
+    """How much work of one :class:`QueryClass` a :class:`Scheduler` takes on."""
+
+    concurrency: int
+    """The number of queries that run at once."""
+    queue_size: int
+    """The number of queries that wait for a free slot before new ones are rejected."""
+    processes: bool = False
+    """
+    Whether the queries run in worker processes rather than threads, so they don't
+    hold the GIL while other queries run. Their functions must then be picklable.
+    The processes are started warmed up, by :func:`polycalculator.pool.warm_pool`.
+    """
+
+
+DEFAULT_LIMITS: Mapping[QueryClass, ClassLimits] = {
+    QueryClass.CALCULATE: ClassLimits(concurrency=4, queue_size=1024),
+    QueryClass.OPTIMIZE: ClassLimits(concurrency=2, queue_size=8, processes=True),
+}
+"""The limits of a :class:`Scheduler` that is given none."""
+
+
+class Overloaded(RuntimeError):
+    """A query was rejected because its queue is full."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """A query didn't finish before its deadline."""
+
+
+class Deadline:
+    """
+    The time by which a query must finish.
+
+    The deadline is kept as a :func:`time.monotonic` time, which is shared by every
+    process on the machine, so a deadline can be sent to a worker process.
+
+    Parameters
+    ----------
+    timeout : float | None
+        The number of seconds from now, or None for no deadline.
+    """
+
+    def __init__(self, timeout: float | None = None):
+        self.at = None if timeout is None else time.monotonic() + timeout
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return self.at is not None and time.monotonic() >= self.at
+
+    def check(self) -> None:
+        """
+        Abort if the deadline has passed.
+
+        Long searches call this regularly, so that they stop soon after their
+        deadline.
+
+        Raises
+        ------
+        DeadlineExceeded
+            If the deadline has passed.
+        """
+        if self.expired:
+            raise DeadlineExceeded("The deadline has passed")
+
+
+def _run(fn: Callable[[Deadline], object], deadline: Deadline) -> object:
+    # A query that waited in its queue past its deadline isn't started at all.
+    deadline.check()
+    return fn(deadline)
+
+
+def _calculate(command: Command, deadline: Deadline) -> MultiCombatResult:
+    return multi_combat(*command.units())
+
+
+def _optimize(command: Command, objective: Objective, deadline: Deadline) -> Assignment:
+    return assign_attacks(*command.units(), objective, deadline.check)
+
+
+class _Lane:
+    """The executor and queue accounting of one query class."""
+
+    def __init__(self, limits: ClassLimits):
+        if limits.concurrency <= 0:
+            raise ValueError("Concurrency must be greater than 0")
+        if limits.queue_size < 0:
+            raise ValueError("Queue size must not be negative")
+        self.limits = limits
+        self.executor: Executor = (
+            warm_pool(limits.concurrency)
+            if limits.processes
+            else ThreadPoolExecutor(limits.concurrency)
+        )
+        self.pending = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def done(self, _: Future) -> None:
+        with self.lock:
+            self.pending -= 1
+
+
+class Scheduler:
+    """
+    Run queries with separate queues and concurrency limits for each query class.
+
+    Each :class:`QueryClass` has its own workers, so expensive searches can't take
+    the slots of cheap calculations, and the latency of calculations stays the same
+    however many searches are running. A query class accepts as many queries as it
+    can run at once plus its queue size, and rejects new ones with
+    :class:`Overloaded` after that, so a burst of work is pushed back to the caller
+    rather than piling up.
+
+    Every query can have a deadline. A query still waiting when its deadline passes
+    is never started, and a running query is cancelled if it checks its
+    :class:`Deadline`, as the searches started by :meth:`optimize` do. Either way
+    its future raises :class:`DeadlineExceeded`.
+
+    Parameters
+    ----------
+    limits : Mapping[QueryClass, ClassLimits] | None
+        The limits of each query class. Classes that are left out use
+        :data:`DEFAULT_LIMITS`.
+    """
+
+    def __init__(self, limits: Mapping[QueryClass, ClassLimits] | None = None):
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._lanes = {
+            query_class: _Lane(limits[query_class]) for query_class in QueryClass
+        }
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.shutdown()
+
+    def submit(
+        self,
+        query_class: QueryClass,
+        fn: Callable[[Deadline], _R],
+        timeout: float | None = None,
+    ) -> "Future[_R]":
+        """
+        Schedule a query.
+
+        Parameters
+        ----------
+        query_class : QueryClass
+            The class of the query.
+        fn : Callable[[Deadline], _R]
+            The query, which is passed its deadline. Long queries should call
+            :meth:`Deadline.check` regularly.
+        timeout : float | None
+            The number of seconds the query has to finish, or None for no limit.
+
+        Returns
+        -------
+        Future[_R]
+            The result of the query.
+
+        Raises
+        ------
+        Overloaded
+            If the queue of the query class is full.
+        """
+        lane = self._lanes[query_class]
+        with lane.lock:
+            if lane.pending >= lane.limits.concurrency + lane.limits.queue_size:
+                lane.rejected += 1
+                raise Overloaded(f"Too many {query_class.name.lower()} queries")
+            lane.pending += 1
+        try:
+            future = lane.executor.submit(_run, fn, Deadline(timeout))
+        except BaseException:
+            lane.done(Future())
+            raise
+        future.add_done_callback(lane.done)
+        return future
+
+    def calculate(
+        self, command: str | Command, timeout: float | None = None
+    ) -> "Future[MultiCombatResult]":
+        """
+        Schedule the multi-combat of a command.
+
+        Raises
+        ------
+        polycalculator.command.CommandError
+            If the command is invalid.
+        Overloaded
+            If the queue of calculations is full.
+        """
+        if isinstance(command, str):
+            command = parse_command(command)
+        return self.submit(QueryClass.CALCULATE, partial(_calculate, command), timeout)
+
+    def optimize(
+        self,
+        command: str | Command,
+        objective: Objective = Objective.KILLS,
+        timeout: float | None = None,
+    ) -> "Future[Assignment]":
+        """
+        Schedule the search for the best attacks of a command's attackers.
+
+        The search is :func:`polycalculator.assignment.assign_attacks`, and stops as
+        soon as it notices that its deadline has passed.
+
+        Raises
+        ------
+        polycalculator.command.CommandError
+            If the command is invalid.
+        Overloaded
+            If the queue of searches is full.
+        """
+        if isinstance(command, str):
+            command = parse_command(command)
+        return self.submit(
+            QueryClass.OPTIMIZE, partial(_optimize, command, objective), timeout
+        )
+
+    def pending(self, query_class: QueryClass) -> int:
+        """Get the number of queries of a class that are queued or running."""
+        return self._lanes[query_class].pending
+
+    def rejected(self, query_class: QueryClass) -> int:
+        """Get the number of queries of a class that were rejected."""
+        return self._lanes[query_class].rejected
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers, cancelling the queries that haven't started."""
+        for lane in self._lanes.values():
+            lane.executor.shutdown(wait, cancel_futures=True)
@@ -0,0 +1,236 @@
+import hashlib
+import itertools
+from array import array
+from bisect import bisect
+from collections.abc import Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from typing import NamedTuple, Self
+
+from polycalculator.cache import MemoryCache, memoize
+from polycalculator.combat import MultiCombatResult, multi_combat
+from polycalculator.command import Command, parse_command
+from polycalculator.encoding import UnitState, decode_unit
+from polycalculator.executor import Scenario
+from polycalculator.pool import warm_context, warm_up
+
+
+def scenario_digest(
+    attackers: Sequence[UnitState], defenders: Sequence[UnitState]
+) -> int:
+    """
+    Get a stable 64-bit hash of a multi-combat scenario.
+
+    Unlike :func:`hash`, the digest is the same in every process and every run, so
+    it can be used to route a scenario to the same worker every time.
+
+    Parameters
+    ----------
+    attackers : Sequence[UnitState]
+        The encoded states of the attacking units.
+    defenders : Sequence[UnitState]
+        The encoded states of the defending units.
+
+    Returns
+    -------
+    int
+        The digest.
+    """
+    packed = array("H", [len(attackers)])
+    for state in itertools.chain(attackers, defenders):
+        packed.extend(state)
+    digest = hashlib.blake2b(packed.tobytes(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class HashRing:
+    """
+    A consistent hash ring, which maps keys to nodes.
+
+    Each node is placed on the ring at several points, and a key belongs to the node
+    at the first point after it. Adding or removing a node only moves the keys next
+    to its points, so most keys keep their node.
+
+    Parameters
+    ----------
+    nodes : int
+        The number of nodes, numbered from 0.
+    replicas : int
+        The number of points of each node on the ring. More points spread the keys
+        more evenly.
+    """
+
+    def __init__(self, nodes: int, replicas: int = 64):
+        if nodes <= 0:
+            raise ValueError("There must be at least one node")
+        points = sorted(
+            (
+                int.from_bytes(
+                    hashlib.blake2b(f"{node}:{i}".encode(), digest_size=8).digest(),
+                    "little",
+                ),
+                node,
+            )
+            for node in range(nodes)
+            for i in range(replicas)
+        )
+        self._points = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node(self, key: int) -> int:
+        """Get the node a 64-bit key belongs to."""
+        i = bisect(self._points, key)
+        return self._nodes[i if i < len(self._nodes) else 0]
+
+
+class WorkerStats(NamedTuple):
+    """The statistics of one worker of a :class:`ShardedCalculator`."""
+
+    queries: int
+    """The number of queries the worker answered."""
+    hits: int
+    """The number of queries answered from the worker's cache."""
+    cached: int
+    """The number of results in the worker's cache."""
+    size: int
+    """The estimated number of bytes the results in the worker's cache take."""
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of queries answered from the cache."""
+        return self.hits / self.queries if self.queries else 0.0
+
+
+def _evaluate(scenario: Scenario) -> MultiCombatResult:
+    attackers, defenders = scenario
+    return multi_combat(
+        [decode_unit(state) for state in attackers],
+        [decode_unit(state) for state in defenders],
+    )
+
+
+_cached_evaluate = memoize(MemoryCache("sharding"))(_evaluate)
+
+
+def _init_worker(cache_bytes: int | None) -> None:
+    """Warm up a worker process."""
+    global _cached_evaluate
+    _cached_evaluate = memoize(MemoryCache("sharding", cache_bytes))(_evaluate)
+    warm_up()
+
+
+def _calculate(scenario: Scenario) -> MultiCombatResult:
+    return _cached_evaluate(scenario)
+
+
+def _worker_stats() -> WorkerStats:
+    stats = _cached_evaluate.cache.stats()
+    return WorkerStats(stats.hits + stats.misses, stats.hits, stats.entries, stats.size)
+
+
+class ShardedCalculator:
+    """
+    Answer combat queries on several worker processes, with query affinity.
+
+    Queries are parsed by the calling process and routed by a
+    :class:`HashRing` over their :func:`scenario_digest`, so a repeated query always
+    goes to the same worker, where its result is most likely cached. Each worker is
+    a separate process with its own cache of results, so the workers don't contend
+    for a lock or for the GIL. The cache is a
+    :class:`~polycalculator.cache.MemoryCache`, which also shares the
+    :data:`~polycalculator.cache.GLOBAL_BUDGET` of its worker.
+
+    Parameters
+    ----------
+    workers : int
+        The number of worker processes.
+    cache_bytes : int | None
+        The budget of each worker's cache in bytes, or None to be bounded by the
+        shared budget only.
+    affinity : bool
+        Whether to route queries by their digest. If False, queries are sent to the
+        workers in turn, which is only useful to measure what affinity gains.
+    mp_context : multiprocessing.context.BaseContext | None
+        The context to start the workers with, or None to start them warmed up
+        with :func:`polycalculator.pool.warm_context`.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        cache_bytes: int | None = 16 << 20,
+        affinity: bool = True,
+        mp_context: BaseContext | None = None,
+    ):
+        if workers <= 0:
+            raise ValueError("There must be at least one worker")
+        if cache_bytes is not None and cache_bytes <= 0:
+            raise ValueError("Max bytes must be greater than 0")
+        self._ring = HashRing(workers)
+        self._turn = itertools.cycle(range(workers))
+        self.affinity = affinity
+        self._workers = [
+            ProcessPoolExecutor(
+                1,
+                mp_context or warm_context(),
+                initializer=_init_worker,
+                initargs=(cache_bytes,),
+            )
+            for _ in range(workers)
+        ]
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.shutdown()
+
+    @property
+    def workers(self) -> int:
+        """The number of worker processes."""
+        return len(self._workers)
+
+    def worker(self, command: Command) -> int:
+        """Get the index of the worker a parsed command is routed to."""
+        if not self.affinity:
+            return next(self._turn)
+        return self._ring.node(scenario_digest(command.attackers, command.defenders))
+
+    def submit(self, command: str | Command) -> "Future[MultiCombatResult]":
+        """
+        Start simulating the multi-combat of a command.
+
+        Parameters
+        ----------
+        command : str | Command
+            The command, or the command already parsed with
+            :func:`polycalculator.command.parse_command`.
+
+        Returns
+        -------
+        Future[MultiCombatResult]
+            The result of the multi-combat.
+
+        Raises
+        ------
+        polycalculator.command.CommandError
+            If the command is invalid.
+        """
+        if isinstance(command, str):
+            command = parse_command(command)
+        scenario = (tuple(command.attackers), tuple(command.defenders))
+        return self._workers[self.worker(command)].submit(_calculate, scenario)
+
+    def calculate(self, command: str | Command) -> MultiCombatResult:
+        """Simulate the multi-combat of a command, waiting for the result."""
+        return self.submit(command).result()
+
+    def stats(self) -> list[WorkerStats]:
+        """Get the statistics of each worker."""
+        futures = [worker.submit(_worker_stats) for worker in self._workers]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        """Stop the workers, after they finish the queries already submitted."""
+        for worker in self._workers:
+            worker.shutdown()
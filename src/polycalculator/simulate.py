@@ -0,0 +1,265 @@
+from array import array
+from enum import IntEnum
+
+from polycalculator.batch import (
+    _BOOSTED,
+    _CONVERTED,
+    _FROZEN,
+    _HEAL,
+    _POISONED,
+    _STATIC,
+    _UNIT_STATS,
+    _VETERAN,
+    UnitArrays,
+    _combat_stats,
+    _max_hp,
+)
+from polycalculator.kernel import _NAVAL, _STATS, _add_effects, _combat
+
+
+class Outcome(IntEnum):
+    """The outcome of a battle."""
+
+    ONGOING = 0
+    """Both units are still fighting."""
+    ATTACKER_WON = 1
+    """The defender is dead or converted."""
+    DEFENDER_WON = 2
+    """The attacker is dead or converted."""
+    DRAW = 3
+    """Both units are dead."""
+
+
+PROMOTION_KILLS = 3
+"""The number of kills after which a unit is promoted to a veteran."""
+HEAL_AMOUNT = 40
+"""How much HP a unit with the heal trait heals the units next to it by."""
+
+
+def _heal_amounts(healers: UnitArrays | None, battles: int) -> array:
+    """
+    Work out how much HP each unit is healed by at the start of its turns.
+
+    A unit is only healed by the unit next to it if that unit has the heal trait, is
+    alive, and isn't frozen, converted or carried by a naval unit.
+    """
+    heal = array("H", bytes(2 * battles))
+    if healers is None:
+        return heal
+    if len(healers) != battles:
+        raise ValueError("There must be as many healers as battles")
+    for i in range(battles):
+        if (
+            healers.hp[i]
+            and not healers.effects[i] & (_FROZEN | _CONVERTED)
+            and _combat_stats(healers.type_id[i], healers.naval_id[i]).traits & _HEAL
+        ):
+            heal[i] = HEAL_AMOUNT
+    return heal
+
+
+def _kill(units: UnitArrays, kills: array, i: int) -> None:
+    """Count a kill for a unit, promoting it if it has enough kills."""
+    kills[i] += 1
+    if (
+        units.hp[i]
+        and kills[i] >= PROMOTION_KILLS
+        and not units.effects[i] & _VETERAN
+        and not _UNIT_STATS[units.type_id[i]].traits & _STATIC
+    ):
+        units.effects[i] |= _VETERAN
+        units.hp[i] = _max_hp(units.type_id[i], units.effects[i])
+
+
+class Simulation:
+    """
+    Many independent battles between two units, advanced turn by turn in lockstep.
+
+    The state of every battle is held in parallel arrays. The attackers move on even
+    turns and the defenders on odd turns. On its turn, a unit:
+
+    1. Is healed by :data:`HEAL_AMOUNT`, up to its max HP, if the unit next to it
+       can heal. A poisoned unit is cured of poison instead.
+    2. Thaws instead of acting if it is frozen.
+    3. Otherwise attacks the other unit, which may retaliate. A boost is used up by
+       the attack.
+
+    A unit that kills the other unit, by attacking or retaliating, is promoted to a
+    veteran and fully healed once it has :data:`PROMOTION_KILLS` kills, unless it is
+    static. Kill counts start at 0 and can be set before the first turn.
+
+    A battle ends when either unit dies or is converted.
+
+    Parameters
+    ----------
+    attackers : UnitArrays
+        The units that move first. They are copied.
+    defenders : UnitArrays
+        The units that move second. They are copied.
+    attacker_healers : UnitArrays | None
+        The unit next to the attacker of each battle, which heals it if it has the
+        heal trait. A unit with 0 HP stands for no unit. None means no attacker has a
+        unit next to it.
+    defender_healers : UnitArrays | None
+        The unit next to the defender of each battle, like ``attacker_healers``.
+    """
+
+    attackers: UnitArrays
+    """The current states of the attackers."""
+    defenders: UnitArrays
+    """The current states of the defenders."""
+    attacker_kills: array
+    """The number of kills of each attacker."""
+    defender_kills: array
+    """The number of kills of each defender."""
+    outcomes: array
+    """The :class:`Outcome` of each battle."""
+    turn: int
+    """The number of turns simulated so far."""
+
+    def __init__(
+        self,
+        attackers: UnitArrays,
+        defenders: UnitArrays,
+        attacker_healers: UnitArrays | None = None,
+        defender_healers: UnitArrays | None = None,
+    ):
+        if len(attackers) != len(defenders):
+            raise ValueError("There must be as many attackers as defenders")
+        self.attackers = attackers.copy()
+        self.defenders = defenders.copy()
+        self.attacker_kills = array("H", bytes(2 * len(attackers)))
+        self.defender_kills = array("H", bytes(2 * len(attackers)))
+        self.outcomes = array("B", bytes(len(attackers)))
+        self.turn = 0
+        self._heal = (
+            _heal_amounts(attacker_healers, len(attackers)),
+            _heal_amounts(defender_healers, len(attackers)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def step(self) -> None:
+        """Simulate one turn of every ongoing battle."""
+        movers, targets = self.attackers, self.defenders
+        mover_kills, target_kills = self.attacker_kills, self.defender_kills
+        mover_won, target_won = Outcome.ATTACKER_WON, Outcome.DEFENDER_WON
+        if self.turn % 2:
+            movers, targets = targets, movers
+            mover_kills, target_kills = target_kills, mover_kills
+            mover_won, target_won = target_won, mover_won
+        heal = self._heal[self.turn % 2]
+        outcomes = self.outcomes
+
+        m_type, m_hp, m_effects, m_naval = (
+            movers.type_id,
+            movers.hp,
+            movers.effects,
+            movers.naval_id,
+        )
+        t_type, t_hp, t_effects, t_naval = (
+            targets.type_id,
+            targets.hp,
+            targets.effects,
+            targets.naval_id,
+        )
+
+        for i in range(len(outcomes)):
+            if outcomes[i]:
+                continue
+
+            effects = m_effects[i]
+            if heal[i]:
+                if effects & _POISONED:
+                    effects &= ~_POISONED
+                else:
+                    m_hp[i] = min(m_hp[i] + heal[i], _max_hp(m_type[i], effects))
+
+            if effects & _FROZEN:
+                m_effects[i] = effects & ~_FROZEN
+                continue
+
+            to_mover, to_target, mover_effects, target_effects = _combat(
+                m_type[i],
+                m_hp[i],
+                effects,
+                m_naval[i],
+                t_type[i],
+                t_hp[i],
+                t_effects[i],
+                t_naval[i],
+                _STATS,
+                _NAVAL,
+            )
+            m_hp[i] = max(m_hp[i] - to_mover, 0)
+            t_hp[i] = max(t_hp[i] - to_target, 0)
+            m_effects[i] = _add_effects(
+                m_type[i], effects & ~_BOOSTED, mover_effects, _STATS
+            )
+            t_effects[i] = _add_effects(t_type[i], t_effects[i], target_effects, _STATS)
+
+            if not t_hp[i]:
+                _kill(movers, mover_kills, i)
+            if not m_hp[i]:
+                _kill(targets, target_kills, i)
+
+            mover_out = not m_hp[i] or m_effects[i] & _CONVERTED
+            target_out = not t_hp[i] or t_effects[i] & _CONVERTED
+            if mover_out and target_out:
+                outcomes[i] = Outcome.DRAW
+            elif target_out:
+                outcomes[i] = mover_won
+            elif mover_out:
+                outcomes[i] = target_won
+
+        self.turn += 1
+
+    def run(self, turns: int) -> None:
+        """
+        Simulate several turns of every ongoing battle.
+
+        Parameters
+        ----------
+        turns : int
+            The number of turns. Each side moving once counts as two turns.
+        """
+        for _ in range(turns):
+            self.step()
+
+
+def simulate(
+    attackers: UnitArrays,
+    defenders: UnitArrays,
+    turns: int,
+    attacker_healers: UnitArrays | None = None,
+    defender_healers: UnitArrays | None = None,
+) -> Simulation:
+    """
+    Simulate many battles between pairs of units for several turns.
+
+    See :class:`Simulation` for the rules of each turn.
+
+    Parameters
+    ----------
+    attackers : UnitArrays
+        The units that move first.
+    defenders : UnitArrays
+        The units that move second.
+    turns : int
+        The number of turns. Each side moving once counts as two turns.
+    attacker_healers : UnitArrays | None
+        The unit next to the attacker of each battle, which heals it if it has the
+        heal trait. A unit with 0 HP stands for no unit. None means no attacker has a
+        unit next to it.
+    defender_healers : UnitArrays | None
+        The unit next to the defender of each battle, like ``attacker_healers``.
+
+    Returns
+    -------
+    Simulation
+        The simulation after the given number of turns.
+    """
+    simulation = Simulation(attackers, defenders, attacker_healers, defender_healers)
+    simulation.run(turns)
+    return simulation
@@ -0,0 +1,339 @@
+import copy
+from collections.abc import Callable, Iterable, Sequence
+from typing import NamedTuple
+
+from polycalculator.combat import (
+    CombatResult,
+    _calculate_attacker_damage,
+    _combat_rules,
+    _Tentacles,
+    multi_combat,
+    single_combat,
+)
+from polycalculator.events import Hit, battle_events
+from polycalculator.unit import Unit
+
+
+class Breakpoints(NamedTuple):
+    """
+    The attacker HP values at which the outcome of a combat flips.
+
+    Each value ``hp`` is an attacker HP where the outcome differs from the outcome at
+    ``hp - 1``, with the outcome at 0 HP taken as ``False``. For most matchups the
+    outcomes only ever flip once, so the first value is the minimum HP required.
+    """
+
+    kill: tuple[int, ...]
+    """The attacker HP values at which killing the defender starts or stops."""
+    survive: tuple[int, ...]
+    """The attacker HP values at which surviving the combat starts or stops."""
+
+
+def _with_hp(unit: Unit, hp: int) -> Unit:
+    """Copy a unit, giving the copy a different current HP."""
+    probe = copy.deepcopy(unit)
+    probe.current_hp = hp
+    return probe
+
+
+def _first_flip(outcome: Callable[[int], bool], lo: int, hi: int) -> int:
+    """
+    Find the first HP in ``(lo, hi]`` where a monotonic outcome differs from ``lo``.
+
+    The outcome at ``hi`` must differ from the outcome at ``lo``.
+    """
+    start = outcome(lo)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if outcome(mid) == start:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def _segments(step: Callable[[int], int], lo: int, hi: int) -> list[tuple[int, int]]:
+    """Split ``[lo, hi]`` into ranges where a monotonic step function is constant."""
+    segments: list[tuple[int, int]] = []
+    while lo <= hi:
+        value = step(lo)
+        if step(hi) == value:
+            end = hi
+        else:
+            end = _first_flip(lambda hp, value=value: step(hp) == value, lo, hi) - 1
+        segments.append((lo, end))
+        lo = end + 1
+    return segments
+
+
+def _tentacle_step(attacker: Unit, defender: Unit) -> Callable[[int], int] | None:
+    """
+    Get the tentacle damage the attacker takes at a given HP, if it takes any.
+
+    Tentacle damage is subtracted from the attacker's HP before it attacks, so an
+    attacker with more HP can end up weaker. The combat outcome is only monotonic
+    in the attacker's HP while the tentacle damage stays the same.
+    """
+    if _combat_rules(attacker, defender).tentacles != _Tentacles.DAMAGE:
+        return None
+
+    def step(hp: int) -> int:
+        return _calculate_attacker_damage(
+            attacker.attack,
+            hp / attacker.max_hp,
+            defender.defense,
+            defender.health_ratio,
+            defender.defense_bonus,
+        )
+
+    return step
+
+
+def _hp_segments(attacker: Unit, defender: Unit) -> list[tuple[int, int]]:
+    """Split the attacker's HP range into ranges with monotonic combat outcomes."""
+    step = _tentacle_step(attacker, defender)
+    if step is None:
+        return [(1, attacker.max_hp)]
+    return _segments(step, 1, attacker.max_hp)
+
+
+def _defender_hp_segments(
+    attackers: Sequence[Unit], defender: Unit
+) -> list[tuple[int, int]]:
+    """
+    Split the defender's HP range into ranges with monotonic multi-combat outcomes.
+
+    A defender with tentacles hits each attacker harder the more HP it has left, so
+    the outcome is only monotonic in the defender's HP while the tentacle damage each
+    attacker takes stays the same. The ranges are split attacker by attacker, as the
+    HP the defender has left for an attacker only grows with its starting HP while
+    the attackers before it take the same tentacle damage.
+    """
+    segments = [(1, defender.max_hp)]
+    for i, attacker in enumerate(attackers):
+        if _combat_rules(attacker, defender).tentacles != _Tentacles.DAMAGE:
+            continue
+
+        def step(hp: int, i: int = i, attacker: Unit = attacker) -> int:
+            probe = _with_hp(defender, hp)
+            multi_combat(copy.deepcopy(list(attackers[:i])), [probe])
+            if probe.current_hp <= 0:
+                return 0
+            return _calculate_attacker_damage(
+                attacker.attack,
+                attacker.health_ratio,
+                probe.defense,
+                probe.health_ratio,
+                probe.defense_bonus,
+            )
+
+        segments = [
+            segment for lo, hi in segments for segment in _segments(step, lo, hi)
+        ]
+    return segments
+
+
+def _flips(
+    outcome: Callable[[int], bool], segments: Iterable[tuple[int, int]]
+) -> tuple[int, ...]:
+    """Find every HP where an outcome that is monotonic per segment flips."""
+    flips: list[int] = []
+    previous = False
+    for lo, hi in segments:
+        first = outcome(lo)
+        if first != previous:
+            flips.append(lo)
+        last = outcome(hi)
+        if last != first:
+            flips.append(_first_flip(outcome, lo, hi))
+        previous = last
+    return tuple(flips)
+
+
+def find_breakpoints(attacker: Unit, defender: Unit) -> Breakpoints:
+    """
+    Find the attacker HP values at which the outcome of a combat flips.
+
+    Instead of simulating every HP value, this bisects over the attacker's HP, relying
+    on the damage dealt growing and the retaliation taken shrinking as the attacker's
+    HP increases. Only the attacker's HP is varied; its maximum HP, status effects and
+    the defender are used as given.
+
+    Parameters
+    ----------
+    attacker : Unit
+        The attacking unit.
+    defender : Unit
+        The defending unit.
+
+    Returns
+    -------
+    Breakpoints
+        The attacker HP values at which killing the defender and surviving the combat
+        flip.
+    """
+    results: dict[int, CombatResult] = {}
+
+    def probe(hp: int) -> CombatResult:
+        if hp not in results:
+            results[hp] = single_combat(_with_hp(attacker, hp), defender)
+        return results[hp]
+
+    def kills(hp: int) -> bool:
+        return probe(hp).damage.to_defender >= defender.current_hp
+
+    def survives(hp: int) -> bool:
+        return probe(hp).damage.to_attacker < hp
+
+    segments = _hp_segments(attacker, defender)
+    return Breakpoints(_flips(kills, segments), _flips(survives, segments))
+
+
+def breakpoint_table(
+    attackers: Iterable[Unit], defenders: Iterable[Unit]
+) -> list[list[Breakpoints]]:
+    """
+    Find the breakpoints for every pairing of attackers and defenders.
+
+    Parameters
+    ----------
+    attackers : Iterable[Unit]
+        The attacking units.
+    defenders : Iterable[Unit]
+        The defending units.
+
+    Returns
+    -------
+    list[list[Breakpoints]]
+        The breakpoints, indexed by attacker and then by defender.
+    """
+    defenders = list(defenders)
+    return [
+        [find_breakpoints(attacker, defender) for defender in defenders]
+        for attacker in attackers
+    ]
+
+
+def _kills_all(attackers: Iterable[Unit], defenders: list[Unit]) -> bool:
+    """
+    Check whether the attackers kill every defender, without mutating either.
+
+    Each attacker attacks at most one defender, so the battle is given up as soon as
+    fewer attackers are left than defenders still alive.
+    """
+    attackers = copy.deepcopy(list(attackers))
+    defenders = copy.deepcopy(defenders)
+    for event in battle_events(attackers, defenders):
+        if isinstance(event, Hit):
+            left = len(attackers) - event.attacker - 1
+            alive = sum(d.current_hp > 0 for d in defenders[event.defender :])
+            if left < alive:
+                return False
+    return all(defender.current_hp <= 0 for defender in defenders)
+
+
+def _advance(
+    attackers: Iterable[Unit], defenders: list[Unit]
+) -> tuple[int, list[Unit]]:
+    """
+    Run attackers against defenders in order until every defender is dead.
+
+    Returns
+    -------
+    tuple[int, list[Unit]]
+        The number of attackers used and copies of the defenders still alive.
+    """
+    remaining = copy.deepcopy(defenders)
+    used = 0
+    for attacker in attackers:
+        if not remaining:
+            break
+        multi_combat((copy.deepcopy(attacker),), remaining[:1])
+        if remaining[0].current_hp <= 0:
+            remaining.pop(0)
+        used += 1
+    return used, remaining
+
+
+def min_attacker_hp(
+    attackers: Sequence[Unit], defenders: Sequence[Unit], index: int
+) -> int | None:
+    """
+    Find the minimum HP an attacker needs for a multi-combat to kill every defender.
+
+    The attackers before ``index`` are simulated once, and every probe of the
+    attacker's HP resumes from the defenders they leave behind.
+
+    Parameters
+    ----------
+    attackers : Sequence[Unit]
+        The attacking units, in order of attack.
+    defenders : Sequence[Unit]
+        The defending units.
+    index : int
+        The index of the attacker whose HP is searched over.
+
+    Returns
+    -------
+    int | None
+        The minimum HP, or None if no HP up to the attacker's max HP kills every
+        defender.
+    """
+    attacker = attackers[index]
+    rest = attackers[index + 1 :]
+    _, remaining = _advance(attackers[:index], list(defenders))
+    if not remaining:
+        return 1
+
+    def kills_all(hp: int) -> bool:
+        return _kills_all((_with_hp(attacker, hp), *rest), remaining)
+
+    for lo, hi in _hp_segments(attacker, remaining[0]):
+        if kills_all(lo):
+            return lo
+        if kills_all(hi):
+            return _first_flip(kills_all, lo, hi)
+    return None
+
+
+def max_defender_hp(
+    attackers: Sequence[Unit], defenders: Sequence[Unit], index: int
+) -> int | None:
+    """
+    Find the maximum HP a defender can have for a multi-combat to kill every defender.
+
+    The defenders before ``index`` are fought once, and every probe of the defender's
+    HP resumes with the attackers they leave unused. The defender's HP is searched
+    from the top of each range where the tentacle damage it deals stays the same.
+
+    Parameters
+    ----------
+    attackers : Sequence[Unit]
+        The attacking units, in order of attack.
+    defenders : Sequence[Unit]
+        The defending units.
+    index : int
+        The index of the defender whose HP is searched over.
+
+    Returns
+    -------
+    int | None
+        The maximum HP, or None if the attackers cannot kill every defender even
+        when it has 1 HP.
+    """
+    defender = defenders[index]
+    rest = list(defenders[index + 1 :])
+    used, remaining = _advance(attackers, list(defenders[:index]))
+    if remaining:
+        return None
+    unused = attackers[used:]
+
+    def kills_all(hp: int) -> bool:
+        return _kills_all(unused, [_with_hp(defender, hp), *rest])
+
+    for lo, hi in reversed(_defender_hp_segments(unused, defender)):
+        if kills_all(hi):
+            return hi
+        if kills_all(lo):
+            return _first_flip(kills_all, lo, hi) - 1
+    return None
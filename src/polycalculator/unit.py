@@ -1,8 +1,10 @@
+import copyreg
 import re
+import threading
 from abc import ABC, abstractmethod
 from collections.abc import Iterable
 from importlib import resources
-from typing import TypedDict
+from typing import ClassVar, Self, TypedDict
 
 import yaml
 
@@ -62,11 +64,16 @@ class Unit(ABC):
     @abstractmethod
     def _base_max_hp(self) -> int: ...
 
+    @property
+    def _state_traits(self) -> frozenset[Trait]:
+        """The traits that limit which status effects the unit can have."""
+        return self.traits
+
     @property
     def max_hp(self) -> int:
         if (
             StatusEffect.VETERAN in self._status_effects
-            and Trait.STATIC not in self.traits
+            and Trait.STATIC not in self._state_traits
         ):
             return self._base_max_hp + 50
         return self._base_max_hp
@@ -114,7 +121,7 @@ class Unit(ABC):
         return self._status_effects
 
     def add_status_effect(self, effect: StatusEffect) -> None:
-        if effect == StatusEffect.VETERAN and Trait.STATIC in self.traits:
+        if effect == StatusEffect.VETERAN and Trait.STATIC in self._state_traits:
             return
 
         if effect == StatusEffect.POISONED:
@@ -130,10 +137,10 @@ class Unit(ABC):
         if effect == StatusEffect.WALLED:
             self._status_effects.discard(StatusEffect.FORTIFIED)
 
-        if effect == StatusEffect.SPLASHING and Trait.SPLASH not in self.traits:
+        if effect == StatusEffect.SPLASHING and Trait.SPLASH not in self._state_traits:
             return
 
-        if effect == StatusEffect.EXPLODING and Trait.EXPLODE not in self.traits:
+        if effect == StatusEffect.EXPLODING and Trait.EXPLODE not in self._state_traits:
             return
 
         self._status_effects.add(effect)
@@ -158,6 +165,14 @@ class Unit(ABC):
     def __eq__(self, value: object) -> bool:
         return isinstance(value, self.__class__) and self.__dict__ == value.__dict__
 
+    def __reduce__(self) -> tuple[object, ...]:
+        # Units pickle as their encoded state, which is much smaller than their class
+        # and attributes. The encoding is built on this module, so it can't be
+        # imported before now.
+        from polycalculator.encoding import _reduce_unit
+
+        return _reduce_unit(self) or (copyreg.__newobj__, (type(self),), self.__dict__)
+
 
 def _change_name(name: str) -> str:
     """Change a string from CamelCase to normal case."""
@@ -201,6 +216,8 @@ def _create_unit_class(
         def traits(self) -> frozenset[Trait]:
             return _traits
 
+        _state_traits = _traits
+
     _Unit.__name__ = name
     _Unit.__doc__ = f"Represents a {_change_name(name)} unit."
     _Unit.__module__ = Unit.__module__
@@ -252,38 +269,97 @@ Segment = _UnitRegistry["Segment"]
 
 
 class NavalUnit(Unit):
-    """Base class for all naval units."""
+    """
+    Base class for all naval units.
+
+    A naval unit is created from the land unit it carries, e.g. ``Raft(Warrior())``,
+    and takes a copy of its current HP and status effects. There is a naval class
+    for each combination of naval and land class, so the combined stats are
+    resolved once rather than on every access. Each one is created the first time
+    the combination is used.
+    """
+
+    _naval_type: "type[NavalUnit]"
+    """The naval class, without the land class."""
+    _land_type: type[Unit]
+    """The class of the carried land unit."""
+    _composites: "ClassVar[dict[type[Unit], type[NavalUnit]]]"
+    """The naval class for each land class that has been used."""
+
+    def __new__(cls, unit: Unit | None = None) -> Self:
+        if unit is None:
+            # Copying and unpickling create an instance of the combined class itself.
+            land_type = getattr(cls, "_land_type", DefaultWarrior)
+        else:
+            land_type = type(unit)
+        return super().__new__(_composite(cls._naval_type, land_type))
 
     def __init__(self, unit: Unit | None = None):
         if unit is None:
-            unit = DefaultWarrior()
-        self._unit = unit
+            unit = self._land_type()
+        self._status_effects = set(unit.status_effects)
+        self._current_hp = unit._current_hp
 
     @property
-    def max_hp(self) -> int:
-        return self._unit.max_hp
+    def unit(self) -> Unit:
+        """A copy of the carried land unit."""
+        unit = self._land_type()
+        unit._status_effects = set(self._status_effects)
+        unit._current_hp = self._current_hp
+        return unit
+
+    def __reduce__(self) -> tuple[object, ...]:
+        from polycalculator.encoding import _reduce_unit
+
+        return _reduce_unit(self) or (
+            _new_naval_unit,
+            (self._naval_type, self._land_type),
+            self.__dict__,
+        )
 
-    @property
-    def current_hp(self) -> int:
-        return self._unit.current_hp
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(cost={self.cost}, current_hp={self.current_hp}, max_hp={self.max_hp}, attack={self.attack}, defense={self.defense}, range={self.range}, traits={self.traits}, status_effects={self._status_effects}, unit={self.unit!r})"
 
-    @current_hp.setter
-    def current_hp(self, value: int) -> None:
-        self._unit.current_hp = value
 
-    @property
-    def status_effects(self) -> set[StatusEffect]:
-        return self._unit.status_effects
+_composites_lock = threading.Lock()
+"""Held while creating a composite class, so each is only created once."""
 
-    def add_status_effect(self, effect: StatusEffect) -> None:
-        self._unit.add_status_effect(effect)
 
-    @property
-    def defense_bonus(self) -> float:
-        return self._unit.defense_bonus
+def _composite(naval_type: type[NavalUnit], land_type: type[Unit]) -> type[NavalUnit]:
+    """Get the naval class carrying a land class, creating it if needed."""
+    composite = naval_type._composites.get(land_type)
+    if composite is not None:
+        return composite
+
+    with _composites_lock:
+        composite = naval_type._composites.get(land_type)
+        if composite is None:
+            composite = _create_composite(naval_type, land_type)
+            naval_type._composites[land_type] = composite
+    return composite
+
+
+def _create_composite(
+    naval_type: type[NavalUnit], land_type: type[Unit]
+) -> type[NavalUnit]:
+    land_unit = land_type()
+
+    class _Composite(naval_type):  # type: ignore[misc, valid-type]
+        _land_type = land_type
+        cost = naval_type._naval_cost + land_unit.cost  # type: ignore[attr-defined]
+        _base_max_hp = land_unit._base_max_hp
+        _state_traits = land_unit._state_traits
+
+    _Composite.__name__ = naval_type.__name__
+    _Composite.__doc__ = naval_type.__doc__
+    _Composite.__module__ = naval_type.__module__
+    _Composite.__qualname__ = naval_type.__qualname__
+    return _Composite
 
-    def __repr__(self) -> str:
-        return f"{self.__class__.__name__}(cost={self.cost}, current_hp={self.current_hp}, max_hp={self.max_hp}, attack={self.attack}, defense={self.defense}, range={self.range}, traits={self.traits}, status_effects={self._unit.status_effects}, _unit={repr(self._unit)})"
+
+def _new_naval_unit(naval_type: type[NavalUnit], land_type: type[Unit]) -> NavalUnit:
+    """Create an uninitialized naval unit, for unpickling."""
+    return object.__new__(_composite(naval_type, land_type))
 
 
 def _create_naval_unit_class(
@@ -297,14 +373,11 @@ def _create_naval_unit_class(
 ):
     _traits = frozenset(Trait(trait) for trait in traits)
 
-    class _NavalUnit(NavalUnit):
-        @property
-        def cost(self) -> int:
-            return cost + self._unit.cost
+    naval_cost = cost
 
-        @property
-        def _base_max_hp(self) -> int:  # pragma: no cover
-            return self._unit.max_hp
+    class _NavalUnit(NavalUnit):
+        _naval_cost = naval_cost
+        _composites: ClassVar[dict[type[Unit], type[NavalUnit]]] = {}
 
         @property
         def attack(self) -> int:
@@ -322,6 +395,7 @@ def _create_naval_unit_class(
         def traits(self) -> frozenset[Trait]:
             return _traits
 
+    _NavalUnit._naval_type = _NavalUnit
     _NavalUnit.__name__ = name
     _NavalUnit.__doc__ = f"Represents a {_change_name(name)} unit."
     _NavalUnit.__module__ = NavalUnit.__module__
@@ -340,7 +414,6 @@ Scout = _NavalUnitRegistry["Scout"]
 Rammer = _NavalUnitRegistry["Rammer"]
 Bomber = _NavalUnitRegistry["Bomber"]
 
-
 # region Build maps
 # no cover: start
 _ABBR_OVERRIDES: dict[str, str] = yaml.safe_load(
@@ -0,0 +1,99 @@
+import copy
+import itertools
+import random
+
+import pytest
+
+from polycalculator import assignment, batch, combat, fuzz, unit
+from polycalculator.status_effect import StatusEffect
+
+
+def evaluate(
+    attackers: list[unit.Unit],
+    defenders: list[unit.Unit],
+    attacks: list[tuple[int, int]],
+) -> tuple[int, int, int] | None:
+    """Simulate attacks with multi_combat, or None if they aren't all possible."""
+    defenders = copy.deepcopy(defenders)
+    kills = losses = damage_taken = 0
+    for k, defender in enumerate(defenders):
+        alive = defender.current_hp > 0 and StatusEffect.CONVERTED not in (
+            defender.status_effects
+        )
+        for i in (i for i, target in attacks if target == k):
+            if defender.current_hp <= 0 or StatusEffect.CONVERTED in (
+                defender.status_effects
+            ):
+                return None
+            result = combat.multi_combat([attackers[i]], [defender])
+            damage = result.attackers[0].damage
+            damage_taken += damage
+            losses += damage >= attackers[i].current_hp
+        kills += alive and (
+            defender.current_hp <= 0
+            or StatusEffect.CONVERTED in defender.status_effects
+        )
+    return kills, losses, damage_taken
+
+
+def random_units(rng: random.Random, n: int) -> list[unit.Unit]:
+    return batch.UnitArrays(fuzz.random_state(rng) for _ in range(n)).units()
+
+
+def test_assign_attacks_matches_multi_combat():
+    rng = random.Random(0)
+    for _ in range(5):
+        attackers = random_units(rng, 6)
+        defenders = random_units(rng, 3)
+        result = assignment.assign_attacks(attackers, defenders)
+        assert evaluate(attackers, defenders, result.attacks) == (
+            result.kills,
+            result.losses,
+            result.damage_taken,
+        )
+        assert len({i for i, _ in result.attacks}) == len(result.attacks)
+
+
+@pytest.mark.parametrize("objective", list(assignment.Objective))
+def test_assign_attacks_is_optimal(objective: assignment.Objective):
+    rng = random.Random(1)
+    for _ in range(10):
+        attackers = random_units(rng, 3)
+        defenders = random_units(rng, 2)
+        result = assignment.assign_attacks(attackers, defenders, objective)
+
+        best = None
+        for targets in itertools.product(range(-1, 2), repeat=3):
+            for order in itertools.permutations(range(3)):
+                attacks = [(i, targets[i]) for i in order if targets[i] >= 0]
+                outcome = evaluate(attackers, defenders, attacks)
+                if outcome is None:
+                    continue
+                kills, losses, damage_taken = outcome
+                if objective is assignment.Objective.KILLS:
+                    key = (kills, -losses, -damage_taken, -len(attacks))
+                else:
+                    key = (-losses, kills, -damage_taken, -len(attacks))
+                best = key if best is None else max(best, key)
+
+        kills, losses, damage_taken = result.kills, result.losses, result.damage_taken
+        if objective is assignment.Objective.KILLS:
+            key = (kills, -losses, -damage_taken, -len(result.attacks))
+        else:
+            key = (-losses, kills, -damage_taken, -len(result.attacks))
+        assert key == best
+
+
+def test_assign_attacks_kills():
+    attackers = [unit.Warrior(), unit.Archer(), unit.Catapult(), unit.Knight()]
+    defenders = [unit.Warrior(30), unit.Defender(40)]
+    result = assignment.assign_attacks(attackers, defenders)
+    assert result.kills == 2
+    assert result.losses == 0
+
+
+def test_assign_attacks_too_many_attackers():
+    with pytest.raises(ValueError, match="at most"):
+        assignment.assign_attacks(
+            [unit.Warrior()] * (assignment.MAX_ATTACKERS + 1), [unit.Warrior()]
+        )
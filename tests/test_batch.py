@@ -0,0 +1,109 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from polycalculator import batch, combat, encoding, records, unit
+from polycalculator.status_effect import StatusEffect
+
+
+def random_unit(rng: random.Random) -> unit.Unit:
+    u = rng.choice(list(unit._UnitRegistry.values()))(
+        status_effects=rng.sample(list(StatusEffect), rng.randint(0, 3))
+    )
+    u.current_hp = rng.randint(1, u.max_hp)
+    if rng.random() < 0.2:
+        u = rng.choice(list(unit._NavalUnitRegistry.values()))(u)
+    return u
+
+
+@pytest.fixture(scope="module")
+def pairs() -> list[tuple[unit.Unit, unit.Unit]]:
+    rng = random.Random(0)
+    return [(random_unit(rng), random_unit(rng)) for _ in range(2000)]
+
+
+def test_single_combat_arrays(pairs: list[tuple[unit.Unit, unit.Unit]]):
+    attackers = batch.UnitArrays.from_units(a for a, _ in pairs)
+    defenders = batch.UnitArrays.from_units(d for _, d in pairs)
+    results = batch.single_combat_arrays(attackers, defenders)
+    assert len(results.to_attacker) == len(pairs)
+    for i, (attacker, defender) in enumerate(pairs):
+        expected = combat.single_combat(attacker, defender)
+        assert results.to_attacker[i] == expected.damage.to_attacker
+        assert results.to_defender[i] == expected.damage.to_defender
+        assert encoding.mask_to_effects(results.attacker_effects[i]) == (
+            expected.status_effects.to_attacker
+        )
+        assert encoding.mask_to_effects(results.defender_effects[i]) == (
+            expected.status_effects.to_defender
+        )
+
+
+def test_single_combat_arrays_length():
+    with pytest.raises(ValueError, match="as many attackers as defenders"):
+        batch.single_combat_arrays(
+            batch.UnitArrays.from_units([unit.Warrior()]), batch.UnitArrays()
+        )
+
+
+def test_unit_arrays():
+    units = [unit.Warrior(), unit.Raft(unit.Archer(40))]
+    arrays = batch.UnitArrays.from_units(units)
+    assert len(arrays) == 2
+    assert arrays.state(1) == encoding.encode_unit(units[1])
+    assert arrays.units() == [
+        encoding.decode_unit(encoding.encode_unit(u)) for u in units
+    ]
+
+    copy = arrays.copy()
+    copy.hp[0] = 10
+    assert arrays.hp[0] == 100
+
+
+def test_from_records(tmp_path: Path):
+    battles = [(unit.Warrior(), unit.Knight(50)), (unit.Raft(), unit.Jelly())]
+    with records.RecordWriter(tmp_path / "battles", records.RecordKind.BATTLE) as w:
+        w.write_many(battles)
+
+    with records.Records(tmp_path / "battles") as r:
+        attackers = batch.UnitArrays.from_records(r, 0)
+        defenders = batch.UnitArrays.from_records(r, 1)
+        tail = batch.UnitArrays.from_records(r, 1, start=1)
+        empty = batch.UnitArrays.from_records(r, 0, 1, 1)
+    assert tail.state(0) == defenders.state(1)
+    assert len(tail) == 1
+    assert len(empty) == 0
+    assert [attackers.state(i) for i in range(2)] == [
+        encoding.encode_unit(a) for a, _ in battles
+    ]
+    assert [defenders.state(i) for i in range(2)] == [
+        encoding.encode_unit(d) for _, d in battles
+    ]
+
+
+def test_single_combat_arrays_dedup(pairs: list[tuple[unit.Unit, unit.Unit]]):
+    repeated = pairs[:50] * 20 + pairs[:10]
+    attackers = batch.UnitArrays.from_units(a for a, _ in repeated)
+    defenders = batch.UnitArrays.from_units(d for _, d in repeated)
+
+    results, stats = batch.single_combat_arrays_dedup(attackers, defenders)
+    assert results == batch.single_combat_arrays(attackers, defenders)
+    assert stats == batch.DedupStats(1010, 50)
+    assert stats.duplicates == 960
+    assert stats.ratio == 20.2
+
+
+def test_scenario_key():
+    warrior = encoding.encode_unit(unit.Warrior())
+    weak = encoding.encode_unit(unit.Warrior(5))
+    raft = encoding.encode_unit(unit.Raft())
+    keys = {
+        batch.scenario_key(a, d)
+        for a in (warrior, weak, raft)
+        for d in (warrior, weak, raft)
+    }
+    assert len(keys) == 9
+    assert batch.scenario_key(warrior, raft) == batch.scenario_key(
+        encoding.encode_unit(unit.Warrior()), encoding.encode_unit(unit.Raft())
+    )
@@ -0,0 +1,184 @@
+import gc
+from pathlib import Path
+
+import pytest
+
+from polycalculator import cache, combat, command, composition, sharding, unit
+
+
+def test_single_combat(tmp_path: Path):
+    with cache.PersistentCache(tmp_path / "cache.db") as c:
+        expected = combat.single_combat(unit.Warrior(), unit.Kiton())
+        assert c.single_combat(unit.Warrior(), unit.Kiton()) == expected
+        assert len(c) == 1
+        assert c.single_combat(unit.Warrior(), unit.Kiton()) == expected
+        assert len(c) == 1
+
+
+def test_multi_combat_applies_damage(tmp_path: Path):
+    with cache.PersistentCache(tmp_path / "cache.db") as c:
+        attackers = [unit.Phychi(), unit.Warrior(), unit.Warrior()]
+        expected_defenders = [unit.Warrior(), unit.Warrior()]
+        expected = combat.multi_combat(attackers, expected_defenders)
+
+        for _ in range(2):
+            defenders = [unit.Warrior(), unit.Warrior()]
+            assert c.multi_combat(attackers, defenders) == expected
+            assert defenders == expected_defenders
+        assert len(c) == 1
+
+
+def test_persists(tmp_path: Path):
+    with cache.PersistentCache(tmp_path / "cache.db") as c:
+        c.single_combat(unit.Warrior(), unit.Warrior())
+    with cache.PersistentCache(tmp_path / "cache.db") as c:
+        assert len(c) == 1
+
+
+def test_shared(tmp_path: Path):
+    with (
+        cache.PersistentCache(tmp_path / "cache.db") as c1,
+        cache.PersistentCache(tmp_path / "cache.db") as c2,
+    ):
+        c1.set(b"key", b"value")
+        assert c2.get(b"key") == b"value"
+
+
+def test_eviction(tmp_path: Path):
+    with cache.PersistentCache(tmp_path / "cache.db", max_entries=10) as c:
+        for i in range(25):
+            c.set(bytes([i]), b"value")
+        assert len(c) <= 10
+        assert c.get(bytes([24])) == b"value"
+        assert c.get(bytes([0])) is None
+
+
+def test_fingerprint_mismatch(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    with cache.PersistentCache(tmp_path / "cache.db") as c:
+        c.set(b"key", b"value")
+    monkeypatch.setattr(cache, "FINGERPRINT", b"other")
+    with cache.PersistentCache(tmp_path / "cache.db") as c:
+        assert c.get(b"key") is None
+        assert len(c) == 0
+
+
+def entry_size(key: object, value: object) -> int:
+    return cache.sizeof(key) + cache.sizeof(value) + cache._ENTRY_OVERHEAD
+
+
+def test_sizeof():
+    assert cache.sizeof((1, 2)) > cache.sizeof((1,)) > cache.sizeof(())
+    assert cache.sizeof({"a": [1, 2]}) > cache.sizeof({"a": []})
+    # Unit classes are shared with the rest of the program.
+    assert cache.sizeof(unit.Warrior) == 8
+
+
+def test_memory_cache_evicts_least_recently_used():
+    size = entry_size(0, b"x" * 10)
+    c = cache.MemoryCache("test", 3 * size, cache.MemoryBudget())
+    for key in range(3):
+        c.set(key, b"x" * 10)
+    assert c.get(0) == b"x" * 10
+    c.set(3, b"x" * 10)
+
+    assert 1 not in c
+    assert [key in c for key in (0, 2, 3)] == [True, True, True]
+    assert c.size == c.budget.size == 3 * size
+    stats = c.stats()
+    assert (stats.entries, stats.hits, stats.misses, stats.evictions) == (3, 1, 0, 1)
+    assert c.get(1) is None
+    assert c.stats().hit_rate == 0.5
+
+    c.set(4, b"x" * 4 * size)
+    assert 4 not in c
+    c.clear()
+    assert len(c) == c.size == c.budget.size == 0
+
+
+def test_memory_budget_is_shared():
+    size = entry_size(0, 0)
+    budget = cache.MemoryBudget(3 * size)
+    first = cache.MemoryCache("first", budget=budget)
+    second = cache.MemoryCache("second", budget=budget)
+    first.set(0, 0)
+    second.set(0, 0)
+    first.set(1, 0)
+    first.get(0)
+    second.set(1, 0)
+
+    # The least recently used entry of either cache is evicted.
+    assert 0 not in second
+    assert [len(first), len(second)] == [2, 1]
+    assert [stats.evictions for stats in budget.stats()] == [0, 1]
+
+    budget.max_bytes = size
+    assert [len(first), len(second)] == [0, 1]
+    with pytest.raises(ValueError, match="greater than 0"):
+        budget.max_bytes = 0
+
+
+def test_memory_budget_drops_unused_caches():
+    budget = cache.MemoryBudget()
+    kept = cache.MemoryCache("kept", budget=budget)
+    dropped = cache.MemoryCache("dropped", budget=budget)
+    kept.set(0, 0)
+    dropped.set(0, 0)
+    del dropped
+    gc.collect()
+
+    assert [stats.name for stats in budget.stats()] == ["kept"]
+    assert budget.size == kept.size
+
+
+def test_memoize():
+    calls = []
+
+    @cache.memoize(cache.MemoryCache("square", budget=cache.MemoryBudget()))
+    def square(x: int) -> int:
+        calls.append(x)
+        return x * x
+
+    assert [square(2), square(3), square(2)] == [4, 9, 4]
+    assert calls == [2, 3]
+    assert square.cache.stats().hits == 1
+
+    # Keyword arguments aren't part of the key, so they are rejected.
+    with pytest.raises(TypeError, match="keyword argument"):
+        square(x=2)
+    assert calls == [2, 3]
+
+
+def test_memory_cache_single_combat():
+    c = cache.MemoryCache("combats", budget=cache.MemoryBudget())
+    expected = combat.single_combat(unit.Warrior(), unit.Kiton())
+    assert c.single_combat(unit.Warrior(), unit.Kiton()) == expected
+    assert c.single_combat(unit.Warrior(), unit.Kiton()) == expected
+    assert (len(c), c.stats().hits) == (1, 1)
+
+
+def test_cache_stats():
+    names = {stats.name for stats in cache.cache_stats()}
+    assert {
+        command._unit_state.cache.name,
+        composition._attack.cache.name,
+        sharding._cached_evaluate.cache.name,
+    } <= names
+
+
+def test_tiny_lfu_keeps_frequent_entries():
+    size = entry_size(0, 0)
+    c = cache.MemoryCache(
+        "test", 2 * size, cache.MemoryBudget(), policy=cache.EvictionPolicy.TINY_LFU
+    )
+    for _ in range(3):
+        if c.get(0) is None:
+            c.set(0, 0)
+    # A scan of keys looked up once doesn't evict the frequent key.
+    for key in range(1, 20):
+        if c.get(key) is None:
+            c.set(key, 0)
+    assert 0 in c
+    assert c.stats().rejections > 0
+
+    with pytest.raises(ValueError, match="budget of its own"):
+        cache.MemoryCache("test", policy=cache.EvictionPolicy.TINY_LFU)
@@ -0,0 +1,70 @@
+import pytest
+
+from polycalculator import command, encoding, unit
+from polycalculator.command import TokenKind
+
+
+@pytest.mark.parametrize(
+    ("s", "attackers", "defenders"),
+    [
+        ("wa / de", ["wa"], ["de"]),
+        (
+            "wa 8 d, ar v, kn / de w, gi 30",
+            ["wa 8 d", "ar v", "kn"],
+            ["de w", "gi 30"],
+        ),
+        ("RF SW 5, bo de / je", ["rf sw 5", "bo de"], ["je"]),
+        ("wa8,kn/de w", ["wa 8", "kn"], ["de w"]),
+        ("  wa 4.5 /de  ", ["wa 4.5"], ["de"]),
+    ],
+)
+def test_parse_command(s: str, attackers: list[str], defenders: list[str]):
+    parsed = command.parse_command(s)
+    assert parsed.attackers == [
+        encoding.encode_unit(unit.parse_unit(a)) for a in attackers
+    ]
+    assert parsed.defenders == [
+        encoding.encode_unit(unit.parse_unit(d)) for d in defenders
+    ]
+    assert parsed.units() == (
+        [unit.parse_unit(a) for a in attackers],
+        [unit.parse_unit(d) for d in defenders],
+    )
+
+
+def test_parse_command_shares_states():
+    parsed = command.parse_command("wa, wa / wa")
+    assert parsed.attackers[0] is parsed.attackers[1] is parsed.defenders[0]
+
+
+@pytest.mark.parametrize(
+    ("s", "message", "position"),
+    [
+        ("wa xx / de", "Unknown part 'xx'", 3),
+        ("wa; de", "Unexpected character ';'", 2),
+        ("wa, / de", "Expected a unit", 4),
+        ("wa, 5 v / de", "Expected a unit", 4),
+        ("wa / de,", "Expected a unit", 8),
+        ("wa / de / kn", "Unexpected second '/'", 8),
+        ("wa 0 / de", "HP must be greater than 0", 3),
+        ("wa, kn", "Expected '/' between the attackers and the defenders", 6),
+        ("", "Expected a unit", 0),
+    ],
+)
+def test_parse_command_errors(s: str, message: str, position: int):
+    with pytest.raises(command.CommandError) as info:
+        command.parse_command(s)
+    assert info.value.message == message
+    assert info.value.position == position
+    assert str(info.value) == f"{message} at position {position}"
+
+
+def test_tokenize():
+    assert list(command.tokenize("Wa8, rf/.5")) == [
+        command.Token(TokenKind.WORD, "wa", 0),
+        command.Token(TokenKind.NUMBER, "8", 2),
+        command.Token(TokenKind.COMMA, ",", 3),
+        command.Token(TokenKind.WORD, "rf", 5),
+        command.Token(TokenKind.SLASH, "/", 7),
+        command.Token(TokenKind.NUMBER, ".5", 8),
+    ]
@@ -0,0 +1,102 @@
+import copy
+import itertools
+
+import pytest
+
+from polycalculator import combat, composition, unit
+from polycalculator.status_effect import StatusEffect
+
+UNIT_TYPES = [unit.Warrior, unit.Archer, unit.Knight, unit.Swordsman, unit.Phychi]
+
+
+def brute_force(defenders: list[unit.Unit], budget: int) -> int | None:
+    """The cheapest cost of every order of attackers that fits in the budget."""
+    cheapest = None
+    for n in range(1, budget // 2 + 1):
+        for types in itertools.product(UNIT_TYPES, repeat=n):
+            attackers = [cls() for cls in types]
+            cost = sum(a.cost for a in attackers)
+            if cost > budget or (cheapest is not None and cost >= cheapest):
+                continue
+            survivors = copy.deepcopy(defenders)
+            combat.multi_combat(attackers, survivors)
+            if all(d.current_hp <= 0 for d in survivors):
+                cheapest = cost
+    return cheapest
+
+
+@pytest.mark.parametrize(
+    "defenders",
+    [
+        [unit.Warrior()],
+        [unit.Defender(status_effects=[StatusEffect.FORTIFIED])],
+        [unit.Warrior(), unit.Archer(50)],
+        [unit.Jelly()],
+    ],
+)
+def test_cheapest_composition_is_optimal(defenders: list[unit.Unit]):
+    budget = 10
+    expected = brute_force(defenders, budget)
+    result = composition.cheapest_composition(defenders, budget, UNIT_TYPES, [])
+    if expected is None:
+        assert result is None
+        return
+    assert result is not None
+    assert result.cost == expected == sum(a.cost for a in result.attackers)
+
+    survivors = copy.deepcopy(defenders)
+    combat.multi_combat(result.attackers, survivors)
+    assert all(d.current_hp <= 0 for d in survivors)
+
+
+def test_cheapest_composition_all_units():
+    defenders = [unit.Giant(), unit.Defender(status_effects=[StatusEffect.WALLED])]
+    original = copy.deepcopy(defenders)
+
+    result = composition.cheapest_composition(defenders, 60)
+    assert result is not None
+    assert defenders == original
+    assert not any(type(a) in composition.UNTRAINABLE for a in result.attackers)
+    combat.multi_combat(result.attackers, defenders)
+    assert all(d.current_hp <= 0 for d in defenders)
+
+
+@pytest.mark.parametrize(
+    "defenders",
+    [
+        [unit.Giant()],
+        [unit.Warrior(), unit.Warrior(), unit.Warrior()],
+        [unit.Knight(), unit.Defender(status_effects=[StatusEffect.FORTIFIED])],
+    ],
+)
+def test_cheapest_composition_is_trainable(defenders: list[unit.Unit]):
+    result = composition.cheapest_composition(defenders, 40)
+    assert result is not None
+    for attacker in result.attackers:
+        land_type = (
+            attacker._land_type
+            if isinstance(attacker, unit.NavalUnit)
+            else type(attacker)
+        )
+        assert land_type not in composition.UNTRAINABLE
+        assert land_type not in {unit.Dagger, unit.Pirate}
+
+
+def test_cheapest_composition_naval():
+    # Ice archers can't do damage on land, but can once a rammer carries them.
+    defenders = [unit.Giant()]
+    assert composition.cheapest_composition(defenders, 60, [unit.IceArcher], []) is None
+
+    result = composition.cheapest_composition(
+        defenders, 60, [unit.IceArcher], [unit.Rammer]
+    )
+    assert result is not None
+    assert all(isinstance(a, unit.Rammer) for a in result.attackers)
+    assert result.cost == sum(a.cost for a in result.attackers)
+    combat.multi_combat(result.attackers, defenders)
+    assert defenders[0].current_hp == 0
+
+
+def test_cheapest_composition_budget():
+    assert composition.cheapest_composition([unit.Giant()], 5) is None
+    assert composition.cheapest_composition([], 5) == composition.Composition([], 0)
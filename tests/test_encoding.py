@@ -0,0 +1,119 @@
+import copy
+import pickle
+import random
+
+import pytest
+
+from polycalculator import batch, combat, encoding, fuzz, unit
+from polycalculator.status_effect import StatusEffect
+
+
+@pytest.mark.parametrize(
+    "u",
+    [
+        unit.Warrior(),
+        unit.Warrior(40),
+        unit.Warrior(status_effects=(StatusEffect.VETERAN,)),
+        unit.Defender(status_effects=(StatusEffect.FORTIFIED, StatusEffect.VETERAN)),
+        unit.Giant(status_effects=(StatusEffect.POISONED,)),
+        unit.Raft(),
+        unit.Bomber(unit.Archer(70)),
+    ],
+)
+def test_unit_round_trip(u: unit.Unit):
+    decoded = encoding.decode_unit(encoding.encode_unit(u))
+    assert type(decoded) is type(u)
+    assert decoded.current_hp == u.current_hp
+    assert decoded.max_hp == u.max_hp
+    assert decoded.status_effects == u.status_effects
+    assert encoding.encode_unit(decoded) == encoding.encode_unit(u)
+
+
+def test_encode_unit():
+    state = encoding.encode_unit(unit.Rammer(unit.Warrior(60)))
+    assert encoding.UNIT_TYPES[state.type_id] is unit.Warrior
+    assert encoding.NAVAL_TYPES[state.naval_id] is unit.Rammer
+    assert state.hp == 60
+    assert state.effects == 0
+
+
+def test_effect_mask_round_trip():
+    effects = {StatusEffect.POISONED, StatusEffect.VETERAN, StatusEffect.BOOSTED}
+    assert encoding.mask_to_effects(encoding.effects_to_mask(effects)) == effects
+
+
+def test_scenario_key():
+    key = encoding.scenario_key((unit.Warrior(),), (unit.Defender(),))
+    assert key == encoding.scenario_key((unit.Warrior(),), (unit.Defender(),))
+    assert key != encoding.scenario_key((unit.Defender(),), (unit.Warrior(),))
+    assert key != encoding.scenario_key((unit.Warrior(), unit.Defender()), ())
+
+
+def test_combat_result_round_trip():
+    result = combat.single_combat(unit.Warrior(), unit.Kiton())
+    data = encoding.encode_combat_result(result)
+    assert encoding.decode_combat_result(data) == result
+
+
+def test_multi_combat_result_round_trip():
+    result = combat.multi_combat(
+        [unit.Phychi(), unit.Warrior(), unit.Archer()], [unit.Warrior(), unit.Rider()]
+    )
+    data = encoding.encode_multi_combat_result(result)
+    assert encoding.decode_multi_combat_result(data) == result
+
+
+class CustomUnit(unit.Warrior):
+    """A unit class without a type id."""
+
+
+def test_pickle_units():
+    dead = unit.Warrior()
+    dead.current_hp = 0
+    raychi = unit._UnitRegistry["Raychi"]
+    rng = random.Random(0)
+    units = [
+        unit.Warrior(),
+        dead,
+        # Raychi isn't an attribute of the unit module, so it can only be pickled by
+        # its type id.
+        raychi(),
+        unit.Rammer(raychi(80)),
+        CustomUnit(40),
+        unit.Raft(CustomUnit()),
+        *batch.UnitArrays(fuzz.random_state(rng) for _ in range(200)).units(),
+    ]
+    for u in units:
+        for copied in (pickle.loads(pickle.dumps(u)), copy.deepcopy(u)):
+            assert type(copied) is type(u)
+            assert copied == u
+            assert copied.__dict__ == u.__dict__
+
+
+def test_pickle_is_compact():
+    # Each unit after the first takes a few bytes for its state and a few to call
+    # the function that recreates it.
+    units = [unit.Rammer(unit.Knight(50)) for _ in range(100)]
+    assert len(pickle.dumps(units)) < 100 * 14
+
+
+def test_pickle_results():
+    rng = random.Random(0)
+    for _ in range(100):
+        attackers, defenders = fuzz.random_case(rng, 3, 3)
+        single = combat.single_combat(
+            *batch.UnitArrays([attackers[0], defenders[0]]).units()
+        )
+        multi = combat.multi_combat(
+            batch.UnitArrays(attackers).units(), batch.UnitArrays(defenders).units()
+        )
+        for result in (single, multi):
+            copied = pickle.loads(pickle.dumps(result))
+            assert type(copied) is type(result)
+            assert copied == result
+
+    # Results that can't be packed are pickled field by field.
+    negative = combat.CombatResult(
+        combat.DamageResult(-1, 10), combat.StatusEffectResult(set(), set())
+    )
+    assert pickle.loads(pickle.dumps(negative)) == negative
@@ -0,0 +1,58 @@
+import random
+
+from polycalculator import batch, combat, events, fuzz, unit
+from polycalculator.encoding import encode_unit
+
+
+def test_events_match_multi_combat():
+    rng = random.Random(39)
+    for _ in range(300):
+        attackers, defenders = fuzz.random_case(rng, 4, 4)
+        expected_defenders = batch.UnitArrays(defenders).units()
+        expected = combat.multi_combat(
+            batch.UnitArrays(attackers).units(), expected_defenders
+        )
+
+        actual_defenders = batch.UnitArrays(defenders).units()
+        actual = events.collect_events(
+            events.battle_events(batch.UnitArrays(attackers).units(), actual_defenders),
+            len(attackers),
+            len(defenders),
+        )
+
+        assert actual == expected
+        assert [encode_unit(d) for d in actual_defenders] == [
+            encode_unit(d) for d in expected_defenders
+        ]
+
+
+def test_event_order():
+    attackers = [unit.Warrior(), unit.Warrior(), unit.Warrior()]
+    defenders = [unit.Warrior()]
+
+    assert list(events.battle_events(attackers, defenders)) == [
+        events.Hit(0, 0, 50),
+        events.Retaliation(0, 0, 50),
+        events.Hit(1, 0, 60),
+        events.Kill(events.Side.DEFENDER, 0),
+    ]
+    assert defenders[0].current_hp == 0
+
+
+def test_early_termination():
+    attackers = [unit.Warrior(), unit.Warrior(), unit.Warrior()]
+    defenders = [unit.Giant()]
+
+    seen = []
+    for event in events.battle_events(attackers, defenders):
+        seen.append(event)
+        if isinstance(event, events.Kill) and event.side is events.Side.ATTACKER:
+            break
+
+    assert seen[-1] == events.Kill(events.Side.ATTACKER, 0)
+    assert defenders[0].current_hp == unit.Giant().max_hp - seen[0].damage
+
+
+def test_no_defenders():
+    assert list(events.battle_events([unit.Warrior()], [])) == []
+    assert events.collect_events([], 1, 0) == combat.multi_combat([unit.Warrior()], [])
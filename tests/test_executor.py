@@ -0,0 +1,70 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from polycalculator import batch, combat, encoding, executor, frozen, fuzz, unit
+
+
+@pytest.fixture(scope="module")
+def scenarios() -> list[executor.Scenario]:
+    rng = random.Random(0)
+    return [fuzz.random_case(rng, 3, 3) for _ in range(500)]
+
+
+def test_single_combat_arrays(scenarios: list[executor.Scenario]):
+    attackers = batch.UnitArrays(a[0] for a, _ in scenarios)
+    defenders = batch.UnitArrays(d[0] for _, d in scenarios)
+    with executor.CombatExecutor(max_workers=4, chunk_size=64) as pool:
+        results = pool.single_combat_arrays(attackers, defenders)
+    assert results == batch.single_combat_arrays(attackers, defenders)
+
+
+def test_single_combat_arrays_length():
+    with (
+        executor.CombatExecutor() as pool,
+        pytest.raises(ValueError, match="as many attackers as defenders"),
+    ):
+        pool.single_combat_arrays(
+            batch.UnitArrays([(0, 100, 0, 0)]), batch.UnitArrays()
+        )
+
+
+def test_multi_combat(scenarios: list[executor.Scenario]):
+    with executor.CombatExecutor(max_workers=4, chunk_size=16) as pool:
+        results = pool.multi_combat(scenarios)
+    assert results == [
+        combat.multi_combat(
+            [encoding.decode_unit(s) for s in attackers],
+            [encoding.decode_unit(s) for s in defenders],
+        )
+        for attackers, defenders in scenarios
+    ]
+
+
+def test_single_combat_does_not_modify_units():
+    je1 = unit.Jelly(100)
+    je2 = unit.Jelly(100)
+    combat.single_combat(je1, je2)
+    assert je1 == je2 == unit.Jelly(100)
+
+
+def test_shared_units_across_threads():
+    units = [unit.Jelly(100), unit.Warrior(50), unit.Raft(unit.Archer()), unit.Giant()]
+    pairs = [(a, d) for a in units for d in units] * 50
+    expected = [combat.single_combat(a, d) for a, d in pairs]
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda pair: combat.single_combat(*pair), pairs))
+    assert results == expected
+
+
+def test_freeze_across_threads():
+    state = encoding.UnitState(3, 42, 0, 0)
+    with ThreadPoolExecutor(8) as pool:
+        frozen_units = list(pool.map(lambda _: frozen.intern_state(state), range(64)))
+    assert all(f is frozen_units[0] for f in frozen_units)
+
+
+def test_chunk_size():
+    with pytest.raises(ValueError, match="Chunk size"):
+        executor.CombatExecutor(chunk_size=0)
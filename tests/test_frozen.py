@@ -0,0 +1,62 @@
+import pickle
+
+import pytest
+
+from polycalculator import frozen, unit
+from polycalculator.status_effect import StatusEffect
+
+
+def test_interned():
+    a = frozen.freeze(unit.Warrior(status_effects=(StatusEffect.FORTIFIED,)))
+    b = frozen.freeze(unit.Warrior(status_effects=(StatusEffect.FORTIFIED,)))
+    assert a is b
+    assert hash(a) == hash(b)
+    assert a is not frozen.freeze(unit.Warrior())
+
+
+def test_full_hp_is_canonical():
+    assert frozen.freeze(unit.Warrior()) is frozen.freeze(unit.Warrior(100))
+
+
+def test_stats():
+    f = frozen.freeze(unit.Raft(unit.Defender(60, (StatusEffect.POISONED,))))
+    rf = unit.Raft(unit.Defender(60, (StatusEffect.POISONED,)))
+    assert f.unit_type is unit.Defender
+    assert f.naval_type is unit.Raft
+    assert f.cost == rf.cost
+    assert f.max_hp == rf.max_hp
+    assert f.current_hp == rf.current_hp
+    assert f.health_ratio == rf.health_ratio
+    assert f.attack == rf.attack
+    assert f.defense == rf.defense
+    assert f.range == rf.range
+    assert f.traits == rf.traits
+    assert f.status_effects == rf.status_effects
+    assert f.defense_bonus == rf.defense_bonus
+
+
+def test_thaw():
+    wa = unit.Warrior(40, (StatusEffect.VETERAN,))
+    thawed = frozen.freeze(wa).thaw()
+    assert thawed == wa
+    thawed.current_hp = 10
+    assert frozen.freeze(wa).current_hp == 40
+
+
+def test_immutable():
+    f = frozen.freeze(unit.Warrior())
+    with pytest.raises(AttributeError, match="immutable"):
+        f.current_hp = 10  # type: ignore[misc]
+    with pytest.raises(AttributeError, match="immutable"):
+        del f.attack
+
+
+def test_pickle():
+    f = frozen.freeze(unit.Scout(unit.Archer(30)))
+    assert pickle.loads(pickle.dumps(f)) is f
+
+
+def test_repr():
+    assert repr(frozen.freeze(unit.Raft(unit.Warrior(50)))) == (
+        "FrozenUnit(Raft(Warrior), current_hp=50, status_effects=set())"
+    )
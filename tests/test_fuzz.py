@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from polycalculator import combat, encoding, fuzz, kernel
+
+
+def test_random_state_is_valid():
+    rng = random.Random(0)
+    for _ in range(1000):
+        state = fuzz.random_state(rng)
+        assert encoding.encode_unit(encoding.decode_unit(state)) == state
+
+
+def test_fuzz_engines_agree():
+    report = fuzz.fuzz(3000, chunk_size=1000, processes=1)
+    assert report.cases == 3000
+    assert report.mismatches == []
+
+
+def test_fuzz_numba_backend():
+    pytest.importorskip("numba")
+    previous = kernel.get_backend()
+    kernel.set_backend("numba")
+    try:
+        report = fuzz.fuzz(
+            3000, chunk_size=1000, processes=1, engines=["kernel", "kernel-multi"]
+        )
+    finally:
+        kernel.set_backend(previous)
+    assert report.mismatches == []
+
+
+def test_fuzz_processes():
+    report = fuzz.fuzz(1000, chunk_size=250, processes=2, engines=["batch"])
+    assert report.mismatches == []
+
+
+def test_fuzz_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown engine"):
+        fuzz.fuzz(10, engines=["nope"])
+
+
+def _broken_engine(cases):
+    # Forgets that veterans have more HP.
+    results = []
+    for (attacker,), (defender,) in cases:
+        result = combat.single_combat(
+            encoding.decode_unit(attacker),
+            encoding.decode_unit(defender._replace(effects=0)),
+        )
+        results.append(fuzz._single_result(result))
+    return results
+
+
+def test_fuzz_minimizes_mismatches(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setitem(fuzz.ENGINES, "broken", fuzz.Engine(_broken_engine, False))
+    report = fuzz.fuzz(2000, engines=["broken"], processes=1, max_mismatches=3)
+    assert report.mismatches
+    for mismatch in report.mismatches:
+        (_attacker,), (defender,) = mismatch.case
+        # No simpler case still mismatches.
+        assert not any(
+            fuzz.check_case("broken", case)
+            for case in fuzz._simpler_cases(mismatch.case)
+        )
+        assert fuzz.check_case("broken", mismatch.case) == mismatch
+        assert defender.effects
+        assert "Reproduce with: fuzz.check_case('broken'" in str(mismatch)
+
+
+def test_engine_exceptions_are_mismatches(monkeypatch: pytest.MonkeyPatch):
+    def raising_engine(cases):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(fuzz.ENGINES, "raising", fuzz.Engine(raising_engine, True))
+    mismatch = fuzz.check_case("raising", (((0, 100, 0, 0),), ((0, 100, 0, 0),)))
+    assert mismatch is not None
+    assert mismatch.actual == "RuntimeError: boom"
@@ -0,0 +1,103 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from polycalculator import batch, jobs, records, unit
+
+
+@pytest.fixture
+def battles(tmp_path: Path) -> Path:
+    rng = random.Random(0)
+    types = [unit.Warrior, unit.Archer, unit.Knight, unit.Giant, unit.Polytaur]
+    path = tmp_path / "battles"
+    with records.RecordWriter(path, records.RecordKind.BATTLE) as writer:
+        for _ in range(50):
+            attacker, defender = rng.choice(types), rng.choice(types)
+            writer.write(attacker(), defender(rng.randint(1, 10) * 5))
+    return path
+
+
+def expected(path: Path) -> batch.CombatArrays:
+    with records.Records(path) as r:
+        return batch.single_combat_arrays(
+            batch.UnitArrays.from_records(r, 0), batch.UnitArrays.from_records(r, 1)
+        )
+
+
+def test_run_job(battles: Path, tmp_path: Path):
+    reports: list[jobs.JobProgress] = []
+    result = jobs.run_job(battles, tmp_path / "out", 8, 1, reports.append)
+    assert (result.chunks_done, result.chunks) == (7, 7)
+    assert result.records_done == result.records == 50
+    assert result.eta == 0
+    assert [report.chunks_done for report in reports] == list(range(8))
+    assert reports[0].eta is None
+    assert jobs.load_results(tmp_path / "out") == expected(battles)
+
+
+def test_run_job_resumes(battles: Path, tmp_path: Path):
+    output = tmp_path / "out"
+
+    def crash(progress: jobs.JobProgress) -> None:
+        if progress.chunks_done == 3:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        jobs.run_job(battles, output, 8, 1, crash)
+    with pytest.raises(ValueError, match="isn't done"):
+        jobs.load_results(output)
+    checkpoint = json.loads((output / jobs.MANIFEST).read_text())
+    done = {
+        i: jobs._chunk_path(output, i).stat().st_mtime_ns for i in checkpoint["done"]
+    }
+
+    # Only one chunk was submitted at a time, so no other chunk was done.
+    assert len(done) == 3
+
+    reports: list[jobs.JobProgress] = []
+    jobs.run_job(battles, output, 8, 1, reports.append)
+    # The chunks done before the crash are skipped.
+    assert reports[0].chunks_done == len(done)
+    assert reports[0].records_done == 8 * len(done)
+    assert len(reports) == 8 - len(done)
+    for i, mtime in done.items():
+        assert jobs._chunk_path(output, i).stat().st_mtime_ns == mtime
+    assert jobs.load_results(output) == expected(battles)
+
+    # Running a done job again does nothing.
+    assert jobs.run_job(battles, output, 8, 1).chunks_done == 7
+
+
+def test_run_job_errors(battles: Path, tmp_path: Path):
+    jobs.run_job(battles, tmp_path / "out", 25, 1)
+    with pytest.raises(ValueError, match="different job"):
+        jobs.run_job(battles, tmp_path / "out", 10, 1)
+    with pytest.raises(ValueError, match="greater than 0"):
+        jobs.run_job(battles, tmp_path / "out", 0)
+
+    with records.RecordWriter(tmp_path / "units", records.RecordKind.UNIT) as w:
+        w.write(unit.Warrior())
+    with pytest.raises(ValueError, match="battle records"):
+        jobs.run_job(tmp_path / "units", tmp_path / "other")
+
+
+def test_run_job_source_changed(battles: Path, tmp_path: Path):
+    def crash(progress: jobs.JobProgress) -> None:
+        if progress.chunks_done == 2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        jobs.run_job(battles, tmp_path / "out", 8, 1, crash)
+
+    # The record file is written again with as many records.
+    with records.RecordWriter(battles, records.RecordKind.BATTLE) as writer:
+        for _ in range(50):
+            writer.write(unit.Warrior(), unit.Warrior())
+    with pytest.raises(ValueError, match="Record file changed"):
+        jobs.run_job(battles, tmp_path / "out", 8, 1)
+
+
+def test_job_progress_eta():
+    assert jobs.JobProgress(1, 4, 100, 400, 2.0, 50.0).eta == 6.0
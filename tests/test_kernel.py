@@ -0,0 +1,69 @@
+import copy
+import random
+
+import pytest
+
+from polycalculator import batch, combat, fuzz, kernel, unit
+from polycalculator.encoding import mask_to_effects
+
+
+@pytest.fixture(params=kernel.available_backends())
+def backend(request: pytest.FixtureRequest):
+    previous = kernel.get_backend()
+    kernel.set_backend(request.param)
+    yield request.param
+    kernel.set_backend(previous)
+
+
+@pytest.fixture(scope="module")
+def scenarios() -> list[fuzz.Case]:
+    rng = random.Random(1)
+    return [fuzz.random_case(rng, 5, 3) for _ in range(1000)]
+
+
+def test_single_combat_arrays(backend: str, scenarios: list[fuzz.Case]):
+    attackers = batch.UnitArrays(a[0] for a, _ in scenarios)
+    defenders = batch.UnitArrays(d[0] for _, d in scenarios)
+    results = kernel.single_combat_arrays(attackers, defenders)
+    for i, (attacker, defender) in enumerate(zip(attackers.units(), defenders.units())):
+        expected = combat.single_combat(attacker, defender)
+        assert (results.to_attacker[i], results.to_defender[i]) == expected.damage
+        assert (
+            mask_to_effects(results.attacker_effects[i]),
+            mask_to_effects(results.defender_effects[i]),
+        ) == expected.status_effects
+
+
+def test_multi_combat(backend: str, scenarios: list[fuzz.Case]):
+    for attackers, defenders in scenarios:
+        attacker_units = batch.UnitArrays(attackers).units()
+        defender_units = batch.UnitArrays(defenders).units()
+        expected_defenders = copy.deepcopy(defender_units)
+        expected = combat.multi_combat(attacker_units, expected_defenders)
+        assert kernel.multi_combat(attacker_units, defender_units) == expected
+        assert defender_units == expected_defenders
+
+
+@pytest.mark.parametrize(
+    ("attackers", "defenders", "engaged"),
+    [
+        ([], [unit.Warrior()], 1),
+        ([unit.Warrior()], [], 0),
+        ([unit.Giant()] * 3, [unit.Warrior(10), unit.Warrior(10)], 2),
+    ],
+)
+def test_multi_combat_arrays_engaged(
+    backend: str, attackers: list[unit.Unit], defenders: list[unit.Unit], engaged: int
+):
+    result = kernel.multi_combat_arrays(
+        batch.UnitArrays.from_units(attackers), batch.UnitArrays.from_units(defenders)
+    )
+    assert result.engaged == engaged
+
+
+def test_set_backend():
+    with pytest.raises(ValueError, match="Unknown backend"):
+        kernel.set_backend("fortran")
+    assert "python" in kernel.available_backends()
+    # Numba is only used when it is asked for, even if it is installed.
+    assert kernel.get_backend() == "python"
@@ -0,0 +1,92 @@
+import copy
+
+import pytest
+
+from polycalculator import combat, lookahead, unit
+from polycalculator.command import parse_command
+from polycalculator.status_effect import StatusEffect
+
+COMMANDS = [
+    "wa, ar, kn, sw / de, gi",
+    "kn, kn, ca, ar, ar / wa, de, ar, gi",
+    "ar, mb, ca / wa, de",
+    "kn / wa 3, wa 3, wa 3",
+    "ar 4, sw 3.7, wa 2.2, doomux 12.3 / jelly 16.6, sw 12.1",
+]
+
+
+def dead(u: unit.Unit) -> bool:
+    return u.current_hp <= 0 or StatusEffect.CONVERTED in u.status_effects
+
+
+def replay(
+    attackers: list[unit.Unit], defenders: list[unit.Unit], outcome: lookahead.Outcome
+) -> int:
+    """The stars gained by an outcome, simulated from scratch."""
+    attackers = copy.deepcopy(attackers)
+    defenders = copy.deepcopy(defenders)
+    ordered = [attackers[i] for i in outcome.order]
+    result = combat.multi_combat(ordered, defenders)
+    for a, r in zip(ordered, result.attackers, strict=True):
+        a.current_hp -= r.damage
+        a.add_status_effects(r.status_effects)
+    killed = sum(d.cost for d in defenders if dead(d))
+
+    for enemy, target in outcome.reply:
+        assert not dead(defenders[enemy])
+        assert not dead(attackers[target])
+        result = combat.multi_combat([defenders[enemy]], [attackers[target]])
+        # The defenders killed by retaliation count as well.
+        if result.attackers[0].damage >= defenders[enemy].current_hp:
+            killed += defenders[enemy].cost
+    return killed - sum(a.cost for a in attackers if dead(a))
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_rank_orders_limit_finds_the_best(command: str):
+    attackers, defenders = parse_command(command).units()
+    original = copy.deepcopy((attackers, defenders))
+
+    ranked = lookahead.rank_orders(attackers, defenders)
+    assert (attackers, defenders) == original
+    keys = [lookahead._key(outcome) for outcome in ranked]
+    assert keys == sorted(keys, reverse=True)
+    assert len({outcome.order for outcome in ranked}) == len(ranked)
+
+    for limit in (2, 4):
+        best = lookahead.rank_orders(attackers, defenders, limit=limit)
+        assert [lookahead._key(outcome) for outcome in best] == keys[:limit]
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_rank_orders_matches_multi_combat(command: str):
+    attackers, defenders = parse_command(command).units()
+    for outcome in lookahead.rank_orders(attackers, defenders, limit=5):
+        assert replay(attackers, defenders, outcome) == outcome.net
+
+
+def test_rank_orders_given_orders():
+    attackers, defenders = parse_command("kn, kn, wa / wa").units()
+    ranked = lookahead.rank_orders(attackers, defenders, [(2, 0, 1), (0, 1, 2), ()])
+    # The knight kills the warrior, so the other attacks are dropped.
+    assert [outcome.order for outcome in ranked] == [(0,), (2, 0), ()]
+    assert ranked[0].kills == 1
+    assert ranked[0].losses == 0
+    assert ranked[-1].net == 0
+
+
+def test_rank_orders_counts_retaliation_kills():
+    attackers, defenders = parse_command("kn / wa 3, wa 3, wa 3").units()
+    (outcome,) = lookahead.rank_orders(attackers, defenders, [()])
+    # The knight is killed, but it kills one of the warriors by retaliating.
+    assert outcome.counter_losses == 1
+    assert outcome.net == unit.Warrior().cost - unit.Knight().cost
+
+
+def test_rank_orders_errors():
+    attackers, defenders = parse_command("wa / wa").units()
+    with pytest.raises(ValueError, match="Limit"):
+        lookahead.rank_orders(attackers, defenders, limit=0)
+    many = [unit.Warrior() for _ in range(lookahead.MAX_ORDERS_ATTACKERS + 1)]
+    with pytest.raises(ValueError, match="at most"):
+        lookahead.rank_orders(many, defenders)
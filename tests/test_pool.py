@@ -0,0 +1,49 @@
+from polycalculator import pool
+from polycalculator.command import CommandError, _unit_state, parse_command
+from polycalculator.unit import Raft, Warrior
+
+
+def cached_states() -> int:
+    return len(_unit_state.cache)
+
+
+def test_warm_up():
+    pool.warm_up()
+    assert Warrior in Raft._composites
+    assert cached_states() > 0
+    pool.warm_up()
+
+
+def test_warm_pool():
+    with pool.warm_pool(1) as executor:
+        # The worker is forked from the warmed up fork server, so its caches are
+        # already full before its first query.
+        assert executor.submit(cached_states).result() > 100
+
+
+_initialized: object = None
+
+
+def initialize(value: object) -> None:
+    global _initialized
+    _initialized = value
+
+
+def initialized() -> object:
+    return _initialized
+
+
+def test_warm_pool_initializer():
+    with pool.warm_pool(1, initialize, ("ready",), max_tasks_per_child=1) as executor:
+        # The second task runs in a new worker, which runs the initializer again.
+        assert executor.submit(initialized).result() == "ready"
+        assert executor.submit(initialized).result() == "ready"
+
+
+def test_command_error_in_worker():
+    with pool.warm_pool(1) as executor:
+        error = executor.submit(parse_command, "wa / xx").exception()
+        # The worker and the pool survive errors raised by queries.
+        assert executor.submit(parse_command, "wa / wa").result()
+    assert isinstance(error, CommandError)
+    assert (error.message, error.position) == ("Unknown part 'xx'", 5)
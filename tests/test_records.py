@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from polycalculator import encoding, records, unit
+from polycalculator.status_effect import StatusEffect
+
+
+def test_units(tmp_path: Path):
+    units = [
+        unit.Warrior(),
+        unit.Defender(80, status_effects=(StatusEffect.FORTIFIED,)),
+        unit.Scout(unit.Archer(30)),
+    ]
+    with records.RecordWriter(tmp_path / "units", records.RecordKind.UNIT) as writer:
+        writer.write_many((u,) for u in units)
+
+    with records.Records(tmp_path / "units") as r:
+        assert r.kind == records.RecordKind.UNIT
+        assert len(r) == 3
+        assert r.view.shape == (3, records.UNIT_FIELDS)
+        for i, u in enumerate(units):
+            assert r.state(i) == encoding.encode_unit(u)
+        assert r.view[1, 1] == 80
+
+
+def test_battles(tmp_path: Path):
+    battles = [(unit.Warrior(), unit.Knight(50)), (unit.Raft(), unit.Jelly())]
+    with records.RecordWriter(tmp_path / "battles", records.RecordKind.BATTLE) as w:
+        for attacker, defender in battles:
+            w.write(attacker, defender)
+
+    with records.Records(tmp_path / "battles") as r:
+        assert len(r) == 2
+        for i, (attacker, defender) in enumerate(battles):
+            assert r.state(i, 0) == encoding.encode_unit(attacker)
+            assert r.state(i, 1) == encoding.encode_unit(defender)
+
+        with records.RecordWriter(tmp_path / "copy", records.RecordKind.BATTLE) as w:
+            w.write_raw(r.view[1:])
+
+    with records.Records(tmp_path / "copy") as r:
+        assert len(r) == 1
+        assert r.state(0, 1) == encoding.encode_unit(unit.Jelly())
+
+
+def test_empty(tmp_path: Path):
+    with records.RecordWriter(tmp_path / "empty", records.RecordKind.UNIT):
+        pass
+    with records.Records(tmp_path / "empty") as r:
+        assert len(r) == 0
+
+
+def test_wrong_arity(tmp_path: Path):
+    with (
+        records.RecordWriter(tmp_path / "battles", records.RecordKind.BATTLE) as w,
+        pytest.raises(ValueError, match="needs 2 units"),
+    ):
+        w.write(unit.Warrior())
+
+
+def test_not_a_record_file(tmp_path: Path):
+    (tmp_path / "file").write_bytes(b"not a record file at all, but long enough")
+    with pytest.raises(ValueError, match="Not a record file"):
+        records.Records(tmp_path / "file")
+
+
+def test_truncated(tmp_path: Path):
+    with records.RecordWriter(tmp_path / "units", records.RecordKind.UNIT) as w:
+        w.write(unit.Warrior())
+    data = (tmp_path / "units").read_bytes()
+    (tmp_path / "units").write_bytes(data[:-2])
+    with pytest.raises(ValueError, match="truncated"):
+        records.Records(tmp_path / "units")
@@ -0,0 +1,89 @@
+import random
+import threading
+import time
+
+import pytest
+
+from polycalculator import assignment, combat, fuzz, scheduler
+from polycalculator.command import Command, parse_command
+
+THREADS = {
+    scheduler.QueryClass.CALCULATE: scheduler.ClassLimits(2, 2),
+    scheduler.QueryClass.OPTIMIZE: scheduler.ClassLimits(1, 1),
+}
+
+
+def big_command() -> Command:
+    rng = random.Random(1)
+    return Command(
+        [fuzz.random_state(rng) for _ in range(assignment.MAX_ATTACKERS)],
+        [fuzz.random_state(rng) for _ in range(4)],
+    )
+
+
+def test_deadline():
+    assert not scheduler.Deadline().expired
+    scheduler.Deadline().check()
+    deadline = scheduler.Deadline(0)
+    assert deadline.expired
+    with pytest.raises(scheduler.DeadlineExceeded):
+        deadline.check()
+
+
+def test_calculate_and_optimize():
+    with scheduler.Scheduler(THREADS) as s:
+        calculated = s.calculate("wa, ar / de").result()
+        optimized = s.optimize("wa, ar / de").result()
+    assert calculated == combat.multi_combat(*parse_command("wa, ar / de").units())
+    assert optimized == assignment.assign_attacks(*parse_command("wa, ar / de").units())
+
+
+def test_backpressure():
+    release = threading.Event()
+    with scheduler.Scheduler(THREADS) as s:
+        futures = [
+            s.submit(scheduler.QueryClass.OPTIMIZE, lambda _: release.wait())
+            for _ in range(2)
+        ]
+        with pytest.raises(scheduler.Overloaded):
+            s.submit(scheduler.QueryClass.OPTIMIZE, lambda _: None)
+        assert s.rejected(scheduler.QueryClass.OPTIMIZE) == 1
+
+        # Calculations have their own queue, so they still run.
+        assert s.calculate("wa / wa").result(timeout=5)
+
+        release.set()
+        for future in futures:
+            future.result()
+        assert s.pending(scheduler.QueryClass.OPTIMIZE) == 0
+
+
+def test_deadline_cancels_running_search():
+    with scheduler.Scheduler(THREADS) as s:
+        start = time.monotonic()
+        future = s.optimize(big_command(), timeout=0.02)
+        with pytest.raises(scheduler.DeadlineExceeded):
+            future.result()
+    assert time.monotonic() - start < 0.3
+
+
+def test_deadline_skips_queued_query():
+    release = threading.Event()
+    started = []
+    with scheduler.Scheduler(THREADS) as s:
+        blocker = s.submit(scheduler.QueryClass.OPTIMIZE, lambda _: release.wait())
+        queued = s.submit(
+            scheduler.QueryClass.OPTIMIZE, lambda _: started.append(1), timeout=0
+        )
+        release.set()
+        blocker.result()
+        with pytest.raises(scheduler.DeadlineExceeded):
+            queued.result()
+    assert not started
+
+
+def test_limits_are_checked():
+    with pytest.raises(ValueError, match="Concurrency"):
+        scheduler.Scheduler(
+            {scheduler.QueryClass.CALCULATE: scheduler.ClassLimits(0, 1)}
+        )
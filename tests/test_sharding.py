@@ -0,0 +1,57 @@
+import copy
+import random
+
+import pytest
+
+from polycalculator import combat, fuzz, sharding
+from polycalculator.command import Command, parse_command
+
+
+def test_scenario_digest():
+    command = parse_command("wa, ar / de")
+    digest = sharding.scenario_digest(command.attackers, command.defenders)
+    assert digest == sharding.scenario_digest(command.attackers, command.defenders)
+    assert 0 <= digest < 1 << 64
+    # Moving a unit from one side to the other changes the scenario.
+    assert digest != sharding.scenario_digest(
+        command.attackers[:1], [*command.attackers[1:], *command.defenders]
+    )
+
+
+def test_hash_ring():
+    rng = random.Random(0)
+    keys = [rng.getrandbits(64) for _ in range(10_000)]
+    four = sharding.HashRing(4)
+    five = sharding.HashRing(5)
+
+    counts = [0] * 4
+    for key in keys:
+        counts[four.node(key)] += 1
+    assert min(counts) > len(keys) / 8
+
+    # Only the keys taken by the new node move.
+    moved = [key for key in keys if four.node(key) != five.node(key)]
+    assert all(five.node(key) == 4 for key in moved)
+    assert len(moved) < len(keys) / 3
+
+    with pytest.raises(ValueError, match="at least one node"):
+        sharding.HashRing(0)
+
+
+def test_sharded_calculator():
+    rng = random.Random(0)
+    commands = [Command(*fuzz.random_case(rng, 4, 3)) for _ in range(20)]
+
+    with sharding.ShardedCalculator(2) as calculator:
+        results = [calculator.calculate(command) for command in commands * 2]
+        assert calculator.calculate("wa / wa") == combat.multi_combat(
+            *parse_command("wa / wa").units()
+        )
+        stats = calculator.stats()
+
+    for command, result in zip(commands * 2, results, strict=True):
+        attackers, defenders = command.units()
+        assert result == combat.multi_combat(attackers, copy.deepcopy(defenders))
+    # Repeated commands go to the worker that already has them cached.
+    assert sum(s.queries for s in stats) == 41
+    assert sum(s.hits for s in stats) >= 20
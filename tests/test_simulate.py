@@ -0,0 +1,117 @@
+import pytest
+
+from polycalculator import batch, simulate, unit
+from polycalculator.encoding import UnitState, encode_unit
+from polycalculator.status_effect import StatusEffect
+
+
+def run(
+    attacker: unit.Unit,
+    defender: unit.Unit,
+    turns: int,
+    attacker_healer: unit.Unit | None = None,
+    defender_healer: unit.Unit | None = None,
+) -> simulate.Simulation:
+    return simulate.simulate(
+        batch.UnitArrays.from_units([attacker]),
+        batch.UnitArrays.from_units([defender]),
+        turns,
+        attacker_healer and batch.UnitArrays.from_units([attacker_healer]),
+        defender_healer and batch.UnitArrays.from_units([defender_healer]),
+    )
+
+
+def test_first_turn_matches_single_combat():
+    sim = run(unit.Warrior(), unit.Warrior(), 1)
+    assert sim.turn == 1
+    assert sim.attackers.hp[0] == 50
+    assert sim.defenders.hp[0] == 50
+    assert sim.outcomes[0] == simulate.Outcome.ONGOING
+
+
+def test_fight_to_the_death():
+    sim = run(unit.Knight(), unit.Warrior(), 10)
+    assert sim.outcomes[0] == simulate.Outcome.ATTACKER_WON
+    assert sim.defenders.hp[0] == 0
+    assert sim.attacker_kills[0] == 1
+
+
+def test_finished_battles_stay_finished():
+    sim = run(unit.Knight(), unit.Warrior(30), 1)
+    assert sim.outcomes[0] == simulate.Outcome.ATTACKER_WON
+    hp = sim.attackers.hp[0]
+    sim.run(5)
+    assert sim.attackers.hp[0] == hp
+
+
+def test_poison_is_cured_instead_of_healed():
+    sim = run(unit.Phychi(), unit.Warrior(), 2, defender_healer=unit.MindBender())
+    assert sim.defenders.state(0) == encode_unit(unit.Warrior(80))
+
+
+def test_heal():
+    # The archer outranges the warrior, so it takes no retaliation on its turns.
+    healer = unit.MindBender()
+    before = run(unit.Archer(), unit.Warrior(), 2, attacker_healer=healer)
+    after = run(unit.Archer(), unit.Warrior(), 3, attacker_healer=healer)
+    assert before.attackers.hp[0] < 100
+    assert after.attackers.hp[0] == min(
+        before.attackers.hp[0] + simulate.HEAL_AMOUNT, 100
+    )
+
+
+@pytest.mark.parametrize(
+    "healer",
+    [
+        encode_unit(unit.Warrior()),
+        encode_unit(unit.MindBender())._replace(hp=0),
+        encode_unit(unit.MindBender(status_effects=(StatusEffect.FROZEN,))),
+        encode_unit(unit.Raft(unit.MindBender())),
+    ],
+)
+def test_no_heal(healer: UnitState):
+    attackers = batch.UnitArrays.from_units([unit.Archer()])
+    defenders = batch.UnitArrays.from_units([unit.Warrior()])
+    before = simulate.simulate(attackers, defenders, 2)
+    after = simulate.simulate(attackers, defenders, 3, batch.UnitArrays([healer]))
+    assert after.attackers.hp[0] == before.attackers.hp[0]
+
+
+def test_healers_length():
+    with pytest.raises(ValueError, match="as many healers as battles"):
+        simulate.Simulation(
+            batch.UnitArrays.from_units([unit.Warrior()]),
+            batch.UnitArrays.from_units([unit.Warrior()]),
+            batch.UnitArrays(),
+        )
+
+
+def test_freeze():
+    sim = run(unit.IceArcher(), unit.Warrior(), 2)
+    # The warrior spends its turn thawing.
+    assert sim.attackers.hp[0] == 100
+    assert sim.defenders.effects[0] == 0
+
+
+def test_boost_is_used_up():
+    sim = run(unit.Warrior(status_effects=(StatusEffect.BOOSTED,)), unit.Giant(), 1)
+    assert sim.attackers.effects[0] == 0
+
+
+def test_promotion():
+    sim = simulate.Simulation(
+        batch.UnitArrays.from_units([unit.Knight(80)]),
+        batch.UnitArrays.from_units([unit.Warrior(30)]),
+    )
+    sim.attacker_kills[0] = 2
+    sim.run(1)
+    assert sim.outcomes[0] == simulate.Outcome.ATTACKER_WON
+    assert sim.attackers.state(0) == encode_unit(
+        unit.Knight(status_effects=(StatusEffect.VETERAN,))
+    )
+
+
+def test_conversion_ends_battle():
+    sim = run(unit.MindBender(), unit.Catapult(), 1)
+    assert sim.outcomes[0] == simulate.Outcome.ATTACKER_WON
+    assert sim.defenders.hp[0] == 100
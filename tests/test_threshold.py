@@ -0,0 +1,160 @@
+import pytest
+
+from polycalculator import combat, threshold, unit
+from polycalculator.status_effect import StatusEffect
+
+
+def sweep(attacker: unit.Unit, defender: unit.Unit) -> threshold.Breakpoints:
+    kill: list[int] = []
+    survive: list[int] = []
+    kills = survives = False
+    for hp in range(1, attacker.max_hp + 1):
+        result = combat.single_combat(threshold._with_hp(attacker, hp), defender)
+        if (result.damage.to_defender >= defender.current_hp) != kills:
+            kills = not kills
+            kill.append(hp)
+        if (result.damage.to_attacker < hp) != survives:
+            survives = not survives
+            survive.append(hp)
+    return threshold.Breakpoints(tuple(kill), tuple(survive))
+
+
+@pytest.mark.parametrize(
+    ("attacker", "defender"),
+    [
+        (unit.Warrior(), unit.Warrior()),
+        (unit.Knight(), unit.Warrior(30)),
+        (unit.Swordsman(), unit.Defender(status_effects=(StatusEffect.FORTIFIED,))),
+        (unit.Archer(), unit.Warrior()),
+        (unit.Warrior(), unit.Jelly()),
+        (unit.Knight(), unit.Jelly(60)),
+        (unit.Jelly(), unit.Jelly()),
+        (unit.Phychi(), unit.Raft()),
+        (unit.Raft(unit.Warrior()), unit.Warrior()),
+    ],
+)
+def test_find_breakpoints(attacker: unit.Unit, defender: unit.Unit):
+    assert threshold.find_breakpoints(attacker, defender) == sweep(attacker, defender)
+
+
+def test_find_breakpoints_kill():
+    breakpoints = threshold.find_breakpoints(unit.Knight(), unit.Warrior(30))
+    assert breakpoints.kill == (4,)
+
+
+def test_find_breakpoints_no_kill():
+    breakpoints = threshold.find_breakpoints(unit.Warrior(), unit.Giant())
+    assert breakpoints.kill == ()
+
+
+def test_find_breakpoints_does_not_mutate():
+    attacker = unit.Jelly()
+    defender = unit.Jelly()
+    threshold.find_breakpoints(attacker, defender)
+    assert attacker == unit.Jelly()
+    assert defender == unit.Jelly()
+
+
+def test_breakpoint_table():
+    attackers = [unit.Warrior(), unit.Rider()]
+    defenders = [unit.Warrior(), unit.Archer(), unit.Jelly()]
+    table = threshold.breakpoint_table(attackers, defenders)
+    assert len(table) == 2
+    assert all(len(row) == 3 for row in table)
+    assert table[1][2] == threshold.find_breakpoints(unit.Rider(), unit.Jelly())
+
+
+def kills_all(attackers: list[unit.Unit], defenders: list[unit.Unit]) -> bool:
+    return threshold._kills_all(attackers, defenders)
+
+
+@pytest.mark.parametrize(
+    ("attackers", "defenders", "index"),
+    [
+        ([unit.Warrior(), unit.Warrior(), unit.Warrior()], [unit.Defender()], 2),
+        (
+            [unit.Archer(), unit.Knight(), unit.Rider()],
+            [unit.Warrior(), unit.Jelly(40)],
+            1,
+        ),
+        ([unit.Warrior(), unit.Warrior()], [unit.Giant()], 0),
+    ],
+)
+def test_min_attacker_hp(
+    attackers: list[unit.Unit], defenders: list[unit.Unit], index: int
+):
+    expected = None
+    for hp in range(1, attackers[index].max_hp + 1):
+        probe = list(attackers)
+        probe[index] = threshold._with_hp(attackers[index], hp)
+        if kills_all(probe, defenders):
+            expected = hp
+            break
+    assert threshold.min_attacker_hp(attackers, defenders, index) == expected
+
+
+def test_min_attacker_hp_already_dead():
+    attackers = [unit.Knight(), unit.Warrior()]
+    defenders = [unit.Warrior(10)]
+    assert threshold.min_attacker_hp(attackers, defenders, 1) == 1
+
+
+@pytest.mark.parametrize(
+    ("attackers", "defenders", "index"),
+    [
+        ([unit.Warrior(), unit.Warrior(), unit.Warrior()], [unit.Defender()], 0),
+        (
+            [unit.Knight(), unit.Knight(), unit.Rider()],
+            [unit.Warrior(), unit.Jelly()],
+            1,
+        ),
+        ([unit.Warrior()], [unit.Giant(), unit.Warrior()], 1),
+        (
+            [
+                unit.Segment(),
+                unit._UnitRegistry["Raychi"](),
+                unit.Defender(),
+                unit.Defender(),
+            ],
+            [unit.Jelly()],
+            0,
+        ),
+    ],
+)
+def test_max_defender_hp(
+    attackers: list[unit.Unit], defenders: list[unit.Unit], index: int
+):
+    expected = None
+    for hp in range(1, defenders[index].max_hp + 1):
+        probe = list(defenders)
+        probe[index] = threshold._with_hp(defenders[index], hp)
+        if kills_all(attackers, probe):
+            expected = hp
+    assert threshold.max_defender_hp(attackers, defenders, index) == expected
+
+
+def test_inverse_does_not_mutate():
+    attackers = [unit.Warrior(), unit.Warrior()]
+    defenders = [unit.Warrior(), unit.Warrior()]
+    threshold.min_attacker_hp(attackers, defenders, 1)
+    threshold.max_defender_hp(attackers, defenders, 1)
+    assert attackers == [unit.Warrior(), unit.Warrior()]
+    assert defenders == [unit.Warrior(), unit.Warrior()]
+
+
+def test_kills_all_stops_early(monkeypatch: pytest.MonkeyPatch):
+    combats = []
+    single_combat = combat.single_combat
+
+    def counting_single_combat(attacker: unit.Unit, defender: unit.Unit):
+        combats.append((attacker, defender))
+        return single_combat(attacker, defender)
+
+    monkeypatch.setattr(combat, "single_combat", counting_single_combat)
+    attackers = [unit.Warrior(), unit.Warrior(), unit.Warrior()]
+    defenders = [unit.Giant(), unit.Warrior()]
+
+    assert not threshold._kills_all(attackers, defenders)
+    # After the second attack, one attacker is left for two living defenders.
+    assert len(combats) == 2
+    assert defenders == [unit.Giant(), unit.Warrior()]
@@ -1,6 +1,11 @@
+import copy
+import pickle
+import subprocess
+import sys
+
 import pytest
 
-from polycalculator import unit
+from polycalculator import combat, unit
 from polycalculator.status_effect import StatusEffect
 from polycalculator.trait import Trait
 
@@ -181,6 +186,48 @@ class TestNavalUnit:
         rf.add_status_effect(StatusEffect.POISONED)
         assert rf.status_effects == {StatusEffect.POISONED}
 
+    def test_rf_copies_unit(self):
+        wa = unit.Warrior()
+        rf = unit.Raft(wa)
+        rf.current_hp = 40
+        assert wa.current_hp == 100
+        assert rf.unit == unit.Warrior(40)
+
+    def test_rf_types(self):
+        rf = unit.Raft(unit.Warrior())
+        assert isinstance(rf, unit.Raft)
+        assert isinstance(rf, unit.NavalUnit)
+        assert type(rf) is type(unit.Raft(unit.Warrior(50)))
+        assert type(rf) is not type(unit.Raft(unit.Defender()))
+        assert type(rf).__name__ == "Raft"
+
+    def test_rf_types_are_created_on_first_use(self):
+        code = (
+            "from polycalculator import unit\n"
+            "print(unit.Giant in unit.Rammer._composites)\n"
+            "unit.Rammer(unit.Giant())\n"
+            "print(unit.Giant in unit.Rammer._composites)\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        assert output.split() == ["False", "True"]
+
+    def test_rf_combat_rules(self):
+        rm = unit.Rammer(unit.Giant())
+        wa = unit.Warrior()
+        assert combat._combat_rules(rm, wa) == combat._compile_rules(rm, wa)
+        assert combat._combat_rules(wa, rm) == combat._compile_rules(wa, rm)
+        assert type(rm) in combat._PROFILES
+
+    def test_rf_copy(self):
+        rf = unit.Bomber(unit.Defender(70, (StatusEffect.VETERAN,)))
+        for copied in (copy.deepcopy(rf), pickle.loads(pickle.dumps(rf))):
+            assert type(copied) is type(rf)
+            assert copied == rf
+            assert copied.cost == 18
+            assert copied.max_hp == 200
+
     def test_rf_repr(self):
         rf = unit.Raft()
         assert repr(rf).startswith(